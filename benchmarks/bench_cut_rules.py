@@ -0,0 +1,101 @@
+"""
+Benchmark of the cut rule checks over generated sheets with a growing number of contours.
+Measures flattening the figures, the distance check between the figures (find_close_figures), the web width check
+(find_thin_webs) and all checks of enforce_cut_rules, the time per contour should stay about the same (linear runtime).
+All checks are also run with a process per cpu, the tiles of the sheet are checked in parallel (see check_tiles), and
+incrementally after removing a figure (see enforce_cut_rules_cached, the cache of the whole sheet is written before).
+
+Run from the root of the repository:
+    python -m benchmarks.bench_cut_rules [contour counts]
+"""
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from src.cut_rules import FACTOR, enforce_cut_rules, find_close_figures, find_thin_webs
+from src.flattening import flatten_figures
+from src.rule_cache import enforce_cut_rules_cached
+from src.svg_handler import read_svg_file
+
+CONTOUR_COUNTS = (1000, 10000, 100000)
+THICKNESS = 1
+# distance between the parts on the sheet in mm
+PITCH = 12
+
+
+def generate_sheet(directory, count):
+    """
+    Generates a sheet with parts on a grid: circles, rounded rectangles and paths with arcs and Bézier curves, which
+    are moved randomly, thus some of them are too close to their neighbours.
+    :param directory: string, directory of the file
+    :param count: int, number of contours
+    :return: string, path of the svg file
+    """
+    random.seed(0)
+    columns = math.ceil(math.sqrt(count))
+    size = columns * PITCH
+    svg_path = os.path.join(directory, f'sheet_{count}.svg')
+    with open(svg_path, 'w') as svg_file:
+        svg_file.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}mm" height="{size}mm" '
+                       f'viewBox="0 0 {size} {size}">\n')
+        for index in range(count):
+            x = index % columns * PITCH + random.uniform(0, 1.5)
+            y = index // columns * PITCH + random.uniform(0, 1.5)
+            match index % 3:
+                case 0:
+                    svg_file.write(f'<circle cx="{x + 5:.3f}" cy="{y + 5:.3f}" r="5"/>\n')
+                case 1:
+                    svg_file.write(f'<rect x="{x:.3f}" y="{y:.3f}" width="10" height="10" rx="1"/>\n')
+                case 2:
+                    svg_file.write(f'<path d="M{x:.3f},{y:.3f} h 8 a 2,2 0 0 1 2,2 v 4 '
+                                   f'c 0,3 -4,4 -6,4 q -4,0 -4,-4 z"/>\n')
+        svg_file.write('</svg>\n')
+    return svg_path
+
+
+def run_benchmark(counts):
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"{'contours':>9} {'flatten [s]':>12} {'distance [s]':>13} {'web [s]':>8} {'all rules [s]':>14} "
+              f"{'parallel [s]':>13} {'incremental [s]':>16} {'us/contour':>11} {'violations':>11}")
+        for count in counts:
+            svg_figures = read_svg_file(generate_sheet(directory, count))
+
+            start = time.perf_counter()
+            polylines = flatten_figures(svg_figures)
+            flatten_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            find_close_figures(polylines, FACTOR * THICKNESS)
+            distance_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            find_thin_webs(polylines, FACTOR * THICKNESS)
+            web_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            violations = enforce_cut_rules(svg_figures, THICKNESS)
+            total_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            enforce_cut_rules(svg_figures, THICKNESS, workers=None)
+            parallel_time = time.perf_counter() - start
+
+            cache_file = os.path.join(directory, f'sheet_{count}.rules.npz')
+            enforce_cut_rules_cached(svg_figures, THICKNESS, cache_file)
+            start = time.perf_counter()
+            enforce_cut_rules_cached(svg_figures[:-1], THICKNESS, cache_file)
+            incremental_time = time.perf_counter() - start
+            print(f"{count:>9} {flatten_time:>12.3f} {distance_time:>13.3f} {web_time:>8.3f} {total_time:>14.3f} "
+                  f"{parallel_time:>13.3f} {incremental_time:>16.3f} {total_time / count * 1e6:>11.1f} "
+                  f"{len(violations):>11}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    run_benchmark([int(count) for count in sys.argv[1:]] or CONTOUR_COUNTS)
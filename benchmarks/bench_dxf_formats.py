@@ -0,0 +1,103 @@
+"""
+Benchmark of the dxf output formats over a corpus of svg files.
+Compares ascii and binary dxf for write_dxf and write_dxf_streaming: the write time, the file size and the time
+ezdxf needs to read the file again.
+
+Run from the root of the repository:
+    python -m benchmarks.bench_dxf_formats [svg files or directories]
+Without files, a generated svg file with lines, circles, polygons and paths is used as corpus.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import ezdxf
+
+from src.dxf_handler import write_dxf, write_dxf_streaming
+from src.svg_handler import read_svg_file
+
+GENERATED_FIGURE_COUNT = 2000
+FORMATS = ('asc', 'bin')
+
+
+def collect_files(paths):
+    """
+    Collects the svg files of the given paths.
+    :param paths: list of svg files or directories (searched recursively)
+    :return: list of strings, svg files
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(root, name) for root, _, names in os.walk(path)
+                         for name in sorted(names) if name.endswith('.svg'))
+        else:
+            files.append(path)
+    return files
+
+
+def generate_svg_file(directory, count):
+    """
+    Generates a svg file with lines, circles, polygons and paths (with arcs and Bézier curves).
+    :param directory: string, directory of the file
+    :param count: int, number of figures of every kind
+    :return: string, path of the svg file
+    """
+    random.seed(0)
+    svg_path = os.path.join(directory, 'generated.svg')
+    with open(svg_path, 'w') as svg_file:
+        svg_file.write('<svg xmlns="http://www.w3.org/2000/svg" width="1000mm" height="1000mm" '
+                       'viewBox="0 0 1000 1000">\n')
+        for _ in range(count):
+            x, y = random.uniform(0, 990), random.uniform(0, 990)
+            svg_file.write(f'<line x1="{x:.3f}" y1="{y:.3f}" x2="{x + 5:.3f}" y2="{y + 2:.3f}"/>'
+                           f'<circle cx="{x:.3f}" cy="{y:.3f}" r="2"/>'
+                           f'<polygon points="{x:.3f},{y:.3f} {x + 4:.3f},{y:.3f} {x + 4:.3f},{y + 3:.3f}"/>'
+                           f'<path d="M{x:.3f},{y:.3f} l 3,0 a 2,2 0 0 1 2,2 c 1,1 2,2 3,0 z"/>\n')
+        svg_file.write('</svg>\n')
+    return svg_path
+
+
+def measure(svg_files, output_dir, writer, fmt):
+    """
+    Converts all files with the writer and reads them again with ezdxf.
+    :param svg_files: list of strings, svg files
+    :param output_dir: string, directory of the dxf files
+    :param writer: function, write_dxf or write_dxf_streaming
+    :param fmt: string, 'asc' or 'bin'
+    :return: (write time [s], size [bytes], read time [s]) tuple
+    """
+    write_time = read_time = size = 0
+    for index, svg_file in enumerate(svg_files):
+        svg_figures = read_svg_file(svg_file)
+        start = time.perf_counter()
+        dxf_path = writer(svg_figures, f"{index}_{fmt}", output_dir, fmt)
+        write_time += time.perf_counter() - start
+        size += os.path.getsize(dxf_path)
+
+        start = time.perf_counter()
+        ezdxf.readfile(dxf_path)
+        read_time += time.perf_counter() - start
+    return write_time, size, read_time
+
+
+def run_benchmark(paths):
+    output_dir = tempfile.mkdtemp()
+    try:
+        svg_files = collect_files(paths) if paths else [generate_svg_file(output_dir, GENERATED_FIGURE_COUNT)]
+        print(f"corpus: {len(svg_files)} files, {sum(map(os.path.getsize, svg_files)) / 1e6:.1f} MB")
+
+        print(f"{'writer':<20} {'format':>6} {'write [s]':>10} {'size [MB]':>10} {'read [s]':>9}")
+        for writer in (write_dxf, write_dxf_streaming):
+            for fmt in FORMATS:
+                write_time, size, read_time = measure(svg_files, output_dir, writer, fmt)
+                print(f"{writer.__name__:<20} {fmt:>6} {write_time:>10.3f} {size / 1e6:>10.2f} {read_time:>9.3f}")
+    finally:
+        shutil.rmtree(output_dir)
+
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1:])
@@ -0,0 +1,46 @@
+"""
+Micro-benchmark of the svg points parser.
+Compares parse_points with the former split based parsing of the polygon/polyline points.
+
+Run from the root of the repository: python -m benchmarks.bench_number_parser
+"""
+import random
+import timeit
+
+from src.svg_shapes.number_parser import parse_points
+
+POINT_COUNTS = (10, 1000, 100000)
+REPEAT = 5
+
+
+def split_points(points):
+    """
+    Former parsing of the points attribute (only supports "x,y x,y").
+    :param points: string, points attribute
+    :return: list of (x, y) tuples
+    """
+    return [(float(p.split(',')[0]), float(p.split(',')[1])) for p in points.strip().split()]
+
+
+def create_points_string(count):
+    """
+    Creates a points attribute with random coordinates.
+    :param count: int, number of points
+    :return: string, "x,y x,y ..."
+    """
+    return " ".join(f"{random.uniform(-1000, 1000):.3f},{random.uniform(-1000, 1000):.3f}" for _ in range(count))
+
+
+def run_benchmark():
+    random.seed(0)
+    print(f"{'points':>8} {'split [ms]':>12} {'parse_points [ms]':>18} {'speedup':>8}")
+    for count in POINT_COUNTS:
+        points = create_points_string(count)
+        number = max(1, 100000 // count)
+        split_time = min(timeit.repeat(lambda: split_points(points), number=number, repeat=REPEAT)) / number
+        parse_time = min(timeit.repeat(lambda: parse_points(points), number=number, repeat=REPEAT)) / number
+        print(f"{count:>8} {split_time * 1000:>12.3f} {parse_time * 1000:>18.3f} {split_time / parse_time:>8.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
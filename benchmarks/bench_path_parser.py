@@ -0,0 +1,125 @@
+"""
+Benchmark of the path data parser over a corpus of svg paths.
+Compares parse_path_data with svgpathtools.parse_path, for parsing only and for the scaling of a path
+(parse, scale and serialize, as scale_path does it).
+
+Run from the root of the repository:
+    python -m benchmarks.bench_path_parser [svg files or directories]
+The d attributes of all paths (and font glyphs) of the given files are used as corpus. Without files, a corpus of
+generated glyph like paths is used.
+"""
+import os
+import random
+import sys
+import time
+import warnings
+import xml.etree.ElementTree as ET
+
+from svgpathtools import parse_path
+
+from src.svg_shapes.path_data import parse_path_data
+
+GENERATED_PATH_COUNT = 2000
+
+
+def load_corpus(paths):
+    """
+    Collects the d attributes of all path and glyph elements of the svg files.
+    :param paths: list of svg files or directories (searched recursively)
+    :return: list of strings, path data
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(root, name) for root, _, names in os.walk(path)
+                         for name in sorted(names) if name.endswith('.svg'))
+        else:
+            files.append(path)
+
+    corpus = []
+    for file in files:
+        try:
+            for _, element in ET.iterparse(file):
+                if element.tag.rsplit('}', 1)[-1] in ('path', 'glyph') and element.get('d'):
+                    corpus.append(element.get('d'))
+                element.clear()
+        except ET.ParseError:
+            print(f"skipped {file}: not a valid svg file")
+    return corpus
+
+
+def generate_corpus(count):
+    """
+    Generates glyph like paths: closed contours of relative lines, cubic and quadratic Bézier curves and arcs.
+    :param count: int, number of paths
+    :return: list of strings, path data
+    """
+    random.seed(0)
+
+    def value():
+        return f"{random.uniform(-50, 50):.3f}"
+
+    corpus = []
+    for _ in range(count):
+        commands = [f"M{random.uniform(0, 1000):.3f} {random.uniform(0, 1000):.3f}"]
+        for _ in range(random.randint(10, 80)):
+            kind = random.random()
+            if kind < 0.35:
+                commands.append(f"c{value()} {value()} {value()} {value()} {value()} {value()}")
+            elif kind < 0.5:
+                commands.append(f"s{value()} {value()} {value()} {value()}")
+            elif kind < 0.6:
+                commands.append(f"q{value()} {value()} {value()} {value()}")
+            elif kind < 0.7:
+                commands.append(f"a{random.uniform(20, 60):.3f} {random.uniform(20, 60):.3f} 0 0 1 {value()} {value()}")
+            elif kind < 0.8:
+                commands.append(f"h{value()}v{value()}")
+            else:
+                commands.append(f"l{value()} {value()}")
+        commands.append("z")
+        corpus.append("".join(commands))
+    return corpus
+
+
+def measure(function, corpus):
+    """
+    Measures the time to call the function for every path of the corpus.
+    :param function: function, called with the path data
+    :param corpus: list of strings, path data
+    :return: float, time in seconds
+    """
+    start = time.perf_counter()
+    for path_string in corpus:
+        function(path_string)
+    return time.perf_counter() - start
+
+
+def scale_svgpathtools(path_string):
+    # arcs can only be scaled uniformly by svgpathtools
+    return parse_path(path_string).scaled(2, 2).d()
+
+
+def scale_path_data(path_string):
+    path_data = parse_path_data(path_string)
+    path_data.scale(2, 2)
+    return path_data.d()
+
+
+def run_benchmark(paths):
+    corpus = load_corpus(paths) if paths else generate_corpus(GENERATED_PATH_COUNT)
+    print(f"corpus: {len(corpus)} paths, {sum(len(path_string) for path_string in corpus) / 1e6:.1f} MB")
+
+    with warnings.catch_warnings():
+        # svgpathtools warns about degenerate arcs
+        warnings.simplefilter('ignore')
+        results = [("parse", measure(parse_path, corpus), measure(parse_path_data, corpus)),
+                   ("parse, scale, serialize", measure(scale_svgpathtools, corpus), measure(scale_path_data, corpus))]
+
+    print(f"{'':<24} {'svgpathtools [s]':>16} {'path_data [s]':>14} {'speedup':>8}")
+    for name, svgpathtools_time, path_data_time in results:
+        print(f"{name:<24} {svgpathtools_time:>16.3f} {path_data_time:>14.3f} "
+              f"{svgpathtools_time / path_data_time:>8.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark(sys.argv[1:])
@@ -0,0 +1,232 @@
+import glob
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cut_order import optimize_cut_order
+from src.cut_rules import enforce_cut_rules
+from src.dxf_handler import write_dxf, write_dxf_streaming
+from src.duplicate_filter import DuplicateFilter, remove_duplicates
+from src.logging_config import setup_logger
+from src.rule_cache import RULE_CACHE_EXTENSION, enforce_cut_rules_cached
+from src.svg_handler import read_svg_file, scale_file_param, iter_svg_file, iter_scale_file_param
+
+batch_logger = setup_logger(__name__)
+
+# result of the conversion of a single file, travel is the rapid travel (before, after) of the cut order optimization
+# (None if the order is not optimized), violations the list of CutRuleViolation (None if the cut rules are not
+# checked), error is None if the conversion succeeded
+ConversionResult = namedtuple('ConversionResult', ['svg_file', 'dxf_file', 'figure_count', 'file_size', 'seconds',
+                                                   'duplicates', 'travel', 'violations', 'error'])
+
+
+def collect_svg_files(inputs):
+    """
+    Collects the svg files to convert, together with the name of their dxf file.
+    An input can be a svg file, a directory (searched recursively, the dxf files keep the relative sub directories)
+    or a glob pattern. The files are sorted, every file is only taken once and names, which occur several times,
+    get a counter. Thus, the order and names only depend on the inputs.
+
+    :param inputs: list of strings, svg files, directories or glob patterns
+    :return: list of tuples, [(svg file, dxf name without extension), ...]
+    """
+    svg_files = []
+    for svg_input in inputs:
+        if os.path.isdir(svg_input):
+            for root, dirs, names in os.walk(svg_input):
+                dirs.sort()
+                svg_files.extend((os.path.join(root, name), os.path.relpath(os.path.join(root, name), svg_input))
+                                 for name in sorted(names) if name.lower().endswith('.svg'))
+        elif os.path.isfile(svg_input):
+            svg_files.append((svg_input, os.path.basename(svg_input)))
+        else:
+            matches = sorted(path for path in glob.glob(svg_input, recursive=True) if os.path.isfile(path))
+            if not matches:
+                batch_logger.warning(f"no svg files found for: {svg_input}")
+            svg_files.extend((path, os.path.basename(path)) for path in matches)
+
+    collected = []
+    seen_files = set()
+    name_counts = {}
+    for svg_file, relative_name in svg_files:
+        if os.path.abspath(svg_file) in seen_files:
+            continue
+        seen_files.add(os.path.abspath(svg_file))
+        dxf_name = os.path.splitext(relative_name)[0]
+        name_counts[dxf_name] = name_counts.get(dxf_name, 0) + 1
+        if name_counts[dxf_name] > 1:
+            dxf_name = f"{dxf_name}_{name_counts[dxf_name]}"
+        collected.append((svg_file, dxf_name))
+    return collected
+
+
+def convert_file(svg_file, dxf_name, output_dir, scale_x=1, scale_y=1, streaming=False, fmt='asc',
+                 flatten_tolerance=None, join_tolerance=None, duplicate_tolerance=None, optimize_order=False,
+                 thickness=None, figure_workers=1, incremental=False, reproducible=False):
+    """
+    Converts a single svg file into a dxf file: read_svg_file -> scale_file_param -> write_dxf, or in streaming mode
+    iter_svg_file -> iter_scale_file_param -> write_dxf_streaming (constant memory, inserts of blocks are exploded).
+    Errors are not raised, but returned in the result, thus a broken file does not stop a batch.
+
+    :param svg_file: string, path of the svg file
+    :param dxf_name: string, name of the dxf file without extension (relative to the output directory)
+    :param output_dir: string, directory of the dxf files
+    :param scale_x: float, scaling factor in x direction (default 1)
+    :param scale_y: float, scaling factor in y direction (default 1)
+    :param streaming: bool, True if the file is converted in streaming mode (default False)
+    :param fmt: string, 'asc' for ascii dxf or 'bin' for binary dxf (default 'asc')
+    :param flatten_tolerance: float, if given, the Bézier curves are flattened into polylines with this maximal
+                              distance in mm (after scaling), otherwise they are approximated by splines (default None)
+    :param join_tolerance: float, if given, lines with coincident endpoints are joined into polylines, not possible in
+                           streaming mode (default None)
+    :param duplicate_tolerance: float, if given, duplicated figures and path segments (within this distance in mm,
+                                after scaling) are removed before they are written (default None)
+    :param optimize_order: bool, True if the figures are ordered to minimize the rapid travel of the cutting head (see
+                           optimize_cut_order), not possible in streaming mode (default False)
+    :param thickness: float, if given, the cut rules for this thickness of the material in mm are checked on the
+                      scaled figures (see enforce_cut_rules), not possible in streaming mode (default None)
+    :param figure_workers: int, number of processes drawing the figures of the file (see draw_figures_parallel) and
+                           checking the cut rules in tiles (see check_tiles), not used in streaming mode (default 1)
+    :param incremental: bool, True if the results of the cut rules are kept in a cache file next to the dxf file and
+                        only the changed figures are re-checked (see enforce_cut_rules_cached, default False)
+    :param reproducible: bool, True if the dxf file is written with fixed metadata (dates and guids, see
+                         set_fixed_meta_data, default False)
+    :return: ConversionResult
+    """
+    start = time.perf_counter()
+    duplicates = 0
+    travel = None
+    violations = None
+    try:
+        file_size = os.path.getsize(svg_file)
+        os.makedirs(os.path.dirname(os.path.join(output_dir, dxf_name)) or '.', exist_ok=True)
+        if streaming:
+            if join_tolerance is not None:
+                raise ValueError("lines can not be joined in streaming mode")
+            if optimize_order:
+                raise ValueError("the cut order can not be optimized in streaming mode")
+            if thickness is not None:
+                raise ValueError("the cut rules can not be checked in streaming mode")
+            svg_figures = iter_svg_file(svg_file)
+            if scale_x != 1 or scale_y != 1:
+                svg_figures = iter_scale_file_param(svg_figures, scale_x, scale_y)
+            if duplicate_tolerance is not None:
+                duplicate_filter = DuplicateFilter(duplicate_tolerance)
+                svg_figures = duplicate_filter.filter(svg_figures)
+            figure_count = [-1]  # without the header
+            dxf_file = write_dxf_streaming(_count_figures(svg_figures, figure_count), dxf_name, output_dir,
+                                           fmt, flatten_tolerance=flatten_tolerance, reproducible=reproducible)
+            figure_count = figure_count[0]
+            if duplicate_tolerance is not None:
+                duplicates = duplicate_filter.removed_figures + duplicate_filter.removed_segments
+        else:
+            svg_figures = read_svg_file(svg_file)
+            if svg_figures is None:
+                raise ValueError("not a valid svg file")
+            if scale_x != 1 or scale_y != 1:
+                svg_figures = scale_file_param(svg_figures, scale_x, scale_y)
+            if duplicate_tolerance is not None:
+                svg_figures, duplicates = remove_duplicates(svg_figures, duplicate_tolerance)
+            if thickness is not None:
+                if incremental:
+                    violations = enforce_cut_rules_cached(svg_figures, thickness,
+                                                          os.path.join(output_dir, dxf_name + RULE_CACHE_EXTENSION),
+                                                          workers=figure_workers)
+                else:
+                    violations = enforce_cut_rules(svg_figures, thickness, workers=figure_workers)
+            if optimize_order:
+                svg_figures, *travel = optimize_cut_order(svg_figures)
+                travel = tuple(travel)
+            dxf_file = write_dxf(svg_figures, dxf_name, output_dir, fmt, flatten_tolerance=flatten_tolerance,
+                                 join_tolerance=join_tolerance, workers=figure_workers, reproducible=reproducible)
+            figure_count = len(svg_figures) - 1
+    except Exception as e:
+        batch_logger.error(f"conversion of {svg_file} failed: {e}")
+        return ConversionResult(svg_file, None, 0, 0, time.perf_counter() - start, 0, None, None,
+                                f"{type(e).__name__}: {e}")
+    return ConversionResult(svg_file, dxf_file, figure_count, file_size, time.perf_counter() - start, duplicates,
+                            travel, violations, None)
+
+
+def _count_figures(svg_figures, count):
+    """
+    Counts the figures, while they are consumed.
+    :param svg_figures: iterable with svg figures
+    :param count: list, with the count as only element, it is increased for every figure
+    :return: generator, yielding the svg figures
+    """
+    for figure in svg_figures:
+        count[0] += 1
+        yield figure
+
+
+def _convert_job(job):
+    """
+    Converts the file of a job (see convert_files), the jobs are given one argument to be mapped by the pool.
+    :param job: tuple, (svg file, dxf name, output dir, scale_x, scale_y, streaming, fmt, flatten_tolerance,
+                join_tolerance, duplicate_tolerance, optimize_order, thickness, figure_workers, incremental,
+                reproducible)
+    :return: ConversionResult
+    """
+    return convert_file(*job)
+
+
+def convert_files(svg_files, output_dir, scale_x=1, scale_y=1, workers=None, reproducible=False, streaming=False,
+                  fmt='asc', flatten_tolerance=None, join_tolerance=None, duplicate_tolerance=None,
+                  optimize_order=False, thickness=None, incremental=False, figure_workers=1):
+    """
+    Converts several svg files into dxf files with a pool of processes, one file per task.
+    The results are yielded in the order of the files, not in the order the workers finish them. Every file is
+    converted on its own, thus the dxf files do not depend on the number of workers. A single file is converted in
+    the current process.
+
+    :param svg_files: list of tuples, [(svg file, dxf name), ...] (see collect_svg_files)
+    :param output_dir: string, directory of the dxf files
+    :param scale_x: float, scaling factor in x direction (default 1)
+    :param scale_y: float, scaling factor in y direction (default 1)
+    :param workers: int, number of processes, 1 converts in the current process (default number of cpus)
+    :param reproducible: bool, if True the dxf files are written with fixed metadata (dates and guids), thus
+                         the same svg file always gives the same dxf file (default False)
+    :param streaming: bool, True if the files are converted in streaming mode (see convert_file, default False)
+    :param fmt: string, 'asc' for ascii dxf or 'bin' for binary dxf (default 'asc')
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in mm, None for splines
+                              (default None)
+    :param join_tolerance: float, if given, lines with coincident endpoints are joined into polylines (default None)
+    :param duplicate_tolerance: float, if given, duplicated figures and path segments are removed (default None)
+    :param optimize_order: bool, True if the cut order is optimized (default False)
+    :param thickness: float, if given, the cut rules for this thickness of the material in mm are checked
+                      (default None)
+    :param incremental: bool, True if only the changed figures of a file are re-checked on the next run (see
+                        convert_file, default False)
+    :param figure_workers: int, number of processes drawing the figures and checking the cut rules of a file, in
+                           every file worker (see convert_file, default 1)
+    :return: generator, yielding a ConversionResult for every file
+    """
+    jobs = [(svg_file, dxf_name, output_dir, scale_x, scale_y, streaming, fmt, flatten_tolerance, join_tolerance,
+             duplicate_tolerance, optimize_order, thickness, figure_workers, incremental, reproducible)
+            for svg_file, dxf_name in svg_files]
+    if workers == 1 or len(jobs) <= 1:
+        yield from map(_convert_job, jobs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_convert_job, jobs)
+
+
+def summarize_results(results, seconds):
+    """
+    Summarizes the results of a batch.
+    :param results: list of ConversionResult
+    :param seconds: float, wall-clock time of the batch
+    :return: dictionary, with the number of converted and failed files, the converted size (MB) and the throughput
+             (files/s, MB/s)
+    """
+    converted = [result for result in results if result.error is None]
+    megabytes = sum(result.file_size for result in converted) / 1e6
+    return {'converted': len(converted),
+            'failed': len(results) - len(converted),
+            'megabytes': megabytes,
+            'seconds': seconds,
+            'files_per_second': len(results) / seconds if seconds > 0 else 0.0,
+            'megabytes_per_second': megabytes / seconds if seconds > 0 else 0.0}
@@ -0,0 +1,110 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from src.logging_config import setup_logger
+
+joiner_logger = setup_logger(__name__)
+
+# distance (in mm), within which endpoints are coincident
+JOIN_TOLERANCE = 1e-6
+
+
+def join_lines(layout, tolerance=JOIN_TOLERANCE):
+    """
+    Joins the lines of a layout into polylines, e.g. svg files, which consist of thousands of single lines.
+    Lines, whose endpoints are coincident, are chained into one LWPOLYLINE, which is closed if the chain ends at its
+    start. Only lines on the same layer are joined, lines without a coincident endpoint are kept.
+    The coincident endpoints are found with a kd-tree, thus the time grows with n log n in the number of lines.
+
+    :param layout: layout of the dxf file, e.g. the modelspace
+    :param tolerance: float, distance within endpoints are coincident (default JOIN_TOLERANCE)
+    :return: int, number of the joined lines
+    """
+    lines_by_layer = {}
+    for line in layout.query('LINE'):
+        lines_by_layer.setdefault(line.dxf.layer, []).append(line)
+
+    entitydb = layout.doc.entitydb
+    joined = 0
+    for layer, lines in lines_by_layer.items():
+        endpoints = np.array([(line.dxf.start.x, line.dxf.start.y, line.dxf.end.x, line.dxf.end.y)
+                              for line in lines]).reshape(-1, 2)
+        nodes, positions = cluster_points(endpoints, tolerance)
+        for path, segments, closed in chain_segments(nodes.reshape(-1, 2)):
+            if len(segments) < 2:
+                continue
+            vertices = positions[path[:-1] if closed else path]
+            layout.add_lwpolyline(vertices.tolist(), format='xy', close=closed, dxfattribs={'layer': layer})
+            for segment in segments:
+                entitydb.delete_entity(lines[segment])
+            joined += len(segments)
+    # remove the deleted lines from the layout at once
+    layout.purge()
+    joiner_logger.info(f"joined {joined} lines into polylines")
+    return joined
+
+
+def cluster_points(points, tolerance):
+    """
+    Clusters coincident points: all pairs of points within the tolerance are found with a kd-tree, the clusters are
+    the connected components of these pairs (thus a chain of close points is one cluster).
+
+    :param points: array (n, 2), with the points
+    :param tolerance: float, distance within points are coincident
+    :return: (nodes, positions) tuple, nodes: array (n,) with the cluster of every point, positions: array with the
+             position of every cluster (its first point)
+    """
+    pairs = cKDTree(points).query_pairs(tolerance, output_type='ndarray')
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(points), len(points)))
+    _, clusters = connected_components(graph, directed=False)
+    _, first_points, nodes = np.unique(clusters, return_index=True, return_inverse=True)
+    return nodes.reshape(-1), points[first_points]
+
+
+def chain_segments(segment_nodes):
+    """
+    Chains segments, which share their nodes. A chain is continued with any unused segment of its last node, the
+    chains start at nodes with an odd number of segments (i.e. open ends) first, thus every open end is the end of a
+    chain. Segments with the same node at both ends are not chained.
+
+    :param segment_nodes: array (n, 2), start and end node of every segment
+    :return: list of tuples, [(nodes of the chain, segments of the chain, True if the chain is closed), ...]
+    """
+    node_count = int(segment_nodes.max()) + 1 if len(segment_nodes) else 0
+    loops = segment_nodes[:, 0] == segment_nodes[:, 1]
+
+    # segments of every node (sorted by node), without the segments with the same node at both ends
+    node_segments = np.flatnonzero(~loops).repeat(2)
+    ends = segment_nodes[~loops].reshape(-1)
+    order = np.argsort(ends, kind='stable')
+    adjacency = node_segments[order].tolist()
+    degree = np.bincount(ends, minlength=node_count)
+    pointers = (np.cumsum(degree) - degree).tolist()
+    stops = np.cumsum(degree).tolist()
+
+    nodes = segment_nodes.tolist()
+    used = [False] * len(segment_nodes)
+    chains = []
+    for start in np.concatenate((np.flatnonzero(degree % 2), np.flatnonzero(degree))).tolist():
+        while True:
+            node = start
+            path = [node]
+            segments = []
+            while True:
+                # skip the used segments of the node
+                while pointers[node] < stops[node] and used[adjacency[pointers[node]]]:
+                    pointers[node] += 1
+                if pointers[node] == stops[node]:
+                    break
+                segment = adjacency[pointers[node]]
+                used[segment] = True
+                first, second = nodes[segment]
+                node = second if first == node else first
+                path.append(node)
+                segments.append(segment)
+            if not segments:
+                break
+            chains.append((path, segments, len(segments) > 1 and path[0] == path[-1]))
+    return chains
@@ -0,0 +1,295 @@
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from src.logging_config import setup_logger
+
+cut_order_logger = setup_logger(__name__)
+
+# number of nearest figures, which are candidates for the next cut (nearest neighbour tour) or a 2-opt move
+NEIGHBOURS = 8
+# maximal number of figures, which are reversed by a 2-opt move
+TWO_OPT_WINDOW = 1000
+# maximal number of passes of 2-opt over a tour
+TWO_OPT_PASSES = 3
+# distance, within the start and end of a figure are the same point (closed figure)
+CLOSED_TOLERANCE = 1e-9
+
+
+def optimize_cut_order(svg_figures, start=(0, 0)):
+    """
+    Orders the figures to minimize the rapid travel of the cutting head between the cuts.
+    A figure, which lies inside a closed figure (by their bounding boxes), is cut before it, thus inner contours are
+    cut before their outer contour (the part would drop out otherwise). The figures inside a closed figure and the
+    outermost figures are each ordered by a nearest neighbour tour (with a kd-tree), which is refined by 2-opt.
+    The header stays the first figure.
+
+    :param svg_figures: list with the figures of a svg file (after scaling)
+    :param start: tuple, (x, y) position of the cutting head before the first cut (default (0, 0))
+    :return: (figures, travel_before, travel_after) tuple, figures: ordered list, travel_before/travel_after: rapid
+             travel length in mm of the given and the ordered figures
+    """
+    headers, figures, points = [], [], []
+    for figure in svg_figures:
+        figure_points = cut_points(figure)
+        if figure_points is None:
+            headers.append(figure)
+        else:
+            figures.append(figure)
+            points.append(figure_points)
+    if not figures:
+        return headers, 0.0, 0.0
+
+    entries, exits, boxes, closed = (np.array(values, dtype=float) for values in zip(*points))
+    closed = closed.astype(bool)
+    start = np.asarray(start, dtype=float)
+
+    children = nesting_children(boxes, closed)
+    order = []
+    append_cut_order(children, -1, entries, exits, start, order)
+
+    travel_before = travel_length(np.arange(len(figures)), entries, exits, start)
+    travel_after = travel_length(np.array(order), entries, exits, start)
+    cut_order_logger.info(f"rapid travel: {travel_before:.1f} mm before, {travel_after:.1f} mm after ordering")
+    return headers + [figures[index] for index in order], travel_before, travel_after
+
+
+def cut_points(figure):
+    """
+    Gets the points, where a figure is cut, and its extent.
+    :param figure: svg figure
+    :return: (entry, exit, box, closed) tuple, entry/exit: (x, y) where the cut starts/ends, box: (min x, min y,
+             max x, max y) bounding box, closed: True if the figure is a closed contour; None for figures, which are
+             not cut (e.g. the header)
+    """
+    match figure.get_name():
+        case 'circle':
+            radius_x, radius_y = abs(figure.radius), abs(figure.radius_y or figure.radius)
+            center = (figure.center_x, figure.center_y)
+            entry = (center[0] + radius_x, center[1])
+            return entry, entry, (center[0] - radius_x, center[1] - radius_y, center[0] + radius_x,
+                                  center[1] + radius_y), True
+        case 'ellipse':
+            (ax, ay), (bx, by) = figure.radius_x, figure.radius_y
+            extent_x, extent_y = math.hypot(ax, bx), math.hypot(ay, by)
+            entry = (figure.center_x + ax, figure.center_y + ay)
+            return entry, entry, (figure.center_x - extent_x, figure.center_y - extent_y,
+                                  figure.center_x + extent_x, figure.center_y + extent_y), True
+        case 'rectangle':
+            corner = np.array((figure.x, figure.y))
+            width, height = np.array(figure.rect_width), np.array(figure.rect_height)
+            corners = np.array((corner, corner + width, corner + width + height, corner + height))
+            entry = (figure.x, figure.y)
+            return entry, entry, (*corners.min(axis=0), *corners.max(axis=0)), True
+        case 'line':
+            points = np.array(((figure.x1, figure.y1), (figure.x2, figure.y2)))
+            return points[0], points[1], (*points.min(axis=0), *points.max(axis=0)), False
+        case 'polyline' | 'polygon':
+            points = np.asarray(figure.point_list, dtype=float).reshape(-1, 2)
+            if len(points) == 0:
+                return None
+            closed = figure.get_name() == 'polygon' or np.allclose(points[0], points[-1], atol=CLOSED_TOLERANCE)
+            return points[0], points[0] if closed else points[-1], (*points.min(axis=0), *points.max(axis=0)), closed
+        case 'path':
+            path_data = figure.path_data
+            if len(path_data) == 0:
+                return None
+            # the control points of Bézier curves and the circles around the arc centers contain the segments
+            points = path_data.points.reshape(-1, 2)
+            radii = np.repeat(path_data.radii.max(axis=1), 4)[:, None]
+            boxes = np.concatenate((points - radii, points + radii))
+            entry, exit_point = path_data.points[0, 0], path_data.points[-1, 3]
+            return entry, exit_point, (*boxes.min(axis=0), *boxes.max(axis=0)), \
+                bool(np.allclose(entry, exit_point, atol=CLOSED_TOLERANCE))
+        case 'use':
+            return figure.insert, figure.insert, (*figure.insert, *figure.insert), False
+    return None
+
+
+def nesting_children(boxes, closed):
+    """
+    Finds the figures inside every closed figure. A figure is inside a closed figure, if its bounding box is inside
+    the bounding box of the closed figure, it is assigned to the smallest one. The closed figures are indexed in a grid
+    of the cells they cover, thus only the closed figures around a figure are compared.
+
+    :param boxes: array (n, 4), bounding boxes (min x, min y, max x, max y) of the figures
+    :param closed: bool array (n,), True for closed figures
+    :return: dictionary, index of a figure (-1 for the outermost figures) -> list of the figures directly inside it
+    """
+    sizes = boxes[:, 2:] - boxes[:, :2]
+    areas = sizes.prod(axis=1)
+    contours = np.flatnonzero(closed & (areas > 0))
+    parents = np.full(len(boxes), -1)
+    if len(contours) > 0:
+        cell_size = max(float(np.median(sizes[contours].max(axis=1))), CLOSED_TOLERANCE)
+        cells = {}
+        # the smallest contours first, thus the first containing contour of a cell is the smallest
+        for contour in contours[np.argsort(areas[contours], kind='stable')].tolist():
+            min_x, min_y, max_x, max_y = np.floor(boxes[contour] / cell_size).astype(int).tolist()
+            for cell_x in range(min_x, max_x + 1):
+                for cell_y in range(min_y, max_y + 1):
+                    cells.setdefault((cell_x, cell_y), []).append(contour)
+
+        centers = np.floor((boxes[:, :2] + boxes[:, 2:]) / 2 / cell_size).astype(int).tolist()
+        for index, (box, cell) in enumerate(zip(boxes.tolist(), centers)):
+            for contour in cells.get(tuple(cell), ()):
+                outer = boxes[contour]
+                if contour != index and areas[contour] > areas[index] and outer[0] <= box[0] and \
+                        outer[1] <= box[1] and outer[2] >= box[2] and outer[3] >= box[3]:
+                    parents[index] = contour
+                    break
+
+    children = {}
+    for index, parent in enumerate(parents.tolist()):
+        children.setdefault(parent, []).append(index)
+    return children
+
+
+def append_cut_order(children, parent, entries, exits, position, order):
+    """
+    Appends the cut order of the figures inside a figure: the figures are ordered by a tour starting at the position,
+    the figures inside every figure are cut before it.
+
+    :param children: dictionary, figure -> figures directly inside it (see nesting_children)
+    :param parent: int, index of the figure (-1 for the outermost figures)
+    :param entries: array (n, 2), points where the cuts start
+    :param exits: array (n, 2), points where the cuts end
+    :param position: array (2,), position of the cutting head
+    :param order: list, the indices of the figures are appended
+    :return: array (2,), position of the cutting head after the last cut
+    """
+    figures = np.array(children.get(parent, []))
+    if len(figures) == 0:
+        return position
+    tour = optimize_tour(entries[figures], exits[figures], position)
+    for figure in figures[tour].tolist():
+        position = append_cut_order(children, figure, entries, exits, position, order)
+        order.append(figure)
+        position = exits[figure]
+    return position
+
+
+def optimize_tour(entries, exits, start):
+    """
+    Orders figures by a nearest neighbour tour, which is refined by 2-opt.
+    :param entries: array (n, 2), points where the cuts start
+    :param exits: array (n, 2), points where the cuts end
+    :param start: array (2,), position of the cutting head
+    :return: array (n,), order of the figures
+    """
+    tour = nearest_neighbour_tour(entries, exits, start)
+    return two_opt(tour, entries, exits, start)
+
+
+def nearest_neighbour_tour(entries, exits, start):
+    """
+    Creates a tour, which always goes from the exit of the last cut to the nearest entry of a figure not yet visited.
+    The nearest entries are found with a kd-tree, which is rebuilt without the visited figures, when most of the found
+    figures are already visited.
+
+    :param entries: array (n, 2), points where the cuts start (indexed by the kd-tree)
+    :param exits: array (n, 2), points where the cuts end, the cutting head moves on from there
+    :param start: array (2,), position of the cutting head
+    :return: array (n,), order of the figures
+    """
+    count = len(entries)
+    visited = np.zeros(count, dtype=bool)
+    remaining = np.arange(count)
+    tree = cKDTree(entries)
+    tour = []
+    position = start
+    neighbours = NEIGHBOURS
+    while len(tour) < count:
+        _, found = tree.query(position, k=min(neighbours, len(remaining)))
+        found = remaining[np.atleast_1d(found)]
+        free = found[~visited[found]]
+        if len(free) == 0:
+            if visited[remaining].sum() * 2 > len(remaining):
+                # most figures of the tree are visited, rebuild it with the remaining figures
+                remaining = np.flatnonzero(~visited)
+                tree = cKDTree(entries[remaining])
+            else:
+                neighbours *= 4
+            continue
+        figure = int(free[0])
+        visited[figure] = True
+        tour.append(figure)
+        position = exits[figure]
+        neighbours = NEIGHBOURS
+    return np.array(tour)
+
+
+def two_opt(tour, entries, exits, start):
+    """
+    Improves a tour with 2-opt: the part of the tour between two cuts is reversed, if the travel gets shorter. The
+    candidates are the nearest figures of every cut (kd-tree) within TWO_OPT_WINDOW positions. As the figures are not
+    reversed, the travel between the figures of the reversed part changes for open figures and is recalculated.
+
+    :param tour: array (n,), order of the figures
+    :param entries: array (n, 2), points where the cuts start
+    :param exits: array (n, 2), points where the cuts end
+    :param start: array (2,), position of the cutting head
+    :return: array (n,), improved order of the figures
+    """
+    count = len(tour)
+    if count < 3:
+        return tour
+    # the start position is a figure, which is fixed at the beginning of the tour
+    entries = np.vstack((entries, start))
+    exits = np.vstack((exits, start))
+    tour = np.concatenate(([count], tour))
+    positions = np.empty(count + 1, dtype=int)
+    positions[tour] = np.arange(count + 1)
+    _, candidates = cKDTree(entries[:count]).query(exits, k=min(NEIGHBOURS, count))
+    candidates = candidates.tolist()
+    # closed figures start and end at the same point, the travel between them is the same in both directions
+    symmetric = np.array_equal(entries, exits)
+
+    exit_points, entry_points = exits.tolist(), entries.tolist()
+
+    def distance(exit_figure, entry_figure):
+        return math.dist(exit_points[exit_figure], entry_points[entry_figure])
+
+    for _ in range(TWO_OPT_PASSES):
+        improved = False
+        for i in range(count - 1):
+            a, b = tour[i], tour[i + 1]
+            for c in candidates[a]:
+                j = positions[c]
+                if j <= i + 1 or j - i > TWO_OPT_WINDOW:
+                    continue
+                # reverse tour[i + 1:j + 1], thus a -> c and b -> d
+                delta = distance(a, c) - distance(a, b)
+                if j + 1 <= count:
+                    d = tour[j + 1]
+                    delta += distance(b, d) - distance(c, d)
+                part = tour[i + 1:j + 1]
+                if not symmetric:
+                    delta += (np.linalg.norm(exits[part[1:]] - entries[part[:-1]], axis=1).sum() -
+                              np.linalg.norm(exits[part[:-1]] - entries[part[1:]], axis=1).sum())
+                if delta < -CLOSED_TOLERANCE:
+                    tour[i + 1:j + 1] = part[::-1]
+                    positions[tour[i + 1:j + 1]] = np.arange(i + 1, j + 1)
+                    improved = True
+                    break
+        if not improved:
+            break
+    return tour[1:]
+
+
+def travel_length(order, entries, exits, start):
+    """
+    Calculates the rapid travel of the cutting head: from the start to the first cut and from the end of every cut
+    to the start of the next cut.
+
+    :param order: array (n,), order of the figures
+    :param entries: array (n, 2), points where the cuts start
+    :param exits: array (n, 2), points where the cuts end
+    :param start: array (2,), position of the cutting head
+    :return: float, travel length
+    """
+    if len(order) == 0:
+        return 0.0
+    travel = np.linalg.norm(entries[order[0]] - start)
+    return float(travel + np.linalg.norm(entries[order[1:]] - exits[order[:-1]], axis=1).sum())
@@ -1,71 +1,783 @@
-from logging_config import setup_logger
+import itertools
+import math
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from src.flattening import CLOSED_TOLERANCE, FLATTEN_TOLERANCE, flatten_figures, polyline_edges
+from src.logging_config import setup_logger
+from src.svg_shapes.path_data import LINE, QUADRATIC_BEZIER, ARC
+from src.svg_shapes.transform_matrix import apply_matrix_to_points
+
+cut_rules_logger = setup_logger(__name__)
 
 # multiplication factor: thickness * factor = minimal bound
 FACTOR = 0.7
 # minimal line with for laser cutting (0.3 mm)
 MIN_LINE_WIDTH = 0.3
+# maximal angle (in degrees) between two edges, which belong to the same feature (e.g. the edges of a flattened curve),
+# a larger angle is a corner, where the line width of the feature ends
+SMOOTH_ANGLE = 20
+# number of points of a Bézier curve, at which its radius of curvature is measured
+BEZIER_SAMPLES = 16
+# number of tiles of the sheet per worker process for the parallel distance and web width checks
+TILES_PER_WORKER = 4
 
-cut_rules_logger = setup_logger(__name__)
+# violation of a cut rule: rule is 'radius', 'corner_radius', 'line_width', 'distance' or 'web_width', figure is the
+# index of the figure in the list, segment the index of the segment, edge or corner in the figure (the index of the
+# figure in the block for uses of blocks, 0 for distances and webs), value the measured value and limit the minimal
+# value in mm, position (x, y) where the value is measured, other the index of the second figure of a distance (None
+# for the other rules)
+CutRuleViolation = namedtuple('CutRuleViolation', ['rule', 'figure', 'segment', 'value', 'limit', 'position', 'other'],
+                              defaults=(None,))
 
 
-def enforce_cut_rules(root, thickness):
+def enforce_cut_rules(svg_figures, thickness, min_line_width=MIN_LINE_WIDTH, tolerance=FLATTEN_TOLERANCE, workers=1):
+    """
+    Checks the cut rules on the figures of a svg file (transformed and scaled, in mm):
+        radius:        radius (of curvature) of circles, ellipses, arcs and Bézier curves >= FACTOR * thickness
+        corner_radius: radius of the rounded corners of rectangles >= FACTOR * thickness
+        line_width:    length of the straight edges of lines and rectangles, and of the runs of edges between two
+                       corners of polylines, polygons and the lines of paths >= min_line_width (see run_measurement)
+        distance:      distance between two contours (of two figures or of one) >= FACTOR * thickness (see
+                       find_close_figures)
+        web_width:     width of the webs and slots of a closed contour >= FACTOR * thickness (see find_thin_webs)
+    The figures are measured in batches of the same type with array operations (see measure_figures).
+
+    :param svg_figures: list with the figures of a svg file
+    :param thickness: float, thickness of the material in mm
+    :param min_line_width: float, minimal length of a straight edge in mm (default MIN_LINE_WIDTH)
+    :param tolerance: float, maximal distance of the flattened figures to the figures for the distances
+                      (default FLATTEN_TOLERANCE)
+    :param workers: int, number of processes checking the distances and web widths in tiles of the sheet (see
+                    check_tiles), None for the number of cpus (default 1)
+    :return: list of CutRuleViolation, sorted by figure and segment
+    """
+    polylines = flatten_figures(svg_figures, tolerance)
+    violations = figure_violations(svg_figures, thickness, min_line_width) + \
+        contour_violations(polylines, FACTOR * thickness, workers, groups=connected_contours(polylines, tolerance))
+    sort_violations(violations)
+    cut_rules_logger.info(f"{len(violations)} cut rule violations in {len(svg_figures)} figures")
+    return violations
+
+
+def figure_violations(svg_figures, thickness, min_line_width=MIN_LINE_WIDTH, indices=None):
+    """
+    Checks the cut rules of the single figures (radius, corner_radius and line_width, see measure_figures).
+    :param svg_figures: list with the figures of a svg file
+    :param thickness: float, thickness of the material in mm
+    :param min_line_width: float, minimal length of a straight edge in mm (default MIN_LINE_WIDTH)
+    :param indices: int array, index of every figure in the file, None if svg_figures are all figures of the file
+                    (default None)
+    :return: list of CutRuleViolation
+    """
     min_radius = FACTOR * thickness
-    min_distance_between_rail = FACTOR * thickness
-    min_steg_with = FACTOR * thickness
-    # iterate through svg content
-    for element in root.iter():
-        match element.tag:
-            case '{http://www.w3.org/2000/svg}circle':
-                # min radius
-                circle_cut_rules(element, min_radius)
-            case '{http://www.w3.org/2000/svg}ellipse':
-                pass
-            case '{http://www.w3.org/2000/svg}rect':
-                rectangle_cut_rules(element, min_radius)
-            case '{http://www.w3.org/2000/svg}line':
-                pass
-            case '{http://www.w3.org/2000/svg}polygon':
-                pass
-            case '{http://www.w3.org/2000/svg}path':
-                pass
-            case _:
-                cut_rules_logger.info(f"svg_element without matching figure tag: {element.tag}: {element.attrib}")
-
-    return root
-
-
-def circle_cut_rules(element, min_radius):
-    # min radius
-    if float(element.get('r')) < min_radius:
-        cut_rules_logger.error(f"radius to small: r = {float(element.get('r'))} mm, requested: {min_radius} mm")
-
-
-def rectangle_cut_rules(element, min_radius):
-    rect_width = float(element.get('width'))
-    rect_height = float(element.get('height'))
-    if element.get('rx') is not None:
-        rx = float(element.get('rx'))
-    else:
-        rx = 0
+    limits = {'radius': min_radius, 'corner_radius': min_radius, 'line_width': min_line_width}
+
+    violations = []
+    for rule, figures, segments, values, positions in measure_figures(svg_figures):
+        index = np.flatnonzero(values < limits[rule])
+        figures = figures[index] if indices is None else np.asarray(indices)[figures[index]]
+        violations.extend(CutRuleViolation(rule, figure, segment, value, limits[rule], tuple(position))
+                          for figure, segment, value, position in zip(figures.tolist(),
+                                                                      segments[index].tolist(),
+                                                                      values[index].tolist(),
+                                                                      positions[index].tolist()))
+    return violations
 
-    if element.get('ry') is not None:
-        ry = float(element.get('ry'))
+
+def contour_violations(polylines, min_distance, workers=1, cell_size=None, groups=None):
+    """
+    Checks the distances between the figures and the web widths of their closed contours (see find_close_figures and
+    find_thin_webs).
+    :param polylines: list of (figure, points, closed) tuples, flattened figures (see flatten_figures)
+    :param min_distance: float, minimal distance between two figures and minimal width of a web in mm
+    :param workers: int, number of processes checking tiles of the sheet (see check_tiles), None for the number of
+                    cpus (default 1)
+    :param cell_size: float, size of the cells of the grid of the distance check, None for the default (see
+                      find_close_figures)
+    :param groups: int array, connected contour of every polyline (see connected_contours), None to connect the
+                   polylines with FLATTEN_TOLERANCE (default None)
+    :return: list of CutRuleViolation
+    """
+    if workers == 1:
+        close_figures = find_close_figures(polylines, min_distance, cell_size, groups)
+        webs = find_thin_webs(polylines, min_distance)
     else:
-        ry = 0
+        close_figures, webs = check_tiles(polylines, min_distance, workers, cell_size, groups)
+    violations = [CutRuleViolation('distance', figure, 0, distance, min_distance, position, other)
+                  for figure, other, distance, position in close_figures]
+    violations.extend(CutRuleViolation('web_width', figure, 0, width, min_distance, position)
+                      for figure, width, position in webs)
+    return violations
+
+
+def sort_violations(violations):
+    """
+    Sorts violations by figure, segment, rule, the other figure and position.
+    :param violations: list of CutRuleViolation, sorted in place
+    :return: -
+    """
+    violations.sort(key=lambda violation: (violation.figure, violation.segment, violation.rule,
+                                           -1 if violation.other is None else violation.other, violation.position))
+
+
+def measure_figures(svg_figures):
+    """
+    Measures the values of the cut rules of all figures. The figures are grouped by their type and every group is
+    measured at once. Uses of blocks are measured by the figures of their block (once per block), scaled with the
+    smaller scaling factor of the insert.
+
+    :param svg_figures: list with the figures of a svg file
+    :return: list of (rule, figures, segments, values, positions) tuples, figures/segments: int arrays (n,) with the
+             index of the figure and segment, values: array (n,), positions: array (n, 2)
+    """
+    groups = {}
+    for index, figure in enumerate(svg_figures):
+        groups.setdefault(figure.get_name(), []).append(index)
+
+    measurements = []
+    for name, indices in groups.items():
+        indices = np.array(indices)
+        if name == 'use':
+            measurements.extend(measure_uses([svg_figures[index] for index in indices], indices))
+        elif name in MEASURES:
+            for rule, figures, segments, values, positions in MEASURES[name]([svg_figures[index]
+                                                                                for index in indices]):
+                measurements.append((rule, indices[figures], segments, values, positions))
+    return measurements
+
+
+def measure_circles(circles):
+    """
+    Measures the radius of circles (a circle scaled differently in x and y direction has the radius of curvature
+    of an ellipse).
+    :param circles: list of SvgCircle
+    :return: list of measurements (see measure_figures), figures are indices into the list
+    """
+    radii = np.abs([(circle.radius, circle.radius_y or circle.radius) for circle in circles])
+    centers = np.array([(circle.center_x, circle.center_y) for circle in circles], dtype=float)
+    return [('radius', np.arange(len(circles)), np.zeros(len(circles), dtype=int),
+             min_curvature_radius(radii.min(axis=1), radii.max(axis=1)), centers)]
+
+
+def measure_ellipses(ellipses):
+    """
+    Measures the minimal radius of curvature of ellipses, given by two (not necessarily orthogonal) axis vectors.
+    :param ellipses: list of SvgEllipse
+    :return: list of measurements (see measure_figures), figures are indices into the list
+    """
+    axes = np.array([(ellipse.radius_x, ellipse.radius_y) for ellipse in ellipses], dtype=float)
+    centers = np.array([(ellipse.center_x, ellipse.center_y) for ellipse in ellipses], dtype=float)
+    return [('radius', np.arange(len(ellipses)), np.zeros(len(ellipses), dtype=int), axes_curvature_radius(axes),
+             centers)]
+
+
+def measure_rectangles(rectangles):
+    """
+    Measures the straight edges (segment 0: edges in width direction, segment 1: edges in height direction) and the
+    radius of the rounded corners of rectangles.
+    :param rectangles: list of SvgRectangle
+    :return: list of measurements (see measure_figures), figures are indices into the list
+    """
+    corners = np.array([(rectangle.x, rectangle.y) for rectangle in rectangles], dtype=float)
+    width, height, rx, ry = (np.array(values, dtype=float) for values in zip(
+        *[(rectangle.rect_width, rectangle.rect_height, rectangle.rx, rectangle.ry) for rectangle in rectangles]))
+    count = len(rectangles)
+    edges = np.concatenate((np.linalg.norm(width, axis=1) - 2 * np.linalg.norm(rx, axis=1),
+                            np.linalg.norm(height, axis=1) - 2 * np.linalg.norm(ry, axis=1)))
+    measurements = [('line_width', np.tile(np.arange(count), 2), np.repeat([0, 1], count), edges,
+                     np.concatenate((corners + width / 2, corners + height / 2)))]
+
+    rounded = np.flatnonzero(np.any(rx != 0, axis=1) & np.any(ry != 0, axis=1))
+    if len(rounded) > 0:
+        measurements.append(('corner_radius', rounded, np.zeros(len(rounded), dtype=int),
+                             axes_curvature_radius(np.stack((rx[rounded], ry[rounded]), axis=1)), corners[rounded]))
+    return measurements
+
+
+def measure_lines(lines):
+    """
+    Measures the length of lines, lines without length are not cut and not measured.
+    :param lines: list of SvgLine
+    :return: list of measurements (see measure_figures), figures are indices into the list
+    """
+    points = np.array([((line.x1, line.y1), (line.x2, line.y2)) for line in lines], dtype=float)
+    return [edge_measurement(points[:, 0], points[:, 1], np.arange(len(lines)), np.zeros(len(lines), dtype=int))]
+
+
+def measure_polylines(polylines):
+    """
+    Measures the length of the runs of edges between the corners of polylines and polygons (including the closing
+    edge of polygons), thus a flattened curve is one feature and not a chain of short edges (see run_measurement).
+    :param polylines: list of SvgPolyline and SvgPolygon
+    :return: list of measurements (see measure_figures), figures are indices into the list
+    """
+    vertices = [np.asarray(polyline.point_list, dtype=float).reshape(-1, 2) for polyline in polylines]
+    # repeated points give edges without length, which are not cut
+    vertices = [points[np.concatenate(([True], np.any(points[1:] != points[:-1], axis=1)))] for points in vertices]
+    cyclic = np.array([polyline.get_name() == 'polygon' and len(points) > 2
+                       for polyline, points in zip(polylines, vertices)])
+    vertices = [np.concatenate((points[:-1] if np.array_equal(points[0], points[-1]) else points, points[:1]))
+                if closed else points for points, closed in zip(vertices, cyclic)]
+    counts = np.array([max(len(points) - 1, 0) for points in vertices])
+    if counts.sum() == 0:
+        return []
+    starts = np.concatenate([points[:-1] for points in vertices])
+    ends = np.concatenate([points[1:] for points in vertices])
+    figures = np.repeat(np.arange(len(polylines)), counts)
+    firsts = np.cumsum(counts) - counts
+    segments = np.arange(len(figures)) - np.repeat(firsts, counts)
+    # every edge follows the edge before it, the first edge of a polygon its closing edge
+    previous = np.arange(len(figures)) - 1
+    previous[firsts[counts > 0]] = np.where(cyclic, firsts + counts - 1, -1)[counts > 0]
+    return [run_measurement(starts, ends, figures, segments, previous)]
+
+
+def measure_paths(paths):
+    """
+    Measures the segments of paths: the length of the runs of lines between corners (see run_measurement), the
+    minimal radius of curvature of the arcs and of the Bézier curves (sampled at BEZIER_SAMPLES points, quadratic
+    curves are elevated to cubic curves).
+    :param paths: list of SvgPath
+    :return: list of measurements (see measure_figures), figures are indices into the list
+    """
+    counts = np.array([len(path.path_data) for path in paths])
+    if counts.sum() == 0:
+        return []
+    kinds = np.concatenate([path.path_data.kinds for path in paths])
+    points = np.concatenate([path.path_data.points for path in paths])
+    radii = np.abs(np.concatenate([path.path_data.radii for path in paths]))
+    figures = np.repeat(np.arange(len(paths)), counts)
+    segments = np.arange(len(figures)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    lines = np.flatnonzero((kinds == LINE) & np.any(points[:, 0] != points[:, 3], axis=1))
+    arcs = np.flatnonzero(kinds == ARC)
+    curves = np.flatnonzero((kinds != LINE) & (kinds != ARC))
+    measurements = [run_measurement(points[lines, 0], points[lines, 3], figures[lines], segments[lines],
+                                    path_line_previous(lines, points, figures, segments, counts)),
+                    ('radius', figures[arcs], segments[arcs],
+                     min_curvature_radius(radii[arcs].min(axis=1), radii[arcs].max(axis=1)), points[arcs, 0])]
+    if len(curves) > 0:
+        control_points = points[curves].copy()
+        quadratic = kinds[curves] == QUADRATIC_BEZIER
+        control_points[quadratic, 1] = points[curves[quadratic], 0] + 2 / 3 * (
+            points[curves[quadratic], 1] - points[curves[quadratic], 0])
+        control_points[quadratic, 2] = points[curves[quadratic], 3] + 2 / 3 * (
+            points[curves[quadratic], 2] - points[curves[quadratic], 3])
+        values, positions = bezier_curvature_radius(control_points)
+        measurements.append(('radius', figures[curves], segments[curves], values, positions))
+    return measurements
+
+
+def measure_uses(uses, indices):
+    """
+    Measures the uses of blocks by the figures of their block. The figures of a block are measured once, the values
+    are scaled with the smaller scaling factor of the insert and the positions are transformed with its matrix.
+    :param uses: list of SvgUse
+    :param indices: int array, index of every use in the list of figures
+    :return: list of measurements (see measure_figures), segments are the indices of the figures in the block
+    """
+    blocks = {}
+    measurements = []
+    for use, index in zip(uses, indices.tolist()):
+        key = id(use.block_figures)
+        if key not in blocks:
+            blocks[key] = measure_figures(use.block_figures)
+        scale = min(abs(use.scale_x), abs(use.scale_y))
+        for rule, figures, segments, values, positions in blocks[key]:
+            measurements.append((rule, np.full(len(figures), index), figures, values * scale,
+                                 apply_matrix_to_points(use.matrix, positions)))
+    return measurements
+
+
+def path_line_previous(lines, points, figures, segments, counts):
+    """
+    Gets the line before every line of paths: the line right before it in the same sub path, or the last line of a
+    closed sub path for its first line.
+    :param lines: int array (n,), index of the lines of the paths in the segments of all paths (without lines of no
+                  length)
+    :param points: array (m, 4, 2), points of all segments
+    :param figures: int array (m,), index of the path of every segment
+    :param segments: int array (m,), index of every segment in its path
+    :param counts: int array, number of segments of every path
+    :return: int array (n,), index of the previous line in lines, -1 if there is none
+    """
+    previous = np.full(len(lines), -1)
+    if len(lines) == 0:
+        return previous
+    # a sub path starts at the first segment of a path and where a segment does not start at the end of the one before
+    starts = np.concatenate(([True], np.any(points[1:, 0] != points[:-1, 3], axis=1) | (figures[1:] != figures[:-1])))
+    follows = (lines[1:] == lines[:-1] + 1) & ~starts[lines[1:]]
+    previous[1:][follows] = np.flatnonzero(follows)
+    # the first and the last segment of a closed sub path are lines
+    firsts = np.flatnonzero(starts)
+    lasts = np.append(firsts[1:], len(figures)) - 1
+    closed = np.all(np.isclose(points[firsts, 0], points[lasts, 3], rtol=0, atol=CLOSED_TOLERANCE), axis=1) & \
+        (lasts > firsts)
+    line_index = np.full(len(figures), -1)
+    line_index[lines] = np.arange(len(lines))
+    wrap = closed & (line_index[firsts] >= 0) & (line_index[lasts] >= 0)
+    previous[line_index[firsts[wrap]]] = line_index[lasts[wrap]]
+    return previous
+
+
+def run_measurement(starts, ends, figures, segments, previous):
+    """
+    Measures the features of contours of straight edges: an edge continues the feature of the edge before it, if it
+    turns at most SMOOTH_ANGLE, thus a feature is a straight edge or a run of edges between two corners (e.g. a
+    flattened curve). A closed contour without corners is one feature.
+    :param starts: array (n, 2), start points of the edges (of no zero length)
+    :param ends: array (n, 2), end points of the edges
+    :param figures: int array (n,), index of the figure of every edge
+    :param segments: int array (n,), index of the segment of every edge
+    :param previous: int array (n,), index of the edge before every edge in its contour (the last edge for the first
+                     edge of a closed contour), -1 if there is none
+    :return: measurement (see measure_figures), with the segment of the first edge of every feature and the point in
+             the middle of its length as position
+    """
+    if len(starts) == 0:
+        return 'line_width', figures, segments, np.zeros(0), np.zeros((0, 2))
+    index = np.arange(len(starts))
+    directions = ends - starts
+    lengths = np.linalg.norm(directions, axis=1)
+    before = np.maximum(previous, 0)
+    cosine = np.einsum('ij,ij->i', directions, directions[before]) / (lengths * lengths[before])
+    joined = (previous >= 0) & (cosine >= math.cos(math.radians(SMOOTH_ANGLE)))
+    # the features are numbered in the order of the edges, a closed contour starts a feature at its first edge, which
+    # is merged into the feature of its last edge if they are joined
+    wraps = joined & (previous > index)
+    labels = np.cumsum(~joined | wraps) - 1
+    merged = np.arange(labels[-1] + 1)
+    merged[labels[wraps]] = labels[previous[wraps]]
+    tail = np.isin(labels, labels[wraps][labels[wraps] != labels[previous[wraps]]])
+    labels = merged[labels]
+
+    # the edges of every feature in their order along the contour (the first edges of a closed contour at the end)
+    order = np.lexsort((index, tail, labels))
+    lengths = lengths[order]
+    firsts = np.flatnonzero(np.concatenate(([True], labels[order][1:] != labels[order][:-1])))
+    totals = np.add.reduceat(lengths, firsts)
+    cumulative = np.cumsum(lengths)
+    middle = cumulative[firsts] - lengths[firsts] + totals / 2
+    edges = np.minimum(np.searchsorted(cumulative, middle), len(lengths) - 1)
+    fractions = ((middle - cumulative[edges] + lengths[edges]) / lengths[edges])[:, None]
+    positions = starts[order][edges] + fractions * directions[order][edges]
+    return 'line_width', figures[order][firsts], segments[order][firsts], totals, positions
+
+
+def edge_measurement(starts, ends, figures, segments):
+    """
+    Measures the length of straight edges, edges without length are left out.
+    :param starts: array (n, 2), start points of the edges
+    :param ends: array (n, 2), end points of the edges
+    :param figures: int array (n,), index of the figure of every edge
+    :param segments: int array (n,), index of the segment of every edge
+    :return: measurement (see measure_figures), with the centers of the edges as positions
+    """
+    lengths = np.linalg.norm(ends - starts, axis=1)
+    edges = np.flatnonzero(lengths > 0)
+    return 'line_width', figures[edges], segments[edges], lengths[edges], (starts[edges] + ends[edges]) / 2
+
+
+def min_curvature_radius(minor, major):
+    """
+    Gets the minimal radius of curvature of ellipses (at the ends of the major axis), minor^2 / major.
+    :param minor: array, length of the minor semi-axes
+    :param major: array, length of the major semi-axes
+    :return: array, minimal radius of curvature (0 for ellipses without extent)
+    """
+    return np.divide(minor ** 2, major, out=np.zeros(len(major)), where=major > 0)
+
+
+def axes_curvature_radius(axes):
+    """
+    Gets the minimal radius of curvature of ellipses, given by conjugate semi-diameters (e.g. a transformed pair of
+    axes). The singular values of the matrix of the two vectors are the lengths of the semi-axes.
+    :param axes: array (n, 2, 2), the two vectors of every ellipse
+    :return: array (n,), minimal radius of curvature
+    """
+    semi_axes = np.linalg.svd(axes, compute_uv=False)
+    return min_curvature_radius(semi_axes[:, 1], semi_axes[:, 0])
+
+
+def bezier_curvature_radius(control_points):
+    """
+    Gets the minimal radius of curvature of cubic Bézier curves, |B'|^3 / |B' x B''| at BEZIER_SAMPLES parameters
+    inside the curves (the ends are left out, a control point at an end point gives a zero derivative there).
+    :param control_points: array (n, 4, 2), control points of the curves
+    :return: (values, positions) tuple, values: array (n,) minimal radius (inf for straight curves), positions:
+             array (n, 2) point of the minimal radius
+    """
+    t = ((np.arange(BEZIER_SAMPLES) + 0.5) / BEZIER_SAMPLES)[None, :, None]
+    p0, p1, p2, p3 = (control_points[:, None, index] for index in range(4))
+    s = 1 - t
+    first = 3 * (s ** 2 * (p1 - p0) + 2 * s * t * (p2 - p1) + t ** 2 * (p3 - p2))
+    second = 6 * (s * (p2 - 2 * p1 + p0) + t * (p3 - 2 * p2 + p1))
+    cross = np.abs(first[..., 0] * second[..., 1] - first[..., 1] * second[..., 0])
+    speed = np.linalg.norm(first, axis=2)
+    radii = np.divide(speed ** 3, cross, out=np.full(cross.shape, np.inf), where=cross > 1e-12 * speed ** 2)
+    samples = radii.argmin(axis=1)
+    rows = np.arange(len(control_points))
+    points = s ** 3 * p0 + 3 * s ** 2 * t * p1 + 3 * s * t ** 2 * p2 + t ** 3 * p3
+    return radii[rows, samples], points[rows, samples]
+
+
+def check_tiles(polylines, min_distance, workers=None, cell_size=None, groups=None):
+    """
+    Checks the distances between the figures and the web widths (see find_close_figures and find_thin_webs) in a
+    process pool. The sheet is split into a grid of tiles (TILES_PER_WORKER tiles per process), a tile gets every
+    polyline, whose bounding box extended by min_distance overlaps it, thus the tiles overlap by the margin and a
+    polyline is checked as a whole in every tile it reaches. The tiles use the same grid cells as the whole sheet,
+    which gives the same results as checking the sheet at once:
+        distances: the pair of figures is reported by every tile with both figures, the smallest distance (and lowest
+                   position) is taken, the tile with its position has both figures
+        webs:      a web is only taken from the tile with its position
+
+    :param polylines: list of (figure, points, closed) tuples, flattened figures (see flatten_figures)
+    :param min_distance: float, minimal distance between two figures and minimal width of a web in mm
+    :param workers: int, number of processes, None for the number of cpus (default None)
+    :param cell_size: float, size of the cells of the grid of the distance check, None for the default (see
+                      find_close_figures)
+    :param groups: int array, connected contour of every polyline (see connected_contours), None to connect the
+                   polylines with FLATTEN_TOLERANCE, the polylines are connected on the whole sheet (default None)
+    :return: (close_figures, webs) tuple, the results of find_close_figures and find_thin_webs
+    """
+    if not polylines or min_distance <= 0:
+        return [], []
+    if groups is None:
+        groups = connected_contours(polylines)
+    if cell_size is None:
+        starts, ends, _ = polyline_edges(polylines)
+        cell_size = default_cell_size(np.linalg.norm(ends - starts, axis=1), min_distance)
+
+    box_min = np.array([points.min(axis=0) for _, points, _ in polylines]) - min_distance
+    box_max = np.array([points.max(axis=0) for _, points, _ in polylines]) + min_distance
+    origin = box_min.min(axis=0)
+    tiles_per_side = math.ceil(math.sqrt((workers or os.cpu_count() or 1) * TILES_PER_WORKER))
+    tile_size = np.maximum((box_max.max(axis=0) - origin) / tiles_per_side, min_distance)
+    tile_min = np.floor((box_min - origin) / tile_size).astype(int)
+    tile_max = np.minimum(np.floor((box_max - origin) / tile_size).astype(int), tiles_per_side - 1)
+    tiles = [(column, row) for column in range(tiles_per_side) for row in range(tiles_per_side)]
+    tile_indices = [np.flatnonzero(np.all((tile_min <= tile) & (tile <= tile_max), axis=1)) for tile in tiles]
+    tile_polylines = [[polylines[index] for index in indices] for indices in tile_indices]
+
+    close_figures, webs = {}, []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for tile, (tile_close_figures, tile_webs) in zip(tiles, executor.map(
+                check_tile, tile_polylines, itertools.repeat(min_distance), itertools.repeat(cell_size),
+                [groups[indices] for indices in tile_indices])):
+            for figure, other, distance, position in tile_close_figures:
+                key = (distance, position[0], position[1])
+                if (figure, other) not in close_figures or key < close_figures[figure, other][0]:
+                    close_figures[figure, other] = (key, (figure, other, distance, position))
+            webs.extend(web for web in tile_webs if tuple(np.minimum(np.floor(
+                (np.array(web[2]) - origin) / tile_size).astype(int), tiles_per_side - 1).tolist()) == tile)
+    cut_rules_logger.debug(f"checked {len(polylines)} polylines in {len(tiles)} tiles")
+    return ([close_figure for _, close_figure in sorted(close_figures.values(), key=lambda item: item[1][:2])],
+            sorted(webs, key=lambda web: (web[0], web[2])))
+
+
+def default_cell_size(lengths, min_distance):
+    """
+    Size of the cells of the grid of the distance check: 2 * min_distance and the median length of the edges. A piece
+    of an edge with its margin of min_distance / 2 on both sides fits into a cell, thus it covers at most 2 x 2 cells.
+    :param lengths: array (n,), lengths of the edges of the flattened figures
+    :param min_distance: float, minimal distance between two figures in mm
+    :return: float, size of the cells, None without edges
+    """
+    if len(lengths) == 0:
+        return None
+    return 2 * min_distance + float(np.median(lengths))
+
+
+def check_tile(polylines, min_distance, cell_size, groups):
+    """
+    Checks the distances between the figures and the web widths of a tile of the sheet.
+    :param polylines: list of (figure, points, closed) tuples, polylines of the tile
+    :param min_distance: float, minimal distance between two figures and minimal width of a web in mm
+    :param cell_size: float, size of the cells of the grid of the whole sheet (see find_close_figures)
+    :param groups: int array, connected contour of every polyline of the tile (see connected_contours)
+    :return: (close_figures, webs) tuple, the results of find_close_figures and find_thin_webs
+    """
+    return find_close_figures(polylines, min_distance, cell_size, groups), find_thin_webs(polylines, min_distance)
+
+
+def connected_contours(polylines, tolerance=FLATTEN_TOLERANCE):
+    """
+    Groups the polylines into connected contours: open polylines, whose end points are within tolerance, continue
+    each other, e.g. the lines of a contour drawn as single <line> elements or sub paths meeting at a point. The parts
+    of a connected contour are not checked against each other by their distance, their joints are no gaps.
+    :param polylines: list of (figure, points, closed) tuples, flattened figures (see flatten_figures)
+    :param tolerance: float, maximal distance of two end points of a joint (default FLATTEN_TOLERANCE)
+    :return: int array, number of the connected contour of every polyline
+    """
+    open_polylines = np.array([index for index, (_, _, closed) in enumerate(polylines) if not closed], dtype=int)
+    if len(open_polylines) == 0:
+        return np.arange(len(polylines))
+    end_points = np.concatenate([[polylines[index][1][0] for index in open_polylines],
+                                 [polylines[index][1][-1] for index in open_polylines]])
+    joints = cKDTree(end_points).query_pairs(tolerance, output_type='ndarray')
+    nodes = np.tile(open_polylines, 2)
+    graph = coo_matrix((np.ones(len(joints)), (nodes[joints[:, 0]], nodes[joints[:, 1]])),
+                       shape=(len(polylines), len(polylines)))
+    return connected_components(graph, directed=False)[1]
+
+
+def find_close_figures(polylines, min_distance, cell_size=None, groups=None):
+    """
+    Finds all pairs of figures, which are closer than min_distance. The edges of the polylines are split into pieces
+    not longer than the cells of a uniform grid and every piece is indexed in the cells its bounding box (extended by
+    min_distance / 2) covers. Only pieces of different connected contours (see connected_contours), which share a
+    cell, are candidates - the contours of one figure (e.g. the sub paths of a path) are compared as well, figures
+    touching at their end points are not - and the exact distance between two segments is computed for the
+    candidates only. Thus, the runtime grows linear with the number of edges (for files
+    without crowded cells), instead of comparing all pairs.
+
+    :param polylines: list of (figure, points, closed) tuples, flattened figures (see flatten_figures)
+    :param min_distance: float, minimal distance between two figures in mm
+    :param cell_size: float, size of the cells of the grid (larger than min_distance), None for 2 * min_distance and
+                      the median length of the edges (default None)
+    :param groups: int array, connected contour of every polyline (see connected_contours), None to connect the
+                   polylines with FLATTEN_TOLERANCE (default None)
+    :return: list of (figure, other, distance, position) tuples, figure <= other: indices of the figures (the same
+             figure for two of its contours), distance: smallest distance between them (the lowest position of equal distances), position: (x, y) midpoint
+             between their closest points; sorted by figure and other
+    """
+    starts, ends, figures = polyline_edges(polylines)
+    lengths = np.linalg.norm(ends - starts, axis=1)
+    if len(lengths) == 0 or min_distance <= 0:
+        return []
+    if cell_size is None:
+        cell_size = default_cell_size(lengths, min_distance)
+    edge, piece_starts, piece_ends = split_edges(starts, ends, lengths, cell_size - min_distance)
+    figures = figures[edge]
+    if groups is None:
+        groups = connected_contours(polylines)
+    contours = np.repeat(groups, [len(points) - 1 for _, points, _ in polylines])[edge]
+
+    first, second = candidate_pairs(np.minimum(piece_starts, piece_ends) - min_distance / 2,
+                                    np.maximum(piece_starts, piece_ends) + min_distance / 2, contours, cell_size)
+    distances, closest_first, closest_second = segment_distances(piece_starts[first], piece_ends[first],
+                                                                 piece_starts[second], piece_ends[second])
+    close = np.flatnonzero(distances < min_distance)
+    if len(close) == 0:
+        return []
+
+    # the smallest distance of every pair of figures
+    pairs = np.sort(np.column_stack((figures[first[close]], figures[second[close]])), axis=1)
+    positions = (closest_first[close] + closest_second[close]) / 2
+    order = np.lexsort((positions[:, 1], positions[:, 0], distances[close], pairs[:, 1], pairs[:, 0]))
+    pairs = pairs[order]
+    smallest = np.concatenate(([True], np.any(pairs[1:] != pairs[:-1], axis=1)))
+    return [(figure, other, distance, tuple(position)) for (figure, other), distance, position in
+            zip(pairs[smallest].tolist(), distances[close[order][smallest]].tolist(),
+                positions[order][smallest].tolist())]
+
+
+def find_thin_webs(polylines, min_web_width):
+    """
+    Finds the thin webs of the closed contours: every contour is offset to both sides by min_web_width / 2, where the
+    offset bands of two parts of a contour collide, the contour comes closer than min_web_width to itself (a thin web
+    of material or a thin slot). The edges are split into pieces not longer than min_web_width, the pieces
+    expanded by the offset are bucketed in a uniform grid (see candidate_pairs) and measured at once.
+    Parts closer than pi * min_web_width / 2 along the contour are left out: they are neighbours at corners and
+    curves, this keeps circles with a diameter of min_web_width and more, acute corners are reported.
+    Only the webs within one contour are found here, the webs between two contours - also between the contours of one
+    figure, e.g. the bridge between the outer contour of a path and its counter - are the distances between the
+    contours (see find_close_figures).
+
+    :param polylines: list of (figure, points, closed) tuples, flattened figures (see flatten_figures)
+    :param min_web_width: float, minimal width of a web in mm
+    :return: list of (figure, width, position) tuples, the smallest width of every region with a thin web (a run of
+             consecutive pieces of a contour), position: (x, y) midpoint of the web; sorted by figure and position
+    """
+    contours = [(figure, points) for figure, points, closed in polylines if closed and len(points) > 3]
+    if not contours or min_web_width <= 0:
+        return []
+    half = min_web_width / 2
+    figures = np.array([figure for figure, _ in contours])
+    counts = np.array([len(points) - 1 for _, points in contours])
+    starts = np.concatenate([points[:-1] for _, points in contours])
+    ends = np.concatenate([points[1:] for _, points in contours])
+    contour = np.repeat(np.arange(len(contours)), counts)
+    lengths = np.linalg.norm(ends - starts, axis=1)
+    # position of the start of every edge along its contour
+    cumulative = np.cumsum(lengths) - lengths
+    along = cumulative - np.repeat(cumulative[np.cumsum(counts) - counts], counts)
+    perimeters = np.bincount(contour, lengths, minlength=len(contours))
+
+    edge, piece_starts, piece_ends = split_edges(starts, ends, lengths, min_web_width)
+    piece_lengths = lengths[edge] / np.maximum(np.ceil(lengths / min_web_width), 1)[edge]
+    middles = along[edge] + np.linalg.norm((piece_starts + piece_ends) / 2 - starts[edge], axis=1)
+    piece_contour = contour[edge]
+    # a piece expanded by its offset fits into a cell, thus it covers at most 2 x 2 cells
+    first, second = candidate_pairs(np.minimum(piece_starts, piece_ends) - half,
+                                    np.maximum(piece_starts, piece_ends) + half, piece_contour, 2 * min_web_width,
+                                    same_group=True)
+    distance_along = np.abs(middles[first] - middles[second])
+    distance_along = np.minimum(distance_along, perimeters[piece_contour[first]] - distance_along)
+    apart = np.flatnonzero(distance_along - (piece_lengths[first] + piece_lengths[second]) / 2 > np.pi * half)
+    first, second = first[apart], second[apart]
+    widths, closest_first, closest_second = segment_distances(piece_starts[first], piece_ends[first],
+                                                              piece_starts[second], piece_ends[second])
+    thin = np.flatnonzero(widths < min_web_width)
+    if len(thin) == 0:
+        return []
+
+    # a region is a run of consecutive pieces of a contour with thin webs, its smallest width is reported
+    pieces = np.minimum(first, second)[thin]
+    order = np.lexsort((widths[thin], pieces))
+    pieces, thin = pieces[order], thin[order]
+    regions = np.cumsum(np.concatenate(([False], (np.diff(pieces) > 1) |
+                                        (piece_contour[pieces[1:]] != piece_contour[pieces[:-1]]))))
+    order = np.lexsort((widths[thin], regions))
+    smallest = thin[order[np.concatenate(([True], regions[order][1:] != regions[order][:-1]))]]
+    positions = (closest_first[smallest] + closest_second[smallest]) / 2
+    return sorted(zip(figures[piece_contour[first[smallest]]].tolist(), widths[smallest].tolist(),
+                      map(tuple, positions.tolist())), key=lambda web: (web[0], web[2]))
+
+
+def split_edges(starts, ends, lengths, max_length):
+    """
+    Splits edges into pieces of the same length, which are not longer than max_length.
+    :param starts: array (n, 2), start points of the edges
+    :param ends: array (n, 2), end points of the edges
+    :param lengths: array (n,), lengths of the edges
+    :param max_length: float, maximal length of a piece
+    :return: (edge, piece_starts, piece_ends) tuple, edge: int array (m,) index of the edge of every piece,
+             piece_starts/piece_ends: arrays (m, 2) start and end points of the pieces
+    """
+    counts = np.maximum(np.ceil(lengths / max_length), 1).astype(int)
+    edge = np.repeat(np.arange(len(lengths)), counts)
+    steps = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))[:, None]
+    direction = ((ends - starts) / counts[:, None])[edge]
+    piece_starts = starts[edge] + steps * direction
+    return edge, piece_starts, piece_starts + direction
+
+
+def candidate_pairs(box_min, box_max, groups, cell_size, same_group=False):
+    """
+    Finds the pairs of boxes of different groups (e.g. figures), which overlap, with a uniform grid. A box covers at
+    most a few cells, the boxes are sorted by their cells and the boxes of a cell are paired. A pair, which shares
+    several cells, is only taken in the cell of the lower left corner of the overlap of the boxes.
+
+    :param box_min: array (n, 2), lower left corners of the boxes
+    :param box_max: array (n, 2), upper right corners of the boxes
+    :param groups: int array (n,), group of every box, e.g. the index of its figure
+    :param cell_size: float, size of the cells, not smaller than the boxes
+    :param same_group: bool, True to find the pairs of boxes of the same group instead (default False)
+    :return: (first, second) tuple, int arrays with the indices of the paired boxes
+    """
+    cell_min = np.floor(box_min / cell_size).astype(np.int64)
+    cell_max = np.floor(box_max / cell_size).astype(np.int64)
+    origin = cell_min.min(axis=0)
+    rows = int((cell_max - origin).max(axis=0)[1]) + 1
+
+    boxes, keys = [], []
+    extent = int((cell_max - cell_min).max()) + 1
+    for dx in range(extent):
+        for dy in range(extent):
+            covered = np.flatnonzero(np.all(cell_min + (dx, dy) <= cell_max, axis=1))
+            boxes.append(covered)
+            keys.append((cell_min[covered, 0] + dx - origin[0]) * rows + cell_min[covered, 1] + dy - origin[1])
+    boxes, keys = np.concatenate(boxes), np.concatenate(keys)
+    order = np.argsort(keys * (int(groups.max()) + 1) + groups[boxes], kind='stable')
+    boxes, keys = boxes[order], keys[order]
+    if not same_group:
+        # only cells with boxes of several groups give pairs (the boxes of a cell are sorted by their group)
+        cell_starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        cell_ends = np.append(cell_starts[1:], len(keys)) - 1
+        mixed = np.repeat(groups[boxes[cell_starts]] != groups[boxes[cell_ends]], cell_ends - cell_starts + 1)
+        boxes, keys = boxes[mixed], keys[mixed]
+
+    first, second = [np.zeros(0, dtype=int)], [np.zeros(0, dtype=int)]
+    active = np.arange(len(keys))
+    offset = 1
+    while len(active) > 0:
+        # the boxes, whose cell contains at least offset further boxes
+        active = active[active + offset < len(keys)]
+        active = active[keys[active] == keys[active + offset]]
+        active_pairs = active[(groups[boxes[active]] == groups[boxes[active + offset]]) == same_group]
+        a, b = boxes[active_pairs], boxes[active_pairs + offset]
+        overlap_min = np.maximum(box_min[a], box_min[b])
+        reference = np.floor(overlap_min / cell_size).astype(np.int64) - origin
+        keep = np.all(overlap_min <= np.minimum(box_max[a], box_max[b]), axis=1) & \
+            (reference[:, 0] * rows + reference[:, 1] == keys[active_pairs])
+        first.append(a[keep])
+        second.append(b[keep])
+        offset += 1
+    return np.concatenate(first), np.concatenate(second)
+
+
+def segment_distances(starts_a, ends_a, starts_b, ends_b):
+    """
+    Calculates the distances between pairs of segments. Crossing segments have the distance zero, otherwise the
+    distance is the smallest distance of an end point to the other segment.
+    :param starts_a: array (n, 2), start points of the first segments
+    :param ends_a: array (n, 2), end points of the first segments
+    :param starts_b: array (n, 2), start points of the second segments
+    :param ends_b: array (n, 2), end points of the second segments
+    :return: (distances, closest_a, closest_b) tuple, distances: array (n,), closest_a/closest_b: arrays (n, 2)
+             closest points on the first and second segments
+    """
+    candidates = []
+    for point, start, end, on_a in ((starts_a, starts_b, ends_b, True), (ends_a, starts_b, ends_b, True),
+                                    (starts_b, starts_a, ends_a, False), (ends_b, starts_a, ends_a, False)):
+        closest = closest_points(point, start, end)
+        candidates.append((np.linalg.norm(point - closest, axis=1), point if on_a else closest,
+                           closest if on_a else point))
+    distances = np.stack([distance for distance, _, _ in candidates])
+    smallest = distances.argmin(axis=0)
+    rows = np.arange(len(starts_a))
+    closest_a = np.stack([point for _, point, _ in candidates])[smallest, rows]
+    closest_b = np.stack([point for _, _, point in candidates])[smallest, rows]
+    distances = distances[smallest, rows]
+
+    # crossing segments
+    direction_a, direction_b = ends_a - starts_a, ends_b - starts_b
+    denominator = cross(direction_a, direction_b)
+    offset = starts_b - starts_a
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = cross(offset, direction_b) / denominator
+        t = cross(offset, direction_a) / denominator
+    crossing = (denominator != 0) & (s >= 0) & (s <= 1) & (t >= 0) & (t <= 1)
+    distances[crossing] = 0
+    closest_a[crossing] = closest_b[crossing] = starts_a[crossing] + s[crossing, None] * direction_a[crossing]
+    return distances, closest_a, closest_b
+
+
+def closest_points(points, starts, ends):
+    """
+    Gets the closest points on segments.
+    :param points: array (n, 2), points
+    :param starts: array (n, 2), start points of the segments
+    :param ends: array (n, 2), end points of the segments
+    :return: array (n, 2), point on every segment, which is closest to the point
+    """
+    direction = ends - starts
+    squared_length = np.einsum('ij,ij->i', direction, direction)
+    t = np.divide(np.einsum('ij,ij->i', points - starts, direction), squared_length,
+                  out=np.zeros(len(points)), where=squared_length > 0)
+    return starts + np.clip(t, 0, 1)[:, None] * direction
 
-    # min line width
-    if rect_width - 2 * rx < MIN_LINE_WIDTH:
-        cut_rules_logger.error(f"rectangle width to small: width = {rect_width - 2 * rx} mm, "
-                               f"requested: {MIN_LINE_WIDTH} mm")
 
-    if rect_height - 2 * ry < MIN_LINE_WIDTH:
-        cut_rules_logger.error(f"rectangle height to small: width = {rect_height - 2 * ry} mm, "
-                               f"requested: {MIN_LINE_WIDTH} mm")
+def cross(a, b):
+    """
+    Calculates the cross products (z component) of pairs of vectors.
+    :param a: array (n, 2), first vectors
+    :param b: array (n, 2), second vectors
+    :return: array (n,)
+    """
+    return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
 
-    if 0 < rx < min_radius:
-        cut_rules_logger.error(f"corner radius in x direction of rectangle to small: rx = {rx} mm,"
-                               f"requested: {min_radius} mm")
 
-    if 0 < ry < min_radius:
-        cut_rules_logger.error(f"corner radius in y direction of rectangle to small: ry = {ry} mm,"
-                               f"requested: {min_radius} mm")
+# measuring function of every figure type (uses of blocks are measured by measure_uses)
+MEASURES = {'circle': measure_circles, 'ellipse': measure_ellipses, 'rectangle': measure_rectangles,
+            'line': measure_lines, 'polyline': measure_polylines, 'polygon': measure_polylines,
+            'path': measure_paths}
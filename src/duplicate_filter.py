@@ -0,0 +1,196 @@
+import math
+
+from src.logging_config import setup_logger
+from src.svg_shapes.path_data import LINE, QUADRATIC_BEZIER, CUBIC_BEZIER
+
+duplicate_logger = setup_logger(__name__)
+
+# distance (in mm), within which figures are duplicates
+DUPLICATE_TOLERANCE = 1e-3
+
+
+class DuplicateFilter:
+    """
+    Removes duplicated figures, e.g. of duplicated layers or stacked copies, which would be cut twice.
+    The geometry of every figure is indexed in a grid by its first point. A figure is a duplicate, if one of the
+    variants of its geometry (its directions and, for closed figures, the start points, which can be the first point of
+    the indexed geometry) finds the same kind of geometry in the grid cell of its first point or a neighbouring cell,
+    whose values are all within the tolerance. Thus, reversed and jittered copies are found as well.
+    Circles, ellipses, rectangles, polylines and polygons are compared as whole figures. Paths are compared segment by
+    segment, thus duplicated segments are removed from a path (and lines are duplicates of line segments).
+
+    Attributes:
+        tolerance: float, distance within figures are duplicates
+        removed_figures: int, number of the removed figures
+        removed_segments: int, number of the removed path segments (of paths, which are kept)
+        cells: dictionary, (kind, number of values, cell x, cell y) -> list of the geometries in the grid cell
+    """
+
+    def __init__(self, tolerance=DUPLICATE_TOLERANCE):
+        """
+        Initializes the duplicate filter.
+        :param tolerance: float, distance within figures are duplicates (default DUPLICATE_TOLERANCE)
+        """
+        self.tolerance = tolerance
+        self.removed_figures = 0
+        self.removed_segments = 0
+        self.cells = {}
+
+    def filter(self, svg_figures):
+        """
+        Filters the duplicates of the figures, while they are consumed (the first figure is kept). Figures without
+        geometry (e.g. the header) and uses of blocks are kept.
+
+        :param svg_figures: iterable with the figures of a svg file (after scaling)
+        :return: generator, yielding the figures without duplicates
+        """
+        for figure in svg_figures:
+            match figure.get_name():
+                case 'path':
+                    keep = [not self.is_duplicate(*segment_geometry) for segment_geometry in
+                            path_geometries(figure.path_data, self.tolerance)]
+                    if not any(keep):
+                        self.removed_figures += 1
+                        continue
+                    if not all(keep):
+                        self.removed_segments += keep.count(False)
+                        figure.path_data = figure.path_data.select(keep)
+                case 'circle' | 'ellipse' | 'rectangle' | 'line' | 'polyline' | 'polygon':
+                    if self.is_duplicate(*figure_geometry(figure, self.tolerance)):
+                        self.removed_figures += 1
+                        continue
+            yield figure
+
+    def is_duplicate(self, kind, variants):
+        """
+        Checks, if a geometry is a duplicate of an indexed geometry, otherwise its first variant is indexed.
+        :param kind: string, kind of the geometry
+        :param variants: list of tuples of floats, the values of the geometry in every direction and from every start
+                         point, which can be the first point of an indexed duplicate, each starting with a point
+        :return: True if the geometry is a duplicate
+        """
+        if not variants or len(variants[0]) < 2:
+            # without points, e.g. an empty polyline
+            return False
+        for values in variants:
+            cell_x = math.floor(values[0] / self.tolerance)
+            cell_y = math.floor(values[1] / self.tolerance)
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for indexed in self.cells.get((kind, len(values), cell_x + dx, cell_y + dy), ()):
+                        if all(abs(a - b) <= self.tolerance for a, b in zip(values, indexed)):
+                            return True
+        values = variants[0]
+        cell = (kind, len(values), math.floor(values[0] / self.tolerance), math.floor(values[1] / self.tolerance))
+        self.cells.setdefault(cell, []).append(values)
+        return False
+
+
+def remove_duplicates(svg_figures, tolerance=DUPLICATE_TOLERANCE):
+    """
+    Removes the duplicated figures and path segments of a svg file (see DuplicateFilter).
+    :param svg_figures: list with the figures of a svg file (after scaling)
+    :param tolerance: float, distance within figures are duplicates (default DUPLICATE_TOLERANCE)
+    :return: (figures, removed) tuple, figures: list without the duplicates, removed: number of the removed figures
+             and path segments
+    """
+    duplicate_filter = DuplicateFilter(tolerance)
+    figures = list(duplicate_filter.filter(svg_figures))
+    duplicate_logger.info(f"removed {duplicate_filter.removed_figures} duplicated figures and "
+                          f"{duplicate_filter.removed_segments} duplicated path segments")
+    return figures, duplicate_filter.removed_figures + duplicate_filter.removed_segments
+
+
+def figure_geometry(figure, tolerance=DUPLICATE_TOLERANCE):
+    """
+    Gets the geometry of a figure (circle, ellipse, rectangle, line, polyline or polygon) in all its variants.
+    :param figure: svg figure
+    :param tolerance: float, distance within figures are duplicates (default DUPLICATE_TOLERANCE)
+    :return: (kind, variants) tuple, variants: list of tuples of floats, each starting with a point
+    """
+    match figure.get_name():
+        case 'circle':
+            return 'circle', [(figure.center_x, figure.center_y, figure.radius, figure.radius_y)]
+        case 'ellipse':
+            # an axis vector and its opposite give the same ellipse
+            return 'ellipse', [(figure.center_x, figure.center_y, *axis_x, *axis_y)
+                               for axis_x in vector_variants(figure.radius_x)
+                               for axis_y in vector_variants(figure.radius_y)]
+        case 'rectangle':
+            return 'rectangle', [(figure.x, figure.y, *figure.rect_width, *figure.rect_height, *figure.rx, *figure.ry)]
+        case 'line':
+            return 'line', point_variants([(figure.x1, figure.y1), (figure.x2, figure.y2)])
+        case 'polyline':
+            return 'polyline', point_variants(figure.point_list.tolist())
+        case 'polygon':
+            return 'polygon', ring_variants(figure.point_list.tolist(), tolerance)
+
+
+def path_geometries(path_data, tolerance=DUPLICATE_TOLERANCE):
+    """
+    Gets the geometry of every path segment in all its variants. Lines have the same kind as line figures.
+    :param path_data: PathData, segments of the path
+    :param tolerance: float, distance within segments are duplicates (default DUPLICATE_TOLERANCE)
+    :return: list of (kind, variants) tuples
+    """
+    geometries = []
+    for kind, (start, control1, control2, end), radii, rotation, sweep in zip(
+            path_data.kinds.tolist(), path_data.points.tolist(), path_data.radii.tolist(),
+            path_data.rotation.tolist(), path_data.sweep.tolist()):
+        if kind == LINE:
+            geometries.append(('line', point_variants([start, end])))
+        elif kind == QUADRATIC_BEZIER:
+            geometries.append(('quadratic', point_variants([start, control1, end])))
+        elif kind == CUBIC_BEZIER:
+            geometries.append(('cubic', point_variants([start, control1, control2, end])))
+        else:
+            # the reversed arc goes in the other direction, the center is stored as control points and the rotation
+            # of circular arcs is irrelevant
+            arc = (*control1, *radii, rotation if radii[0] != radii[1] else 0)
+            geometries.append(('arc', [(*start, *end, float(sweep), *arc), (*end, *start, float(not sweep), *arc)]))
+    return geometries
+
+
+def point_variants(points):
+    """
+    Gets the values of a point sequence in both directions.
+    :param points: list of points (x, y)
+    :return: list of two tuples of floats, flattened points forwards and backwards
+    """
+    return [tuple(value for point in points for value in point),
+            tuple(value for point in reversed(points) for value in point)]
+
+
+def ring_variants(points, tolerance):
+    """
+    Gets the values of a closed point sequence in both directions from every possible start point: the indexed
+    variant starts at the smallest point (by x, then y). A duplicate has a point within tolerance of it, which is at
+    most 2 * tolerance right of its own leftmost point, thus only these points are start points of the other variants.
+    :param points: list of points (x, y), a closing point (equal to the first one) is ignored
+    :param tolerance: float, distance within the points of duplicates are equal
+    :return: list of tuples of floats, flattened points, the first one starting at the smallest point
+    """
+    if not points:
+        # without points, e.g. an empty polygon, it is not indexed (see is_duplicate)
+        return []
+    if points[0] == points[-1] and len(points) > 1:
+        points = points[:-1]
+    min_x = min(point[0] for point in points)
+    starts = sorted((index for index, point in enumerate(points) if point[0] <= min_x + 2 * tolerance),
+                    key=lambda index: tuple(points[index]))
+    variants = []
+    for start in starts:
+        forward = points[start:] + points[:start]
+        backward = forward[:1] + forward[:0:-1]
+        variants.append(tuple(value for point in forward for value in point))
+        variants.append(tuple(value for point in backward for value in point))
+    return variants
+
+
+def vector_variants(vector):
+    """
+    Gets an axis vector and its opposite, which give the same axis.
+    :param vector: tuple, (x, y)
+    :return: list of two tuples, (x, y) and (-x, -y)
+    """
+    return [tuple(vector), tuple(-value for value in vector)]
@@ -1,8 +1,19 @@
+import io
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import ezdxf
+from ezdxf.lldxf.tagwriter import TagWriter, BinaryTagWriter
 
-from logging_config import setup_logger
+from src.contour_joiner import join_lines
+from src.dxf_stream_writer import DxfStreamWriter, DXF_ENCODING, set_fixed_meta_data
+from src.logging_config import setup_logger
+from src.recording_layout import RecordingLayout
 from src.shapes.circle import Circle
 from src.shapes.ellipse import Ellipse
+from src.shapes.insert import Insert
 from src.shapes.line import Line
 from src.shapes.path import Path
 from src.shapes.polygon import Polygon
@@ -11,54 +22,359 @@ from src.shapes.rectangle import Rectangle
 
 dxf_logger = setup_logger(__name__)
 
+# number of figures, which are drawn by a worker process in one task
+PARALLEL_CHUNK_SIZE = 2000
+
 
-def write_dxf(svg_figures, filename):
+def write_dxf(svg_figures, filename=None, output_dir="dxf_files", fmt='asc', output_path=None,
+              flatten_tolerance=None, join_tolerance=None, workers=1, reproducible=False):
     """
     Creates a new dxf file. Iterates it through the root, which contains all svg elements.
     Transforms them into dxf entities and writes it into the dxf file.
-    At the end, saves it as filename.dxf
+    At the end, saves it as filename.dxf in the output directory, or under the given output path.
+
+    :param svg_figures: iterable with all the figures in an svg file, e.g. a list or the generator of iter_svg_file
+    :param filename: name of the dxf file, how it will be stored (not needed if an output path is given)
+    :param output_dir: directory, the dxf file is stored in (default "dxf_files")
+    :param fmt: string, 'asc' for ascii dxf or 'bin' for binary dxf, which is smaller and faster to load
+                (default 'asc')
+    :param output_path: string, path of the dxf file, replaces output_dir and filename (default None)
+    :param flatten_tolerance: float, if given, the Bézier curves of paths are flattened into polylines with this
+                              maximal distance in mm, otherwise they are approximated by splines (default None)
+    :param join_tolerance: float, if given, lines with coincident endpoints (within this distance in mm) are joined
+                           into polylines (see join_lines, default None)
+    :param workers: int, number of processes drawing the figures, None for the number of cpus (see
+                    draw_figures_parallel, default 1)
+    :param reproducible: bool, True if fixed dates and guids are written, thus the same figures always give the same
+                         dxf file (see set_fixed_meta_data, default False)
+    :return: string, path of the saved dxf file
+    """
+    doc = build_dxf_document(svg_figures, flatten_tolerance, join_tolerance, workers)
+
+    dxf_path = get_dxf_path(filename, output_dir, output_path)
+    if reproducible:
+        # opened like in doc.saveas, which can not write fixed metadata
+        open_args = {'mode': 'wt', 'encoding': DXF_ENCODING, 'errors': 'dxfreplace'} if fmt == 'asc' else {'mode': 'wb'}
+        with open(dxf_path, **open_args) as stream:
+            write_document(doc, stream, fmt, reproducible=True)
+    else:
+        doc.saveas(dxf_path, fmt=fmt)
+    dxf_logger.info(f"file saved under: {dxf_path}")
+    return dxf_path
+
+
+def write_dxf_streaming(svg_figures, filename=None, output_dir="dxf_files", fmt='asc', output_path=None,
+                        flatten_tolerance=None, reproducible=False):
+    """
+    Writes the figures into a dxf file, while they are consumed (see DxfStreamWriter). No dxf document is built,
+    every entity is written as soon as its figure is drawn, thus the memory stays constant for huge files, e.g. for
+    the generator of iter_svg_file. The inserts of blocks are exploded. A block is flattened with the scaling of its
+    first use only, as the further uses are not known yet.
+
+    :param svg_figures: iterable with all the figures in an svg file, e.g. the generator of iter_svg_file
+    :param filename: name of the dxf file, how it will be stored (not needed if an output path is given)
+    :param output_dir: directory, the dxf file is stored in (default "dxf_files")
+    :param fmt: string, 'asc' for ascii dxf or 'bin' for binary dxf (default 'asc')
+    :param output_path: string, path of the dxf file, replaces output_dir and filename (default None)
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in mm, None for splines
+                              (default None)
+    :param reproducible: bool, True if fixed dates and guids are written (see set_fixed_meta_data, default False)
+    :return: string, path of the saved dxf file
+    """
+    dxf_path = get_dxf_path(filename, output_dir, output_path)
+    with open(dxf_path, 'wb') as stream:
+        write_dxf_to_stream(svg_figures, stream, fmt, streaming=True, flatten_tolerance=flatten_tolerance,
+                            reproducible=reproducible)
+    dxf_logger.info(f"file saved under: {dxf_path}")
+    return dxf_path
+
+
+def write_dxf_to_stream(svg_figures, stream, fmt='asc', streaming=False, flatten_tolerance=None,
+                        join_tolerance=None, workers=1, reproducible=False):
+    """
+    Writes the figures as dxf into a stream, e.g. an open socket, a BytesIO or a compressed stream. The stream is
+    not closed. Ascii dxf can be written into a text or a binary stream (encoded with DXF_ENCODING), binary dxf only
+    into a binary stream.
 
     :param svg_figures: iterable with all the figures in an svg file
-    :param filename: name of the dxf file, how it will be stored
+    :param stream: text or binary stream, the dxf is written to
+    :param fmt: string, 'asc' for ascii dxf or 'bin' for binary dxf (default 'asc')
+    :param streaming: bool, if True the entities are written while the figures are consumed (see
+                      write_dxf_streaming), otherwise the document is built first (default False)
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in mm, None for splines
+                              (default None)
+    :param join_tolerance: float, if given, lines with coincident endpoints are joined into polylines, not possible
+                           in streaming mode (default None)
+    :param workers: int, number of processes drawing the figures, not used in streaming mode (default 1)
+    :param reproducible: bool, True if fixed dates and guids are written (see set_fixed_meta_data, default False)
     :return: -
     """
+    text_stream = isinstance(stream, io.TextIOBase)
+    if fmt == 'bin' and text_stream:
+        raise TypeError("binary dxf can not be written into a text stream")
+    if streaming and join_tolerance is not None:
+        raise ValueError("lines can not be joined in streaming mode, they are written before all lines are known")
+    if fmt == 'asc' and not text_stream:
+        # encode the text into the binary stream, the wrapper is detached afterwards to keep the stream open
+        stream = io.TextIOWrapper(stream, encoding=DXF_ENCODING, errors='dxfreplace', newline='\n')
+    try:
+        if streaming:
+            with DxfStreamWriter(stream, fmt, reproducible) as writer:
+                for figure in svg_figures:
+                    draw_figure(figure, writer, flatten_tolerance)
+        else:
+            write_document(build_dxf_document(svg_figures, flatten_tolerance, join_tolerance, workers), stream, fmt,
+                           reproducible)
+    finally:
+        if fmt == 'asc' and not text_stream:
+            stream.flush()
+            stream.detach()
+
+
+def dxf_to_bytes(svg_figures, fmt='asc', streaming=False, flatten_tolerance=None, join_tolerance=None, workers=1,
+                 reproducible=False):
+    """
+    Converts the figures into the content of a dxf file, e.g. to respond with it without writing a file.
+
+    :param svg_figures: iterable with all the figures in an svg file
+    :param fmt: string, 'asc' for ascii dxf or 'bin' for binary dxf (default 'asc')
+    :param streaming: bool, if True the entities are written while the figures are consumed (default False)
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in mm, None for splines
+                              (default None)
+    :param join_tolerance: float, if given, lines with coincident endpoints are joined into polylines (default None)
+    :param workers: int, number of processes drawing the figures, not used in streaming mode (default 1)
+    :param reproducible: bool, True if fixed dates and guids are written (see set_fixed_meta_data, default False)
+    :return: bytes, content of the dxf file
+    """
+    stream = io.BytesIO()
+    write_dxf_to_stream(svg_figures, stream, fmt, streaming, flatten_tolerance, join_tolerance, workers, reproducible)
+    return stream.getvalue()
+
+
+def write_document(doc, stream, fmt='asc', reproducible=False):
+    """
+    Writes a dxf document into a stream like doc.write. ezdxf sets the update date and a new version guid while it
+    writes, thus for a reproducible file the steps of doc.write are done here and the metadata is fixed in between.
+    :param doc: ezdxf document
+    :param stream: text stream for ascii dxf (opened with DXF_ENCODING and 'dxfreplace'), binary stream for binary dxf
+    :param fmt: string, 'asc' for ascii dxf or 'bin' for binary dxf (default 'asc')
+    :param reproducible: bool, True if fixed dates and guids are written (see set_fixed_meta_data, default False)
+    :return: -
+    """
+    if not reproducible:
+        doc.write(stream, fmt=fmt)
+        return
+    doc.commit_pending_changes()
+    doc.classes.add_required_classes(doc.dxfversion)
+    doc.update_all()
+    set_fixed_meta_data(doc)
+    if fmt == 'asc':
+        tag_writer = TagWriter(stream, write_handles=True, dxfversion=doc.dxfversion)
+    elif fmt == 'bin':
+        tag_writer = BinaryTagWriter(stream, write_handles=True, dxfversion=doc.dxfversion,
+                                     encoding=doc.output_encoding)
+        tag_writer.write_signature()
+    else:
+        raise ValueError(f"unknown dxf format: {fmt}")
+    doc.export_sections(tag_writer)
+
+
+def build_dxf_document(svg_figures, flatten_tolerance=None, join_tolerance=None, workers=1):
+    """
+    Creates a new dxf document and draws all figures into its modelspace.
+
+    :param svg_figures: iterable with all the figures in an svg file
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in mm, None for splines
+                              (default None)
+    :param join_tolerance: float, if given, the lines of the modelspace with coincident endpoints are joined into
+                           polylines afterwards (default None)
+    :param workers: int, number of processes drawing the figures, None for the number of cpus (default 1)
+    :return: ezdxf document
+    """
     # create new dxf file
     doc = ezdxf.new()
     msp = doc.modelspace()
 
-    # get height of svg-file
-    svg_height = svg_figures[0].get_header_height()
+    tolerances = None
+    if flatten_tolerance is not None:
+        # all uses are known before the blocks are drawn, thus every block is flattened fine enough for its largest use
+        svg_figures = list(svg_figures)
+        tolerances = block_tolerances(svg_figures, flatten_tolerance)
+    if workers == 1:
+        # iterate through svg content
+        for figure in svg_figures:
+            draw_figure(figure, msp, flatten_tolerance, tolerances)
+    else:
+        draw_figures_parallel(svg_figures, msp, flatten_tolerance, workers, tolerances)
+    if join_tolerance is not None:
+        join_lines(msp, join_tolerance)
+    return doc
+
+
+def block_tolerances(svg_figures, flatten_tolerance, tolerances=None):
+    """
+    Gets the flatten tolerance of every block in block units. A block is drawn once and inserted with the scaling of
+    every use, thus its tolerance is divided by the largest scaling of all its uses (including the uses inside of other
+    blocks, whose scaling is multiplied).
 
-    # iterate through svg content
+    :param svg_figures: list with the figures of a svg file or of a block
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in the units of the figures
+    :param tolerances: dictionary, {block name: tolerance} with the tolerances found so far (default None)
+    :return: dictionary, {block name: tolerance} with the maximal distance of flattened Bézier curves in block units
+    """
+    if tolerances is None:
+        tolerances = {}
+    for figure in svg_figures:
+        if figure.get_name() != 'use':
+            continue
+        scale = max(abs(figure.scale_x), abs(figure.scale_y))
+        if scale == 0:
+            continue
+        tolerance = flatten_tolerance / scale
+        # the uses inside of the block only have to be visited again, if the block gets a smaller tolerance
+        if tolerance < tolerances.get(figure.block_name, math.inf):
+            tolerances[figure.block_name] = tolerance
+            block_tolerances(figure.block_figures, tolerance, tolerances)
+    return tolerances
+
+
+def draw_figures_parallel(svg_figures, layout, flatten_tolerance=None, workers=None, tolerances=None):
+    """
+    Draws the figures with a pool of processes. The figures are split into chunks, which are drawn into a
+    RecordingLayout by the workers (the geometry is computed there). The recorded entities are added to the layout
+    in the order of the figures, thus the entities and handles are the same as drawing the figures one after the other.
+    The uses of blocks are drawn in the current process, as the blocks belong to the document.
+
+    :param svg_figures: iterable with all the figures in an svg file
+    :param layout: layout of the dxf file the entities are added to, e.g. the modelspace
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in mm, None for splines
+                              (default None)
+    :param workers: int, number of processes, None for the number of cpus (default None)
+    :param tolerances: dictionary, {block name: tolerance} with the flatten tolerances of the blocks in block units
+                       (see block_tolerances, default None)
+    :return: -
+    """
+    # chunks of figures and uses of blocks, in the order of the figures
+    tasks = []
+    chunk = []
+    for figure in svg_figures:
+        if figure.get_name() == 'use':
+            if chunk:
+                tasks.append(chunk)
+                chunk = []
+            tasks.append(figure)
+        else:
+            chunk.append(figure)
+            if len(chunk) == PARALLEL_CHUNK_SIZE:
+                tasks.append(chunk)
+                chunk = []
+    if chunk:
+        tasks.append(chunk)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        recordings = executor.map(record_figures, [task for task in tasks if isinstance(task, list)],
+                                  itertools.repeat(flatten_tolerance))
+        for task in tasks:
+            if isinstance(task, list):
+                next(recordings).replay(layout)
+            else:
+                draw_figure(task, layout, flatten_tolerance, tolerances)
+
+
+def record_figures(svg_figures, flatten_tolerance=None):
+    """
+    Draws figures into a RecordingLayout (the task of a worker process of draw_figures_parallel).
+    :param svg_figures: list of svg figures, without uses of blocks
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in mm, None for splines
+                              (default None)
+    :return: RecordingLayout, with the recorded entities
+    """
+    recording = RecordingLayout()
     for figure in svg_figures:
-        match figure.get_name():
-            case 'circle':
-                circ = Circle(figure)
-                circ.draw_dxf_circle(msp)
-            case 'ellipse':
-                ell = Ellipse(figure)
-                ell.draw_dxf_ellipse(msp)
-            case 'rectangle':
-                rect = Rectangle(figure)
-                rect.draw_dxf_rect(msp)
-                # print('rectangle: ', element.tag, element.attrib)
-            case 'line':
-                line = Line(figure)
-                line.draw_dxf_line(msp)
-                # print('line:' , element.tag, element.attrib)
-            case 'polygon':
-                polygon = Polygon(figure)
-                polygon.draw_dxf_polygon(msp)
-            case 'polyline':
-                polyline = Polyline(figure)
-                polyline.draw_dxf_polyline(msp)
-            case 'path':
-                # print('path:', element.tag, element.attrib)
-                path = Path(figure)
-                path.draw_svg_path(msp)
-            case _:
-                # print('nothing:', element.tag, element.attrib)
-                dxf_logger.info(f"svg_element without matching figure tag: {figure.get_name()}")
-
-    doc.saveas("dxf_files/" + filename + ".dxf")
-    dxf_logger.info(f"file saved under: src/dxf_files/ + {filename} . dxf")
+        draw_figure(figure, recording, flatten_tolerance)
+    return recording
+
+
+def get_dxf_path(filename, output_dir, output_path=None):
+    """
+    Gets the path of a dxf file.
+
+    :param filename: name of the dxf file (without extension)
+    :param output_dir: directory of the dxf file
+    :param output_path: string, explicit path of the dxf file, replaces output_dir and filename (default None)
+    :return: string, path of the dxf file
+    """
+    if output_path is not None:
+        return output_path
+    if filename is None:
+        raise ValueError("either a filename or an output path is needed")
+    return os.path.join(output_dir, filename + ".dxf")
+
+
+def draw_figure(figure, layout, flatten_tolerance=None, tolerances=None):
+    """
+    Transforms a svg figure into dxf entities and adds them to the layout.
+
+    :param figure: svg figure
+    :param layout: layout of the dxf file the entities are added to, e.g. the modelspace or a block
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in the units of the layout, None for
+                              splines (default None)
+    :param tolerances: dictionary, {block name: tolerance} with the flatten tolerances of the blocks in block units
+                       (see block_tolerances), None if the blocks use the scaling of their first insert (default None)
+    :return: -
+    """
+    match figure.get_name():
+        case 'circle':
+            circ = Circle(figure)
+            circ.draw_dxf_circle(layout)
+        case 'ellipse':
+            ell = Ellipse(figure)
+            ell.draw_dxf_ellipse(layout)
+        case 'rectangle':
+            rect = Rectangle(figure)
+            rect.draw_dxf_rect(layout)
+        case 'line':
+            line = Line(figure)
+            line.draw_dxf_line(layout)
+        case 'polygon':
+            polygon = Polygon(figure)
+            polygon.draw_dxf_polygon(layout)
+        case 'polyline':
+            polyline = Polyline(figure)
+            polyline.draw_dxf_polyline(layout)
+        case 'path':
+            path = Path(figure, flatten_tolerance)
+            path.draw_svg_path(layout)
+        case 'use':
+            draw_block_reference(figure, layout, flatten_tolerance, tolerances)
+        case _:
+            dxf_logger.info(f"svg_element without matching figure tag: {figure.get_name()}")
+
+
+def draw_block_reference(svg_use, layout, flatten_tolerance=None, tolerances=None):
+    """
+    Adds the insert of a svg use to the layout. The referenced block is created with the first insert,
+    all further inserts only reference it.
+
+    :param svg_use: SvgUse, with the figures of the block
+    :param layout: layout of the dxf file the insert is added to
+    :param flatten_tolerance: float, maximal distance of flattened Bézier curves in the units of the layout (default
+                              None)
+    :param tolerances: dictionary, {block name: tolerance} with the flatten tolerances of the blocks in block units
+                       (see block_tolerances). If it is None (e.g. in streaming mode, where the further uses are not
+                       known yet), the tolerance is changed into block units with the scaling of the first insert only,
+                       a further insert with a larger scaling can exceed it (default None)
+    :return: -
+    """
+    blocks = layout.doc.blocks
+    if svg_use.block_name not in blocks:
+        block = blocks.new(name=svg_use.block_name)
+        if flatten_tolerance is not None:
+            if tolerances is not None and svg_use.block_name in tolerances:
+                flatten_tolerance = tolerances[svg_use.block_name]
+            else:
+                flatten_tolerance /= max(abs(svg_use.scale_x), abs(svg_use.scale_y))
+        for figure in svg_use.block_figures:
+            draw_figure(figure, block, flatten_tolerance, tolerances)
+    insert = Insert(svg_use)
+    insert.draw_dxf_insert(layout)
@@ -0,0 +1,339 @@
+import math
+import struct
+from datetime import datetime
+
+import ezdxf
+from ezdxf.lldxf.tagwriter import TagWriter, BinaryTagWriter
+from ezdxf.lldxf.types import BYTES, INT16, INT32, INT64, DOUBLE
+from ezdxf.tools.juliandate import juliandate
+
+from src.logging_config import setup_logger
+
+dxf_stream_logger = setup_logger(__name__)
+
+# handles reserved for the streamed entities: the header is written before the entities, thus the handle seed has to
+# be set in advance (to the first handle after the reserved ones)
+RESERVED_HANDLES = 0x100000000
+# attributes of the splines of render_splines_and_polylines, which are written without an ezdxf export
+SIMPLE_SPLINE_ATTRIBUTES = {'handle', 'owner', 'layer', 'degree', 'flags'}
+# struct formats of the binary tags (group code + value), by group code - strings are not listed
+BINARY_TAG_FORMATS = {**{code: ('<hB', int) for code in BYTES}, **{code: ('<hh', int) for code in INT16},
+                      **{code: ('<hi', int) for code in INT32}, **{code: ('<hq', int) for code in INT64},
+                      **{code: ('<hd', float) for code in DOUBLE}}
+# encoding of the dxf files of ezdxf.new() (R2013, utf-8 since R2007)
+DXF_ENCODING = 'utf-8'
+# metadata of reproducible dxf files (see set_fixed_meta_data), instead of the current time and random guids
+FIXED_DATE = juliandate(datetime(2000, 1, 1))
+FIXED_GUID = '{00000000-0000-0000-0000-000000000000}'
+FIXED_EZDXF_MARKER = f"{ezdxf.__version__} @ 2000-01-01T00:00:00+00:00"
+
+
+def set_fixed_meta_data(doc):
+    """
+    Replaces the dates, guids and ezdxf markers of a document by fixed values, thus the same figures always give the
+    same dxf file. ezdxf sets the update date and the version guid while the document is written, therefore the
+    values are set after doc.update_all() and right before the sections are exported.
+    :param doc: ezdxf document
+    :return: -
+    """
+    for name in ('$TDCREATE', '$TDUCREATE', '$TDUPDATE', '$TDUUPDATE'):
+        doc.header[name] = FIXED_DATE
+    doc.header['$VERSIONGUID'] = FIXED_GUID
+    doc.header['$FINGERPRINTGUID'] = FIXED_GUID
+    metadata = doc.ezdxf_metadata()
+    metadata['CREATED_BY_EZDXF'] = FIXED_EZDXF_MARKER
+    metadata['WRITTEN_BY_EZDXF'] = FIXED_EZDXF_MARKER
+
+
+def _point(point):
+    """
+    Converts a 2d or 3d point into an (x, y, z) tuple of floats.
+    :param point: tuple or vector, with 2 or 3 coordinates
+    :return: (x, y, z) tuple
+    """
+    return float(point[0]), float(point[1]), float(point[2]) if len(point) > 2 else 0.0
+
+
+class DxfStreamWriter:
+    """
+    Writes dxf entities straight into a stream, while they are added. Only the header, tables and objects of an empty
+    ezdxf document are created, the entities are written as dxf records and not kept in memory. Thus, the memory
+    stays constant and the file is written while the figures are still produced.
+    The writer offers the methods of an ezdxf layout, which are used by src/shapes (add_line, add_circle, add_arc,
+    add_ellipse, add_lwpolyline, add_entity for the splines of ezdxf paths and add_blockref). As the blocks section is
+    already written, the inserts of blocks are exploded into their entities.
+
+    Attributes:
+        stream: text (or binary) stream, the dxf file is written to
+        doc: ezdxf document, holds the blocks, which are inserted (it is not written)
+        entity_count: int, number of written entities
+    """
+
+    def __init__(self, stream, fmt='asc', reproducible=False):
+        """
+        Initializes the writer and writes everything in front of the entities (header, classes, tables, blocks).
+        :param stream: text stream, opened with DXF_ENCODING and the error handler 'dxfreplace', or binary stream for
+                       binary dxf
+        :param fmt: string, 'asc' for ascii dxf or 'bin' for binary dxf, default 'asc'
+        :param reproducible: bool, True if fixed dates and guids are written (see set_fixed_meta_data, default False)
+        """
+        self.stream = stream
+        self._reproducible = reproducible
+        self.entity_count = 0
+        self._doc = None
+        self._template = ezdxf.new()
+        if fmt == 'asc':
+            self._tag_writer = TagWriter(stream, write_handles=True, dxfversion=self._template.dxfversion)
+        elif fmt == 'bin':
+            self._tag_writer = BinaryTagWriter(stream, dxfversion=self._template.dxfversion, write_handles=True,
+                                               encoding=DXF_ENCODING)
+            self._tag_writer.write_signature()
+        else:
+            raise ValueError(f"unknown dxf format: {fmt}")
+        # the entities are written as ascii tags, in binary format they are encoded first
+        self._write = self._tag_writer.write_str if fmt == 'asc' else self._write_binary
+        self._owner = self._template.modelspace().block_record_handle
+        self._next_handle = None
+        self._closed = False
+        self._write_head()
+
+    @property
+    def doc(self):
+        """
+        The document holding the blocks, it is only created if a block is inserted.
+        :return: ezdxf document
+        """
+        if self._doc is None:
+            self._doc = ezdxf.new()
+        return self._doc
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _write_head(self):
+        """
+        Writes the sections in front of the entities and starts the entities section.
+        :return: -
+        """
+        template = self._template
+        template.commit_pending_changes()
+        template.update_all()
+        if self._reproducible:
+            set_fixed_meta_data(template)
+        # the streamed entities get the handles after the ones of the template
+        self._next_handle = int(str(template.entitydb.handles), 16)
+        template.header['$HANDSEED'] = f"{self._next_handle + RESERVED_HANDLES:X}"
+
+        template.header.export_dxf(self._tag_writer)
+        template.classes.export_dxf(self._tag_writer)
+        template.tables.export_dxf(self._tag_writer)
+        template.blocks.export_dxf(self._tag_writer)
+        self._write("  0\nSECTION\n  2\nENTITIES\n")
+
+    def close(self):
+        """
+        Ends the entities section and writes the objects (the stream itself is not closed).
+        :return: -
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._write("  0\nENDSEC\n")
+        self._template.objects.export_dxf(self._tag_writer)
+        self._write("  0\nEOF\n")
+        dxf_stream_logger.info(f"{self.entity_count} entities written")
+
+    def _write_binary(self, tags):
+        """
+        Encodes ascii tags into binary tags and writes them in one step (faster than the tag by tag encoding of
+        BinaryTagWriter).
+        :param tags: string, ascii tags
+        :return: -
+        """
+        values = tags.split('\n')
+        chunks = []
+        for code, value in zip(values[0::2], values[1::2]):
+            code = int(code)
+            binary_format = BINARY_TAG_FORMATS.get(code)
+            if binary_format is None:
+                chunks.append(struct.pack('<h', code) + value.encode(DXF_ENCODING, errors='dxfreplace') + b'\x00')
+            else:
+                chunks.append(struct.pack(binary_format[0], code, binary_format[1](value)))
+        self.stream.write(b''.join(chunks))
+
+    def _handle(self):
+        """
+        Gets the handle of the next entity.
+        :return: string, hex handle
+        """
+        if self.entity_count >= RESERVED_HANDLES:
+            raise OverflowError(f"more than {RESERVED_HANDLES} entities can not be streamed")
+        handle = f"{self._next_handle + self.entity_count:X}"
+        self.entity_count += 1
+        return handle
+
+    def _entity_head(self, dxftype, dxfattribs):
+        """
+        Common tags of all entities.
+        :param dxftype: string, dxf type of the entity
+        :param dxfattribs: dictionary, with the dxf attributes (only the layer is used), or None
+        :return: string, tags of the entity
+        """
+        layer = dxfattribs.get('layer', '0') if dxfattribs else '0'
+        return f"  0\n{dxftype}\n  5\n{self._handle()}\n330\n{self._owner}\n100\nAcDbEntity\n  8\n{layer}\n"
+
+    def add_line(self, start, end, dxfattribs=None):
+        """
+        Writes a line.
+        :param start: tuple, start point
+        :param end: tuple, end point
+        :param dxfattribs: dictionary, with the dxf attributes (only the layer is used), default None
+        :return: -
+        """
+        x1, y1, z1 = _point(start)
+        x2, y2, z2 = _point(end)
+        self._write(f"{self._entity_head('LINE', dxfattribs)}100\nAcDbLine\n"
+                          f" 10\n{x1}\n 20\n{y1}\n 30\n{z1}\n 11\n{x2}\n 21\n{y2}\n 31\n{z2}\n")
+
+    def add_circle(self, center, radius, dxfattribs=None):
+        """
+        Writes a circle.
+        :param center: tuple, center point
+        :param radius: float, radius
+        :param dxfattribs: dictionary, with the dxf attributes (only the layer is used), default None
+        :return: -
+        """
+        x, y, z = _point(center)
+        self._write(f"{self._entity_head('CIRCLE', dxfattribs)}100\nAcDbCircle\n"
+                          f" 10\n{x}\n 20\n{y}\n 30\n{z}\n 40\n{float(radius)}\n")
+
+    def add_arc(self, center, radius, start_angle, end_angle, is_counter_clockwise=True, dxfattribs=None):
+        """
+        Writes a circular arc, the arc is always stored counterclockwise (as in ezdxf).
+        :param center: tuple, center point
+        :param radius: float, radius
+        :param start_angle: float, start angle in degree
+        :param end_angle: float, end angle in degree
+        :param is_counter_clockwise: bool, False if the arc goes clockwise from start to end angle, default True
+        :param dxfattribs: dictionary, with the dxf attributes (only the layer is used), default None
+        :return: -
+        """
+        if not is_counter_clockwise:
+            start_angle, end_angle = end_angle, start_angle
+        x, y, z = _point(center)
+        self._write(f"{self._entity_head('ARC', dxfattribs)}100\nAcDbCircle\n"
+                          f" 10\n{x}\n 20\n{y}\n 30\n{z}\n 40\n{float(radius)}\n"
+                          f"100\nAcDbArc\n 50\n{float(start_angle)}\n 51\n{float(end_angle)}\n")
+
+    def add_ellipse(self, center, major_axis=(1, 0, 0), ratio=1, start_param=0, end_param=math.tau,
+                    dxfattribs=None):
+        """
+        Writes an ellipse (or elliptic arc).
+        :param center: tuple, center point
+        :param major_axis: tuple, vector from the center to the end of the major axis
+        :param ratio: float, ratio of minor to major axis
+        :param start_param: float, start parameter in radians
+        :param end_param: float, end parameter in radians
+        :param dxfattribs: dictionary, with the dxf attributes (only the layer is used), default None
+        :return: -
+        """
+        x, y, z = _point(center)
+        ax, ay, az = _point(major_axis)
+        self._write(f"{self._entity_head('ELLIPSE', dxfattribs)}100\nAcDbEllipse\n"
+                          f" 10\n{x}\n 20\n{y}\n 30\n{z}\n 11\n{ax}\n 21\n{ay}\n 31\n{az}\n"
+                          f" 40\n{float(ratio)}\n 41\n{float(start_param)}\n 42\n{float(end_param)}\n")
+
+    def add_lwpolyline(self, points, format='xyseb', close=False, dxfattribs=None):
+        """
+        Writes a lightweight polyline.
+        :param points: list, with the vertices, each vertex with the values given in format
+        :param format: string, order of the vertex values: x, y, s (start width), e (end width), b (bulge),
+                       default 'xyseb' (missing values are 0)
+        :param close: bool, True if the polyline is closed, default False
+        :param dxfattribs: dictionary, with the dxf attributes (only the layer is used), default None
+        :return: -
+        """
+        tags = []
+        count = 0
+        for point in points:
+            count += 1
+            vertex = dict(zip(format, point))
+            tags.append(f" 10\n{float(vertex['x'])}\n 20\n{float(vertex['y'])}\n")
+            if vertex.get('s', 0) or vertex.get('e', 0):
+                tags.append(f" 40\n{float(vertex.get('s', 0))}\n 41\n{float(vertex.get('e', 0))}\n")
+            if vertex.get('b', 0):
+                tags.append(f" 42\n{float(vertex['b'])}\n")
+        self._write(f"{self._entity_head('LWPOLYLINE', dxfattribs)}100\nAcDbPolyline\n"
+                          f" 90\n{count}\n 70\n{1 if close else 0}\n{''.join(tags)}")
+
+    def add_open_spline(self, control_points, degree=3, knots=None, dxfattribs=None):
+        """
+        Writes an open (clamped) B-spline.
+        :param control_points: list, with the control points
+        :param degree: int, degree of the spline, default 3
+        :param knots: list, with the knot values, default None (uniform clamped knots)
+        :param dxfattribs: dictionary, with the dxf attributes (only the layer is used), default None
+        :return: -
+        """
+        control_points = [_point(point) for point in control_points]
+        if knots is None:
+            inner_count = len(control_points) - degree - 1
+            knots = [0.0] * (degree + 1) + [float(i) for i in range(1, inner_count + 1)] + \
+                    [float(inner_count + 1)] * (degree + 1)
+        self._write_spline(control_points, knots, degree, 0, dxfattribs)
+
+    def _write_spline(self, control_points, knots, degree, flags, dxfattribs):
+        """
+        Writes a B-spline given by control points and knots (without weights and fit points).
+        :param control_points: list, with the (x, y, z) control points
+        :param knots: list, with the knot values
+        :param degree: int, degree of the spline
+        :param flags: int, dxf flags of the spline (e.g. closed)
+        :param dxfattribs: dictionary, with the dxf attributes (only the layer is used), or None
+        :return: -
+        """
+        tags = [f" 40\n{float(knot)}\n" for knot in knots]
+        tags.extend(f" 10\n{float(x)}\n 20\n{float(y)}\n 30\n{float(z)}\n" for x, y, z in control_points)
+        self._write(f"{self._entity_head('SPLINE', dxfattribs)}100\nAcDbSpline\n"
+                          f" 70\n{flags}\n 71\n{degree}\n 72\n{len(knots)}\n 73\n{len(control_points)}\n 74\n0\n"
+                          f"{''.join(tags)}")
+
+    def add_entity(self, entity):
+        """
+        Writes an ezdxf entity, which does not belong to a document (e.g. the splines of render_splines_and_polylines
+        or the exploded entities of an insert). Inserts are exploded.
+        :param entity: ezdxf entity
+        :return: -
+        """
+        if entity.dxftype() == 'INSERT':
+            for virtual_entity in entity.virtual_entities():
+                self.add_entity(virtual_entity)
+            return
+        if entity.dxftype() == 'SPLINE' and not entity.fit_points and not entity.weights and \
+                set(entity.dxf.all_existing_dxf_attribs()) <= SIMPLE_SPLINE_ATTRIBUTES:
+            # the splines of Bézier curves are written directly, the export of ezdxf is much slower
+            self._write_spline(entity.control_points, entity.knots, entity.dxf.degree, entity.dxf.flags,
+                               {'layer': entity.dxf.layer})
+            return
+        entity.dxf.handle = self._handle()
+        entity.dxf.owner = self._owner
+        entity.export_dxf(self._tag_writer)
+
+    def add_blockref(self, name, insert, dxfattribs=None):
+        """
+        Writes the insert of a block, which is defined in the blocks of doc. The insert is exploded, i.e. the entities
+        of the block are written at the position of the insert.
+        :param name: string, name of the block
+        :param insert: tuple, insertion point
+        :param dxfattribs: dictionary, with the dxf attributes of the insert (e.g. xscale, yscale, rotation),
+                           default None
+        :return: -
+        """
+        msp = self.doc.modelspace()
+        block_reference = msp.add_blockref(name, insert, dxfattribs=dxfattribs)
+        self.add_entity(block_reference)
+        msp.delete_entity(block_reference)
+
@@ -0,0 +1,327 @@
+import math
+
+import numpy as np
+
+from src.svg_shapes.path_data import LINE, QUADRATIC_BEZIER, ARC, SEGMENT_ARRAYS, PathData
+from src.svg_shapes.transform_matrix import apply_matrix_to_points
+
+# maximal distance (in mm) of the flattened polylines to the figures
+FLATTEN_TOLERANCE = 0.01
+# distance, within the start and end of a polyline are the same point (closed polyline)
+CLOSED_TOLERANCE = 1e-9
+
+
+def flatten_figures(svg_figures, tolerance=FLATTEN_TOLERANCE):
+    """
+    Flattens the figures into polylines, e.g. to measure distances between them. Curves (circles, ellipses, rounded
+    corners, arcs and Bézier curves) are split into lines, which deviate at most tolerance from them. The figures are
+    grouped by their type and every group is flattened at once. The figures of a block are flattened once and
+    transformed for every use.
+
+    :param svg_figures: list with the figures of a svg file (after scaling)
+    :param tolerance: float, maximal distance of the polylines to the figures (default FLATTEN_TOLERANCE)
+    :return: list of (figure, points, closed) tuples in the order of the figures, figure: index of the figure in the
+             list, points: array (n, 2) vertices of the polyline, closed: True if the polyline is a closed contour (the
+             last vertex is the first)
+    """
+    groups = {}
+    for index, figure in enumerate(svg_figures):
+        groups.setdefault(figure.get_name(), []).append(index)
+
+    polylines = []
+    blocks = {}
+    for name, indices in groups.items():
+        if name == 'use':
+            for index in indices:
+                use = svg_figures[index]
+                key = id(use.block_figures)
+                if key not in blocks:
+                    blocks[key] = flatten_figures(use.block_figures, tolerance)
+                polylines.extend((index, apply_matrix_to_points(use.matrix, points), closed)
+                                 for _, points, closed in blocks[key])
+        elif name in FLATTENERS:
+            polylines.extend((indices[figure], points, closed) for figure, points, closed in
+                             FLATTENERS[name]([svg_figures[index] for index in indices], tolerance))
+    polylines.sort(key=lambda polyline: polyline[0])
+    return polylines
+
+
+def flatten_circles(circles, tolerance):
+    """
+    Flattens circles (with the radius of a scaled circle in y direction).
+    :param circles: list of SvgCircle
+    :param tolerance: float, maximal distance of the polylines to the circles
+    :return: list of (figure, points, closed) tuples, figure is the index into the list
+    """
+    radii = np.abs([(circle.radius, circle.radius_y or circle.radius) for circle in circles])
+    centers = np.array([(circle.center_x, circle.center_y) for circle in circles], dtype=float)
+    zeros = np.zeros(len(circles))
+    arcs = ellipse_arcs(centers, np.column_stack((radii[:, 0], zeros)), np.column_stack((zeros, radii[:, 1])), zeros,
+                        zeros + 2 * np.pi, tolerance)
+    return [(figure, points, True) for figure, points in enumerate(arcs)]
+
+
+def flatten_ellipses(ellipses, tolerance):
+    """
+    Flattens ellipses, given by two (not necessarily orthogonal) axis vectors.
+    :param ellipses: list of SvgEllipse
+    :param tolerance: float, maximal distance of the polylines to the ellipses
+    :return: list of (figure, points, closed) tuples, figure is the index into the list
+    """
+    centers = np.array([(ellipse.center_x, ellipse.center_y) for ellipse in ellipses], dtype=float)
+    axis_x = np.array([ellipse.radius_x for ellipse in ellipses], dtype=float)
+    axis_y = np.array([ellipse.radius_y for ellipse in ellipses], dtype=float)
+    zeros = np.zeros(len(ellipses))
+    arcs = ellipse_arcs(centers, axis_x, axis_y, zeros, zeros + 2 * np.pi, tolerance)
+    return [(figure, points, True) for figure, points in enumerate(arcs)]
+
+
+def flatten_rectangles(rectangles, tolerance):
+    """
+    Flattens rectangles, the rounded corners are quarter ellipses with the radii along the edges. The corner arcs go
+    from the edge in height direction to the edge in width direction (and back at the corners 1 and 3), with their
+    center inside the rectangle.
+    :param rectangles: list of SvgRectangle
+    :param tolerance: float, maximal distance of the polylines to the rounded corners
+    :return: list of (figure, points, closed) tuples, figure is the index into the list
+    """
+    corner = np.array([(rectangle.x, rectangle.y) for rectangle in rectangles], dtype=float)
+    width, height, rx, ry = (np.array(values, dtype=float) for values in zip(
+        *[(rectangle.rect_width, rectangle.rect_height, rectangle.rx, rectangle.ry) for rectangle in rectangles]))
+    corners = np.stack((corner, corner + width, corner + width + height, corner + height, corner), axis=1)
+    width_length = np.linalg.norm(width, axis=1)
+    height_length = np.linalg.norm(height, axis=1)
+    rounded = (np.linalg.norm(rx, axis=1) > 0) & (np.linalg.norm(ry, axis=1) > 0) & (width_length > 0) & \
+        (height_length > 0)
+    polylines = [(figure, corners[figure], True) for figure in np.flatnonzero(~rounded).tolist()]
+
+    index = np.flatnonzero(rounded)
+    if len(index) > 0:
+        along_width = (np.linalg.norm(rx[index], axis=1) / width_length[index])[:, None] * width[index]
+        along_height = (np.linalg.norm(ry[index], axis=1) / height_length[index])[:, None] * height[index]
+        signs = np.array(((1, 1), (-1, 1), (-1, -1), (1, -1)))
+        # the four arcs of every rectangle one after the other
+        centers = (corners[index, :4] + signs[:, :1] * along_width[:, None] + signs[:, 1:] * along_height[:, None])
+        axis_x = -signs[:, :1] * along_width[:, None]
+        axis_y = -signs[:, 1:] * along_height[:, None]
+        start = np.tile((0, np.pi / 2, 0, np.pi / 2), len(index))
+        span = np.tile((np.pi / 2, -np.pi / 2, np.pi / 2, -np.pi / 2), len(index))
+        arcs = ellipse_arcs(centers.reshape(-1, 2), axis_x.reshape(-1, 2), axis_y.reshape(-1, 2), start, span,
+                            tolerance)
+        polylines.extend((figure, np.concatenate(arcs[4 * number:4 * number + 4] + [arcs[4 * number][:1]]), True)
+                         for number, figure in enumerate(index.tolist()))
+    return polylines
+
+
+def flatten_lines(lines, tolerance):
+    """
+    Gets the lines as polylines with two points.
+    :param lines: list of SvgLine
+    :param tolerance: float, not used (lines are straight)
+    :return: list of (figure, points, closed) tuples, figure is the index into the list
+    """
+    points = np.array([((line.x1, line.y1), (line.x2, line.y2)) for line in lines], dtype=float)
+    return [(figure, line_points, False) for figure, line_points in enumerate(points)]
+
+
+def flatten_polylines(polylines, tolerance):
+    """
+    Gets the points of polylines and polygons, polygons are closed with their first point.
+    :param polylines: list of SvgPolyline and SvgPolygon
+    :param tolerance: float, not used (the edges are straight)
+    :return: list of (figure, points, closed) tuples, figure is the index into the list
+    """
+    flattened = []
+    for figure, polyline in enumerate(polylines):
+        points = np.asarray(polyline.point_list, dtype=float).reshape(-1, 2)
+        if len(points) < 2:
+            continue
+        if polyline.get_name() == 'polygon' and not np.array_equal(points[0], points[-1]):
+            points = np.concatenate((points, points[:1]))
+        flattened.append((figure, points, bool(np.allclose(points[0], points[-1], atol=CLOSED_TOLERANCE))))
+    return flattened
+
+
+def flatten_paths(paths, tolerance):
+    """
+    Flattens the segments of all paths at once (see path_polylines).
+    :param paths: list of SvgPath
+    :param tolerance: float, maximal distance of the polylines to the segments
+    :return: list of (figure, points, closed) tuples, figure is the index into the list
+    """
+    counts = np.array([len(path.path_data) for path in paths])
+    path_data = PathData(*(np.concatenate([getattr(path.path_data, name) for path in paths])
+                           for name in SEGMENT_ARRAYS))
+    starts = np.cumsum(counts) - counts
+    polylines = path_polylines(path_data, tolerance, starts[counts > 0])
+    figures = np.searchsorted(starts, [first for first, _, _ in polylines], side='right') - 1
+    return [(figure, points, closed) for figure, (_, points, closed) in zip(figures.tolist(), polylines)]
+
+
+def ellipse_arcs(centers, axis_x, axis_y, start, span, tolerance):
+    """
+    Flattens elliptic arcs center + cos(t) axis_x + sin(t) axis_y, t from start to start + span, all arcs at once.
+    :param centers: array (n, 2), centers of the ellipses
+    :param axis_x: array (n, 2), vectors of the first semi-axes (or semi-diameters)
+    :param axis_y: array (n, 2), vectors of the second semi-axes (or semi-diameters)
+    :param start: array (n,), start parameters in radian
+    :param span: array (n,), parameter spans in radian (negative for the other direction)
+    :param tolerance: float, maximal distance of the polylines to the arcs
+    :return: list of n arrays (m, 2), vertices of every arc including the start and end point
+    """
+    counts = arc_segment_count(np.maximum(np.linalg.norm(axis_x, axis=1), np.linalg.norm(axis_y, axis=1)), span,
+                               tolerance)
+    arc = np.repeat(np.arange(len(counts)), counts + 1)
+    fraction = (np.arange(len(arc)) - np.repeat(np.cumsum(counts + 1) - (counts + 1), counts + 1)) / counts[arc]
+    t = (start[arc] + fraction * span[arc])[:, None]
+    points = centers[arc] + np.cos(t) * axis_x[arc] + np.sin(t) * axis_y[arc]
+    return np.split(points, np.cumsum(counts + 1)[:-1])
+
+
+def arc_segment_count(radius, span, tolerance):
+    """
+    Gets the number of lines of flattened arcs: a line over the angle a deviates radius (1 - cos(a / 2)) from
+    the arc.
+    :param radius: array, (largest) radius of the arcs
+    :param span: array, angle of the arcs in radian
+    :param tolerance: float, maximal distance of the lines to the arcs
+    :return: int array, number of lines (at least 1)
+    """
+    step = 2 * np.arccos(np.clip(1 - tolerance / np.maximum(radius, tolerance), -1, 1))
+    return np.maximum(np.ceil(np.abs(span) / step), 1).astype(int)
+
+
+def path_polylines(path_data, tolerance, starts=()):
+    """
+    Flattens the segments of paths, all segments are computed at once. Bézier curves are split by Wang's formula
+    (quadratic curves are elevated to cubic curves), arcs by their angle. The polylines are split, where a segment
+    does not start at the end of the previous one and at the start of every path.
+
+    :param path_data: PathData, segments of the paths (in cartesian coordinates)
+    :param tolerance: float, maximal distance of the polylines to the segments
+    :param starts: iterable of ints, index of the first segment of every path (default ())
+    :return: list of (first, points, closed) tuples, first: index of the first segment of the polyline
+    """
+    if len(path_data) == 0:
+        return []
+    kinds = path_data.kinds
+    points = path_data.points.copy()
+    quadratic = kinds == QUADRATIC_BEZIER
+    points[quadratic, 1] = points[quadratic, 0] + 2 / 3 * (path_data.points[quadratic, 1] - points[quadratic, 0])
+    points[quadratic, 2] = points[quadratic, 3] + 2 / 3 * (path_data.points[quadratic, 2] - points[quadratic, 3])
+    arcs = kinds == ARC
+    curves = (kinds != LINE) & ~arcs
+
+    counts = np.ones(len(kinds), dtype=int)
+    counts[curves], curve_vertices = flatten_cubic_curves(points[curves], tolerance)
+    axis_x, axis_y, start, span = arc_parameters(path_data)
+    counts[arcs] = arc_segment_count(np.maximum(np.linalg.norm(axis_x, axis=1), np.linalg.norm(axis_y, axis=1)),
+                                     span, tolerance)[arcs]
+
+    # parameters t in (0, 1] of all segments, the start point of every polyline is added separately
+    segment = np.repeat(np.arange(len(kinds)), counts)
+    t = ((np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1) / counts[segment])[:, None]
+    p0, p1, p3 = (points[segment, index] for index in (0, 1, 3))
+    vertices = (1 - t) * p0 + t * p3
+    vertices[curves[segment]] = curve_vertices
+    angle = start[segment] + t[:, 0] * span[segment]
+    arc_vertices = p1 + np.cos(angle)[:, None] * axis_x[segment] + np.sin(angle)[:, None] * axis_y[segment]
+    # the end points are kept exact
+    arc_vertices[t[:, 0] == 1] = p3[t[:, 0] == 1]
+    vertices = np.where(arcs[segment][:, None], arc_vertices, vertices)
+
+    breaks = np.any(points[1:, 0] != points[:-1, 3], axis=1)
+    breaks[np.asarray(starts, dtype=int)[np.asarray(starts, dtype=int) > 0] - 1] = True
+    firsts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+    lasts = np.append(firsts[1:], len(kinds))
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    polylines = []
+    for first, last in zip(firsts.tolist(), lasts.tolist()):
+        polyline = np.concatenate((points[first, :1], vertices[offsets[first]:offsets[last]]))
+        polylines.append((first, polyline, bool(np.allclose(polyline[0], polyline[-1], atol=CLOSED_TOLERANCE))))
+    return polylines
+
+
+def flatten_cubic_curves(control_points, tolerance, min_segments=1):
+    """
+    Flattens cubic Bézier curves, all curves are computed at once. The number of lines of every curve is given by
+    Wang's formula: a Bézier curve of degree n with the control points P_i deviates at most tolerance from its
+    polyline with sqrt(n (n - 1) / (8 tolerance) max|P_i - 2 P_i+1 + P_i+2|) lines of equal parameter length.
+    Quadratic curves can be elevated to cubic curves before, which gives the same number of lines.
+
+    :param control_points: array (n, 4, 2), control points of the curves
+    :param tolerance: float, maximal distance of the polylines to the curves
+    :param min_segments: int, minimal number of lines a curve is split into (default 1)
+    :return: (counts, vertices) tuple, counts: int array (n,) number of lines of every curve, vertices: array (m, 2)
+             end points of the lines of all curves one after the other (the start points of the curves are left out,
+             the end points are exact)
+    """
+    # Wang's formula for cubic curves, n (n - 1) / 8 = 3 / 4
+    second_differences = np.linalg.norm(control_points[:, :2] - 2 * control_points[:, 1:3] + control_points[:, 2:],
+                                        axis=2).max(axis=1)
+    counts = np.maximum(np.ceil(np.sqrt(0.75 * second_differences / tolerance)), min_segments).astype(int)
+
+    # parameters t in (0, 1] of all curves
+    curve = np.repeat(np.arange(len(counts)), counts)
+    t = ((np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1) / counts[curve])[:, None]
+    p0, p1, p2, p3 = (control_points[curve, index] for index in range(4))
+    s = 1 - t
+    return counts, s ** 3 * p0 + 3 * s ** 2 * t * p1 + 3 * s * t ** 2 * p2 + t ** 3 * p3
+
+
+def arc_parameters(path_data):
+    """
+    Gets the parametrisation center + cos(t) axis_x + sin(t) axis_y of the arcs in cartesian coordinates. The
+    parameters of the start and end point are derived from the points, the direction from the sweep flag (clockwise
+    in cartesian coordinates).
+
+    :param path_data: PathData, segments of the path (in cartesian coordinates)
+    :return: (axis_x, axis_y, start, span) tuple, axis_x/axis_y: arrays (n, 2) semi-axes of the ellipses, start:
+             array (n,) parameter of the start point, span: array (n,) parameter span (zero for the other segments)
+    """
+    phi = np.radians(path_data.rotation)
+    # the svg coordinates are mirrored at the x-axis
+    axis_x = np.column_stack((np.cos(phi), -np.sin(phi))) * path_data.radii[:, :1]
+    axis_y = np.column_stack((-np.sin(phi), -np.cos(phi))) * path_data.radii[:, 1:]
+    determinant = axis_x[:, 0] * axis_y[:, 1] - axis_x[:, 1] * axis_y[:, 0]
+    arcs = (path_data.kinds == ARC) & (determinant != 0)
+
+    start = np.zeros(len(path_data))
+    span = np.zeros(len(path_data))
+    centers = path_data.points[arcs, 1]
+    parameters = []
+    for point in (path_data.points[arcs, 0], path_data.points[arcs, 3]):
+        # solve point - center = cos(t) axis_x + sin(t) axis_y
+        offset = point - centers
+        cos_t = (offset[:, 0] * axis_y[arcs, 1] - offset[:, 1] * axis_y[arcs, 0]) / determinant[arcs]
+        sin_t = (axis_x[arcs, 0] * offset[:, 1] - axis_x[arcs, 1] * offset[:, 0]) / determinant[arcs]
+        parameters.append(np.arctan2(sin_t, cos_t))
+    # the parameter increases counterclockwise, if the axes are counterclockwise
+    increasing = ~path_data.sweep[arcs] == (determinant[arcs] > 0)
+    difference = np.mod(parameters[1] - parameters[0], 2 * np.pi)
+    arc_span = np.where(increasing, difference, difference - 2 * np.pi)
+    start[arcs] = parameters[0]
+    # an arc with the same start and end point is not drawn (see svg implementation notes)
+    span[arcs] = np.where(np.isclose(arc_span, 0) | np.isclose(np.abs(arc_span), 2 * np.pi), 0, arc_span)
+    return axis_x, axis_y, start, span
+
+
+def polyline_edges(polylines):
+    """
+    Gets the straight edges of polylines.
+    :param polylines: list of (figure, points, closed) tuples (see flatten_figures)
+    :return: (starts, ends, figures) tuple, starts/ends: arrays (n, 2) start and end points of the edges, figures:
+             int array (n,) index of the figure of every edge
+    """
+    if not polylines:
+        return np.zeros((0, 2)), np.zeros((0, 2)), np.zeros(0, dtype=int)
+    starts = np.concatenate([points[:-1] for _, points, _ in polylines])
+    ends = np.concatenate([points[1:] for _, points, _ in polylines])
+    figures = np.repeat([figure for figure, _, _ in polylines], [len(points) - 1 for _, points, _ in polylines])
+    return starts, ends, figures.astype(int)
+
+
+# flattening function of every figure type (uses of blocks are flattened by their block)
+FLATTENERS = {'circle': flatten_circles, 'ellipse': flatten_ellipses, 'rectangle': flatten_rectangles,
+              'line': flatten_lines, 'polyline': flatten_polylines, 'polygon': flatten_polylines,
+              'path': flatten_paths}
@@ -1,40 +1,132 @@
-from logging_config import setup_logger
-from src.dxf_handler import write_dxf
-from src.svg_handler import read_svg_file, scale_file_param, scale_file
+import argparse
+import os
+import sys
+import time
+
+from src.batch_converter import collect_svg_files, convert_files, summarize_results
+from src.contour_joiner import JOIN_TOLERANCE
+from src.duplicate_filter import DUPLICATE_TOLERANCE
+from src.logging_config import setup_logger
+from src.shapes.path import Path
 
 main_logger = setup_logger(__name__)
 
 
-def main():
-    """Main function to print Hello World."""
-    print("Hello, World!")
+def parse_arguments(argv=None):
+    """
+    Parses the arguments of the command line.
+    :param argv: list of strings, arguments (default sys.argv)
+    :return: argparse.Namespace, with the parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Converts svg files into dxf files.")
+    parser.add_argument('inputs', nargs='+', help="svg files, directories (searched recursively) or glob patterns")
+    parser.add_argument('-o', '--output-dir', default='dxf_files', help="directory of the dxf files "
+                                                                        "(default: dxf_files)")
+    parser.add_argument('-s', '--scale', type=float, nargs='+', default=[1.0], metavar='FACTOR',
+                        help="scaling factor, or one factor in x and one in y direction (default: 1)")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                        help="number of worker processes, converting one file each (default: number of cpus)")
+    parser.add_argument('--figure-workers', type=int, default=1, metavar='N',
+                        help="number of processes drawing the figures and checking the cut rules of one file, "
+                             "e.g. for a single huge file (default: 1)")
+    parser.add_argument('--reproducible', action='store_true',
+                        help="write fixed dates and guids, thus the same svg file always gives the same dxf file")
+    parser.add_argument('--streaming', action='store_true',
+                        help="write the dxf files while the svg files are read, with constant memory "
+                             "(inserts of blocks are exploded)")
+    parser.add_argument('--binary', action='store_true',
+                        help="write binary dxf files, which are smaller and faster to load")
+    parser.add_argument('--flatten', type=float, nargs='?', const=Path.MAX_DISTANCE, default=None,
+                        metavar='TOLERANCE',
+                        help="flatten the Bézier curves of paths into polylines with the maximal distance TOLERANCE "
+                             f"in mm, after scaling (default: {Path.MAX_DISTANCE}), instead of splines")
+    parser.add_argument('--join-lines', type=float, nargs='?', const=JOIN_TOLERANCE, default=None,
+                        metavar='TOLERANCE',
+                        help="join lines, whose endpoints are within TOLERANCE in mm, into polylines "
+                             f"(default: {JOIN_TOLERANCE})")
+    parser.add_argument('--remove-duplicates', type=float, nargs='?', const=DUPLICATE_TOLERANCE, default=None,
+                        metavar='TOLERANCE',
+                        help="remove duplicated figures and path segments, which are within TOLERANCE in mm "
+                             f"(default: {DUPLICATE_TOLERANCE})")
+    parser.add_argument('--optimize-order', action='store_true',
+                        help="order the figures to minimize the rapid travel of the cutting head, inner contours are "
+                             "cut before their outer contour")
+    parser.add_argument('--thickness', type=float, default=None, metavar='MM',
+                        help="check the cut rules (minimal radius, corner radius, line width, distance and web width) "
+                             "for the thickness MM of the material and report the violations")
+    parser.add_argument('--incremental', action='store_true',
+                        help="keep the results of the cut rules next to the dxf files (NAME.rules.npz) and only "
+                             "re-check the changed figures and their neighbours on the next run")
+    arguments = parser.parse_args(argv)
+    if len(arguments.scale) > 2:
+        parser.error("--scale takes one or two factors")
+    if arguments.workers < 1:
+        parser.error("--workers has to be at least 1")
+    if arguments.figure_workers < 1:
+        parser.error("--figure-workers has to be at least 1")
+    if arguments.flatten is not None and arguments.flatten <= 0:
+        parser.error("--flatten takes a positive tolerance")
+    if arguments.join_lines is not None:
+        if arguments.join_lines <= 0:
+            parser.error("--join-lines takes a positive tolerance")
+        if arguments.streaming:
+            parser.error("--join-lines can not be used with --streaming")
+    if arguments.remove_duplicates is not None and arguments.remove_duplicates <= 0:
+        parser.error("--remove-duplicates takes a positive tolerance")
+    if arguments.optimize_order and arguments.streaming:
+        parser.error("--optimize-order can not be used with --streaming")
+    if arguments.thickness is not None:
+        if arguments.thickness <= 0:
+            parser.error("--thickness takes a positive thickness")
+        if arguments.streaming:
+            parser.error("--thickness can not be used with --streaming")
+    if arguments.incremental and arguments.thickness is None:
+        parser.error("--incremental needs --thickness")
+    return arguments
+
+
+def main(argv=None):
+    """
+    Converts the svg files given on the command line into dxf files and reports the result of every file, the failures
+    and the throughput.
+    :param argv: list of strings, arguments (default sys.argv)
+    :return: int, exit code (0 if all files were converted, 1 otherwise)
+    """
+    arguments = parse_arguments(argv)
+    scale_x, scale_y = arguments.scale if len(arguments.scale) == 2 else arguments.scale * 2
+
+    svg_files = collect_svg_files(arguments.inputs)
+    if not svg_files:
+        main_logger.error(f"no svg files found in: {arguments.inputs}")
+        return 1
+
+    start = time.perf_counter()
+    results = []
+    for result in convert_files(svg_files, arguments.output_dir, scale_x, scale_y, arguments.workers,
+                                arguments.reproducible, arguments.streaming,
+                                'bin' if arguments.binary else 'asc', arguments.flatten, arguments.join_lines,
+                                arguments.remove_duplicates, arguments.optimize_order, arguments.thickness,
+                                arguments.incremental, arguments.figure_workers):
+        results.append(result)
+        if result.error is None:
+            duplicates = f"{result.duplicates} duplicates removed, " if arguments.remove_duplicates is not None else ""
+            travel = f"travel {result.travel[0]:.1f} -> {result.travel[1]:.1f} mm, " if result.travel else ""
+            violations = f"{len(result.violations)} cut rule violations, " if result.violations is not None else ""
+            print(f"ok      {result.svg_file} -> {result.dxf_file} ({result.figure_count} figures, {duplicates}"
+                  f"{travel}{violations}{result.seconds:.3f}s)")
+            for violation in result.violations or ():
+                subject = f"figure {violation.figure} (segment {violation.segment})" if violation.other is None \
+                    else f"figures {violation.figure} and {violation.other}"
+                print(f"        {violation.rule} of {subject} at ({violation.position[0]:.3f}, "
+                      f"{violation.position[1]:.3f}): {violation.value:.3f} mm, minimum {violation.limit:.3f} mm")
+        else:
+            print(f"failed  {result.svg_file}: {result.error}")
+    summary = summarize_results(results, time.perf_counter() - start)
+
+    print(f"{summary['converted']} converted, {summary['failed']} failed in {summary['seconds']:.2f}s "
+          f"({summary['files_per_second']:.1f} files/s, {summary['megabytes_per_second']:.2f} MB/s)")
+    return 0 if summary['failed'] == 0 else 1
 
 
 if __name__ == "__main__":
-    # /basic geometric forms/
-    # /animals/without shapes/
-    # /bezier curves/
-    # /fruits and veggies/
-    # /dohner ag/
-    # /fonts/
-    filepath = "C:/Users/ycasp/Documents/Projekt Lukas/svg collection/dohner ag/"
-    filename = "Wedding01_wAnchor"
-    ending = ".svg"
-    try:
-        # read in svg (xml) file into tree
-        svg_figures = read_svg_file(filepath + filename + ending)
-
-        # scale file
-        scale = 0.1
-
-        #svg_figures = scale_file(svg_figures, 286.242, 254.179)
-        svg_figures = scale_file_param(svg_figures, scale, scale)
-
-        # cut rules
-        # enforce_cut_rules(svg_root, 2)
-
-        # write svg content to dxf file and save it
-        write_dxf(svg_figures, filename)
-
-    except FileNotFoundError as pathErr:
-        main_logger.exception(pathErr)
+    sys.exit(main())
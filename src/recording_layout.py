@@ -0,0 +1,79 @@
+from ezdxf.entities import factory
+
+# data of entities, which is not stored in dxf attributes
+ENTITY_DATA = {'SPLINE': ('control_points', 'knots', 'weights', 'fit_points')}
+# entities with sub entities, which are not recorded
+COMPOSED_ENTITIES = ('POLYLINE', 'INSERT')
+
+
+class RecordingLayout:
+    """
+    Layout, which records the calls adding entities (add_line, add_lwpolyline, add_entity, ...) instead of creating
+    them. The figures can be drawn in a worker process and the recorded calls are replayed on the layout of the
+    document in the main process, which gives the same entities (and handles) as drawing the figures there.
+    The records only contain picklable values, entities added with add_entity (e.g. the splines of
+    render_splines_and_polylines, ezdxf entities can not be pickled) are recorded by their dxf attributes and data.
+    Figures, which need the document (uses of blocks), can not be recorded.
+
+    Attributes:
+        calls: list of tuples, (name of the method, args, kwargs) of every call
+    """
+
+    def __init__(self):
+        """
+        Initializes the recording layout.
+        """
+        self.calls = []
+
+    def __getattr__(self, name):
+        """
+        Gets a function, which records a call of an add method of the layout.
+        :param name: string, name of the method
+        :return: function, which records the call
+        """
+        if not name.startswith('add_'):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return record
+
+    def add_entity(self, entity):
+        """
+        Records an ezdxf entity, which does not belong to a document.
+        :param entity: ezdxf entity
+        :return: -
+        """
+        dxftype = entity.dxftype()
+        if dxftype in COMPOSED_ENTITIES:
+            raise TypeError(f"{dxftype} entities can not be recorded")
+        data = {name: [tuple(value) if hasattr(value, '__len__') else value for value in getattr(entity, name)]
+                for name in ENTITY_DATA.get(dxftype, ())}
+        self.calls.append(('add_entity', (dxftype, entity.dxfattribs(), data), {}))
+
+    def replay(self, layout):
+        """
+        Replays the recorded calls on a layout.
+        :param layout: layout of the dxf file, e.g. the modelspace or a DxfStreamWriter
+        :return: -
+        """
+        for name, args, kwargs in self.calls:
+            if name == 'add_entity':
+                layout.add_entity(create_entity(*args))
+            else:
+                getattr(layout, name)(*args, **kwargs)
+
+
+def create_entity(dxftype, dxfattribs, data):
+    """
+    Creates an ezdxf entity (without document) from recorded values.
+    :param dxftype: string, type of the entity, e.g. 'SPLINE'
+    :param dxfattribs: dictionary, dxf attributes of the entity
+    :param data: dictionary, data of the entity (see ENTITY_DATA)
+    :return: ezdxf entity
+    """
+    entity = factory.new(dxftype, dxfattribs)
+    for name, values in data.items():
+        setattr(entity, name, values)
+    return entity
@@ -0,0 +1,289 @@
+import hashlib
+import itertools
+import os
+import zipfile
+from collections import deque
+
+import numpy as np
+
+from src.cut_rules import FACTOR, MIN_LINE_WIDTH, CutRuleViolation, connected_contours, contour_violations, \
+    default_cell_size, figure_violations, sort_violations
+from src.flattening import FLATTEN_TOLERANCE, flatten_figures, polyline_edges
+from src.logging_config import setup_logger
+
+rule_cache_logger = setup_logger(__name__)
+
+# version of the cache files, files of another version are not used
+RULE_CACHE_VERSION = 1
+# extension of the cache files, which are written next to the dxf files
+RULE_CACHE_EXTENSION = '.rules.npz'
+# boxes covering more cells of the spatial index are not entered in the cells, but checked with every query
+MAX_INDEX_CELLS = 16
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the bounding boxes of the figures. Every box is entered in the cells it covers, the entries are
+    sorted by the key of their cell, thus the entries of a column of cells are found by a binary search. Boxes covering
+    more than MAX_INDEX_CELLS cells (e.g. the border of a sheet) are kept in a list, which is checked with every query.
+    The index only consists of arrays, thus it is saved with the cache (see CutRuleCache).
+
+    Attributes:
+        boxes: array (n, 4), (min x, min y, max x, max y) of every figure, NaN for figures without geometry
+        cell_size: float, size of the cells
+        origin: array (2,), lower left corner of the grid
+        shape: int array (2,), number of columns and rows of the grid
+        keys: int array (m,), sorted keys of the cells of the entries, column * rows + row
+        items: int array (m,), figure of every entry
+        large: int array, figures with boxes covering more than MAX_INDEX_CELLS cells
+    """
+
+    def __init__(self, boxes, cell_size, origin, shape, keys, items, large):
+        """
+        Initializes the spatial index with its arrays (see build_spatial_index).
+        """
+        self.boxes = boxes
+        self.cell_size = cell_size
+        self.origin = origin
+        self.shape = shape
+        self.keys = keys
+        self.items = items
+        self.large = large
+
+    def query(self, box_min, box_max):
+        """
+        Finds the figures, whose bounding boxes overlap at least one of the query boxes.
+        :param box_min: array (k, 2), lower left corners of the query boxes
+        :param box_max: array (k, 2), upper right corners of the query boxes
+        :return: int array, sorted indices of the figures
+        """
+        found = [self.large]
+        for query_min, query_max in zip(np.reshape(box_min, (-1, 2)), np.reshape(box_max, (-1, 2))):
+            cell_min = np.maximum(np.floor((query_min - self.origin) / self.cell_size), 0).astype(int)
+            cell_max = np.minimum(np.floor((query_max - self.origin) / self.cell_size), self.shape - 1).astype(int)
+            for column in range(cell_min[0], cell_max[0] + 1):
+                first = np.searchsorted(self.keys, column * self.shape[1] + cell_min[1], side='left')
+                last = np.searchsorted(self.keys, column * self.shape[1] + cell_max[1], side='right')
+                found.append(self.items[first:last])
+        candidates = np.unique(np.concatenate(found).astype(int))
+        boxes = self.boxes[candidates]
+        overlap = np.zeros(len(candidates), dtype=bool)
+        for query_min, query_max in zip(np.reshape(box_min, (-1, 2)), np.reshape(box_max, (-1, 2))):
+            overlap |= np.all((boxes[:, :2] <= query_max) & (query_min <= boxes[:, 2:]), axis=1)
+        return candidates[overlap]
+
+
+def build_spatial_index(boxes):
+    """
+    Builds the spatial index of the bounding boxes of the figures. The size of the cells is the median size of the
+    boxes, thus most boxes cover a few cells.
+    :param boxes: array (n, 4), (min x, min y, max x, max y) of every figure, NaN for figures without geometry
+    :return: SpatialIndex
+    """
+    valid = np.flatnonzero(~np.isnan(boxes[:, 0]))
+    if len(valid) == 0:
+        empty = np.zeros(0, dtype=int)
+        return SpatialIndex(boxes, 1.0, np.zeros(2), np.ones(2, dtype=int), empty, empty, empty)
+    box_min, box_max = boxes[valid, :2], boxes[valid, 2:]
+    cell_size = max(float(np.median(np.max(box_max - box_min, axis=1))), 1e-3)
+    origin = box_min.min(axis=0)
+    cell_min = np.floor((box_min - origin) / cell_size).astype(int)
+    cell_max = np.floor((box_max - origin) / cell_size).astype(int)
+    shape = cell_max.max(axis=0) + 1
+
+    extent = cell_max - cell_min + 1
+    counts = extent[:, 0] * extent[:, 1]
+    small = counts <= MAX_INDEX_CELLS
+    extent, counts, cell_min, figures = extent[small], counts[small], cell_min[small], valid[small]
+    entry = np.repeat(np.arange(len(figures)), counts)
+    steps = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cells = cell_min[entry] + np.column_stack((steps // extent[entry, 1], steps % extent[entry, 1]))
+    keys = cells[:, 0] * shape[1] + cells[:, 1]
+    order = np.argsort(keys, kind='stable')
+    return SpatialIndex(boxes, cell_size, origin, shape, keys[order], figures[entry[order]], valid[~small])
+
+
+class CutRuleCache:
+    """
+    Results of the cut rule checks of a file, which are kept between the runs (see enforce_cut_rules_cached).
+
+    Attributes:
+        parameters: array (4,), thickness, minimal line width, flatten tolerance and size of the grid cells of the
+                    distance check (NaN without edges)
+        hashes: array (n,) of strings, geometry hash of every figure (see geometry_hashes)
+        violations: list of CutRuleViolation
+        index: SpatialIndex, bounding boxes of the figures
+    """
+
+    def __init__(self, parameters, hashes, violations, index):
+        """
+        Initializes the cache.
+        """
+        self.parameters = parameters
+        self.hashes = hashes
+        self.violations = violations
+        self.index = index
+
+    def save(self, cache_file):
+        """
+        Saves the cache into a npz file (replaced at once, thus an interrupted run leaves the old file).
+        :param cache_file: string, path of the file
+        :return: -
+        """
+        violations = self.violations
+        temporary_file = f"{cache_file}.tmp"
+        with open(temporary_file, 'wb') as file:
+            np.savez_compressed(
+                file, version=RULE_CACHE_VERSION, parameters=self.parameters, hashes=self.hashes,
+                rules=np.array([violation.rule for violation in violations], dtype=str),
+                figures=np.array([violation.figure for violation in violations], dtype=int),
+                segments=np.array([violation.segment for violation in violations], dtype=int),
+                values=np.array([violation.value for violation in violations], dtype=float),
+                limits=np.array([violation.limit for violation in violations], dtype=float),
+                positions=np.array([violation.position for violation in violations], dtype=float).reshape(-1, 2),
+                others=np.array([-1 if violation.other is None else violation.other for violation in violations],
+                                dtype=int),
+                boxes=self.index.boxes, cell_size=self.index.cell_size, origin=self.index.origin,
+                shape=self.index.shape, keys=self.index.keys, items=self.index.items, large=self.index.large)
+        os.replace(temporary_file, cache_file)
+
+
+def load_rule_cache(cache_file):
+    """
+    Loads a cache, which was saved by CutRuleCache.save.
+    :param cache_file: string, path of the file
+    :return: CutRuleCache, None if the file does not exist, is broken or of another version
+    """
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        with np.load(cache_file, allow_pickle=False) as data:
+            if int(data['version']) != RULE_CACHE_VERSION:
+                rule_cache_logger.info(f"cut rule cache {cache_file} of another version is not used")
+                return None
+            violations = [CutRuleViolation(rule, figure, segment, value, limit, tuple(position),
+                                           None if other < 0 else other)
+                          for rule, figure, segment, value, limit, position, other in zip(
+                              data['rules'].tolist(), data['figures'].tolist(), data['segments'].tolist(),
+                              data['values'].tolist(), data['limits'].tolist(), data['positions'].tolist(),
+                              data['others'].tolist())]
+            index = SpatialIndex(data['boxes'], float(data['cell_size']), data['origin'], data['shape'],
+                                 data['keys'], data['items'], data['large'])
+            return CutRuleCache(data['parameters'], data['hashes'], violations, index)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        rule_cache_logger.warning(f"cut rule cache {cache_file} can not be read: {e}")
+        return None
+
+
+def geometry_hashes(svg_figures, polylines):
+    """
+    Calculates a hash of the geometry of every figure: its type and its flattened polylines (see flatten_figures),
+    thus a figure keeps its hash, if it is only moved in the list, and gets a new one, if it is changed or moved on
+    the sheet.
+    :param svg_figures: list with the figures of a svg file
+    :param polylines: list of (figure, points, closed) tuples, the flattened figures sorted by figure
+    :return: (hashes, boxes) tuple, hashes: array (n,) of strings, boxes: array (n, 4) (min x, min y, max x, max y)
+             of every figure, NaN for figures without polylines
+    """
+    hashes = [hashlib.blake2b(figure.get_name().encode(), digest_size=16) for figure in svg_figures]
+    boxes = np.full((len(svg_figures), 4), np.nan)
+    for figure, figure_polylines in itertools.groupby(polylines, key=lambda polyline: polyline[0]):
+        points = []
+        for _, polyline_points, closed in figure_polylines:
+            polyline_points = np.ascontiguousarray(polyline_points, dtype=float)
+            hashes[figure].update(len(polyline_points).to_bytes(8, 'little') + bytes([closed]))
+            hashes[figure].update(polyline_points.tobytes())
+            points.append(polyline_points)
+        points = np.concatenate(points)
+        boxes[figure] = (*points.min(axis=0), *points.max(axis=0))
+    return np.array([figure_hash.hexdigest() for figure_hash in hashes], dtype='U32'), boxes
+
+
+def enforce_cut_rules_cached(svg_figures, thickness, cache_file, min_line_width=MIN_LINE_WIDTH,
+                             tolerance=FLATTEN_TOLERANCE, workers=1):
+    """
+    Checks the cut rules like enforce_cut_rules, but keeps the results in a cache file and re-checks only the changed
+    figures on the next run:
+        - the figures are matched with the cached figures by their geometry hash (see geometry_hashes), figures
+          without an equal cached figure are changed
+        - the violations of unchanged figures (and distances between two unchanged figures) are taken from the cache
+        - the rules of single figures and the web widths are checked for the changed figures, the distances between
+          the changed figures and their neighbours, which are found with the spatial index of the cached figures
+    The grid of the distance check is kept in the cache, thus the results are the same as checking all figures with
+    this grid. A cache of other parameters is replaced by checking all figures.
+
+    :param svg_figures: list with the figures of a svg file
+    :param thickness: float, thickness of the material in mm
+    :param cache_file: string, path of the cache file, it is written after the check
+    :param min_line_width: float, minimal length of a straight edge in mm (default MIN_LINE_WIDTH)
+    :param tolerance: float, maximal distance of the flattened figures to the figures (default FLATTEN_TOLERANCE)
+    :param workers: int, number of processes checking the distances and web widths (see check_tiles), None for the
+                    number of cpus (default 1)
+    :return: list of CutRuleViolation, sorted by figure and segment
+    """
+    min_distance = FACTOR * thickness
+    polylines = flatten_figures(svg_figures, tolerance)
+    hashes, boxes = geometry_hashes(svg_figures, polylines)
+    # the polylines are connected on the whole sheet, also for the distances of the changed figures
+    groups = connected_contours(polylines, tolerance)
+    cache = load_rule_cache(cache_file)
+
+    if cache is None or not np.array_equal(cache.parameters[:3], (thickness, min_line_width, tolerance)):
+        starts, ends, _ = polyline_edges(polylines)
+        cell_size = default_cell_size(np.linalg.norm(ends - starts, axis=1), min_distance)
+        violations = figure_violations(svg_figures, thickness, min_line_width) + \
+            contour_violations(polylines, min_distance, workers, cell_size, groups)
+        checked = len(svg_figures)
+    else:
+        cell_size = None if np.isnan(cache.parameters[3]) else float(cache.parameters[3])
+        cached_figures = {}
+        for cached, figure_hash in enumerate(cache.hashes.tolist()):
+            cached_figures.setdefault(figure_hash, deque()).append(cached)
+        figure_of_cached = np.full(len(cache.hashes), -1)
+        changed = np.zeros(len(svg_figures), dtype=bool)
+        for figure, figure_hash in enumerate(hashes.tolist()):
+            if cached_figures.get(figure_hash):
+                figure_of_cached[cached_figures[figure_hash].popleft()] = figure
+            else:
+                changed[figure] = True
+
+        violations = [remap_violation(violation, figure_of_cached) for violation in cache.violations
+                      if figure_of_cached[violation.figure] >= 0 and
+                      (violation.other is None or figure_of_cached[violation.other] >= 0)]
+        changed_figures = np.flatnonzero(changed)
+        located = changed_figures[~np.isnan(boxes[changed_figures, 0])]
+        neighbours = figure_of_cached[cache.index.query(boxes[located, :2] - min_distance,
+                                                        boxes[located, 2:] + min_distance)]
+        checked_figures = np.zeros(len(svg_figures), dtype=bool)
+        checked_figures[changed_figures] = True
+        checked_figures[neighbours[neighbours >= 0]] = True
+
+        violations += figure_violations([svg_figures[figure] for figure in changed_figures], thickness,
+                                        min_line_width, changed_figures)
+        checked_polylines = np.array([checked_figures[figure] for figure, _, _ in polylines], dtype=bool)
+        violations += [violation for violation in contour_violations(
+            [polyline for polyline, checked in zip(polylines, checked_polylines) if checked], min_distance, workers,
+            cell_size, groups[checked_polylines])
+            if changed[violation.figure] or (violation.other is not None and changed[violation.other])]
+        checked = int(checked_figures.sum())
+
+    sort_violations(violations)
+    CutRuleCache(np.array([thickness, min_line_width, tolerance, np.nan if cell_size is None else cell_size]), hashes,
+                 violations, build_spatial_index(boxes)).save(cache_file)
+    rule_cache_logger.info(f"{len(violations)} cut rule violations in {len(svg_figures)} figures, {checked} figures "
+                           f"checked")
+    return violations
+
+
+def remap_violation(violation, figure_of_cached):
+    """
+    Moves a cached violation to the new indices of its figures.
+    :param violation: CutRuleViolation of the cache
+    :param figure_of_cached: int array, new index of every cached figure
+    :return: CutRuleViolation
+    """
+    figure = int(figure_of_cached[violation.figure])
+    if violation.other is None:
+        return violation._replace(figure=figure)
+    other = int(figure_of_cached[violation.other])
+    return violation._replace(figure=min(figure, other), other=max(figure, other))
@@ -1,6 +1,12 @@
 # scaling functions
 from svgpathtools import parse_path
 
+from src.logging_config import setup_logger
+from src.svg_shapes.number_parser import parse_points
+from src.svg_shapes.path_data import parse_path_data
+
+scaling_functions_logger = setup_logger(__name__)
+
 
 def scale_rectangle(element, scale_x, scale_y):
     """
@@ -129,9 +135,15 @@ def scale_path(element, scale_x, scale_y):
     :return: -
     """
     path = element.attrib.get('d')
-    parsed_path = parse_path(path)
-    scaled_path = parsed_path.scaled(scale_x, scale_y)
-    element.set('d', scaled_path.d())
+    try:
+        path_data = parse_path_data(path)
+    except ValueError as e:
+        # fallback to svgpathtools (arcs can only be scaled with scale_x == scale_y)
+        scaling_functions_logger.warning(f"path could not be parsed ({e}), svgpathtools is used")
+        element.set('d', parse_path(path).scaled(scale_x, scale_y).d())
+        return
+    path_data.scale(scale_x, scale_y)
+    element.set('d', path_data.d())
 
 
 def scale_polygon(element, scale_x, scale_y):
@@ -143,7 +155,5 @@ def scale_polygon(element, scale_x, scale_y):
     :param scale_y: factor for scaling in x direction
     :return: -
     """
-    points = element.get("points")
-    scaled_points = [f"{float(p.split(',')[0]) * scale_x},{float(p.split(',')[1]) * scale_y}"
-        for p in points.strip().split()]
-    element.set("points", " ".join(scaled_points))
+    scaled_points = parse_points(element.get("points")) * (scale_x, scale_y)
+    element.set("points", " ".join(f"{x},{y}" for x, y in scaled_points.tolist()))
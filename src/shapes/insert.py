@@ -0,0 +1,32 @@
+class Insert:
+    """
+    Represents the insert of a block, i.e. a reference to geometry, which is defined once in the dxf file.
+
+    Attributes:
+        block_name (string): name of the inserted block
+        insert (tuple): insertion point of the block
+        scale_x (float): scaling of the block in x-direction
+        scale_y (float): scaling of the block in y-direction
+        rotation (float): rotation of the block in degree
+    """
+
+    def __init__(self, svg_use):
+        """
+        Converts an SvgUse into a "dxf"-insert, ready to be written in dxf-file.
+        :param svg_use: SvgUse, which is transformed into dxf
+        """
+        self.block_name = svg_use.block_name
+        self.insert = svg_use.insert
+        self.scale_x = svg_use.scale_x
+        self.scale_y = svg_use.scale_y
+        self.rotation = svg_use.rotation
+
+    def draw_dxf_insert(self, msp):
+        """
+        Adds an insert of the block to the dxf file, the block has to exist already.
+
+        :param msp: dxf file (or block) we want the insert to be part of
+        :return: -
+        """
+        msp.add_blockref(self.block_name, self.insert,
+                         dxfattribs={'xscale': self.scale_x, 'yscale': self.scale_y, 'rotation': self.rotation})
@@ -1,9 +1,11 @@
 import math
 
-from ezdxf.path import from_vertices, render_splines_and_polylines
+import numpy as np
+from ezdxf.path import Path as dxfPath, render_splines_and_polylines
 from svgpathtools.path import CubicBezier, QuadraticBezier, Arc
 from svgpathtools.path import Line as svgLine
 
+from src.flattening import flatten_cubic_curves
 from src.logging_config import setup_logger
 from src.utilities import rad_to_degree, rotate_clockwise_around_cartesian_origin
 
@@ -16,6 +18,8 @@ class Path:
 
     Attributes
        path (string): The path of a svg file.
+       flatten_tolerance (float): maximal distance of the polylines to the Bézier curves, None if the curves are
+                                  approximated by splines.
     """
     # constants for polyline approximation of Bézier curves
     MAX_DISTANCE = 0.1  # maximal distance to the original Bézier curve
@@ -24,105 +28,202 @@ class Path:
     # constant for spline approx of Bézier curves
     G1_TOL = 1e-2
 
-    def __init__(self, svg_path):
+    def __init__(self, svg_path, flatten_tolerance=None):
         """
         Initializes the path object.
         :param svg_path: SvgPath, path to be transformed into dxf, already transformed and changed coordinates to cartesian coordinates
+        :param flatten_tolerance: float, if given, the Bézier curves are flattened into polylines with this maximal
+                                  distance (in the units of the dxf file, i.e. mm after scaling), e.g. MAX_DISTANCE.
+                                  Default None, the curves are approximated by splines.
         """
         # extract the parsed_path (Path of svgpathtools)
         self.parsed_path = svg_path.parsed_path
+        self.flatten_tolerance = flatten_tolerance
 
     def draw_svg_path(self, msp):
         """
         Adds the path to a dxf file.
-        It splits the path into its parts and adds/converts the corresponding type to the dxf file.
-        Bézier curves are approximated.
+        It splits the path into its parts and adds/converts the corresponding type to the dxf file, in the order of the
+        path. Contiguous lines and circular arcs are merged into one polyline (with bulges), consecutive Bézier curves
+        are approximated by splines at once and elliptic arcs are added as ellipses.
 
         :param msp: Modelspace of the dxf file, to add the entities.
         :return: -
         """
+        # contiguous lines and circular arcs, which are drawn as one polyline
+        segment_run = []
+        # consecutive Bézier curves, which are rendered (continuous curves as one spline) or flattened at once
+        bezier_run = []
 
         # iterate over path segments and add it to the model space
         for segment in self.parsed_path:
-            if isinstance(segment, svgLine):
-                # add line for Line
-                msp.add_line(start=(segment.start.real, segment.start.imag),
-                             end=(segment.end.real, segment.end.imag))
-            elif isinstance(segment, CubicBezier):
-                # approximate (and add) cubic Bézier curve with polyline
-                approximate_cubic_bezier_curve(segment, msp)
-            elif isinstance(segment, QuadraticBezier):
-                # approximate (and add) quadratic Bézier curve with polyline
-                approximate_quadratic_bezier_curve(segment, msp)
-            elif isinstance(segment, Arc):
-                # add arc segment --> via arc or via ellipse
-
-                # determine if elliptic or circular arc
-                if segment.radius.real == segment.radius.imag:  # if radius_x = radius_y --> elliptic arc
-                    # extract values from segment
-                    center = (segment.center.real, segment.center.imag)
-                    start_point = (segment.start.real, segment.start.imag)
-                    end_point = (segment.end.real, segment.end.imag)
-                    radius = segment.radius.real
-                    sweep = segment.sweep
-
-                    # add the arc to the modelspace
-                    draw_circular_arc(center, start_point, end_point, radius, sweep, msp)
-                else:  # radius_x != radius_y --> elliptic arc
-                    # extract values form segment
-                    center = (segment.center.real, segment.center.imag)
-                    rx = segment.radius.real
-                    ry = segment.radius.imag
-                    # add to model space
-                    draw_rotated_elliptic_arc(center, rx, ry, segment.theta, segment.delta,
-                                              segment.rotation, segment.sweep, msp)
-
+            if isinstance(segment, (CubicBezier, QuadraticBezier)):
+                # collect the Bézier curve, it is approximated with the following curves of the path
+                draw_segment_run(segment_run, msp)
+                segment_run = []
+                bezier_run.append(segment)
+                continue
+
+            # the Bézier curves before the segment are drawn first
+            self.draw_bezier_run(bezier_run, msp)
+            bezier_run = []
+            if isinstance(segment, svgLine) or (isinstance(segment, Arc) and is_circular_arc(segment)):
+                if segment_run and segment_run[-1].end != segment.start:
+                    # a new sub path starts
+                    draw_segment_run(segment_run, msp)
+                    segment_run = []
+                segment_run.append(segment)
+                continue
+
+            draw_segment_run(segment_run, msp)
+            segment_run = []
+            if isinstance(segment, Arc):
+                # radius_x != radius_y --> elliptic arc
+                # extract values form segment
+                center = (segment.center.real, segment.center.imag)
+                rx = segment.radius.real
+                ry = segment.radius.imag
+                # add to model space
+                draw_rotated_elliptic_arc(center, rx, ry, segment.theta, segment.delta,
+                                          segment.rotation, segment.sweep, msp)
             else:
                 # unsupported segment type
                 path_logger.warning("unsupported path segment: {}".format(segment))
 
+        draw_segment_run(segment_run, msp)
+        self.draw_bezier_run(bezier_run, msp)
 
-def approximate_cubic_bezier_curve(segment, msp):
-    """
-    Approximates a cubic Bézier curve and adds it to the modelspace of the dxf file.
+    def draw_bezier_run(self, segments, msp):
+        """
+        Draws consecutive Bézier curves, as splines (curves with G1 continuity are joined into one spline) or flattened
+        into polylines, if the path has a flatten tolerance.
 
-    :param segment: path segment, describing the Bézier curve with two control points, start and endpoint.
-    :param msp: modelspace, where the curve is added, i.e. the approximation of the curve
-    :return: -
+        :param segments: list of CubicBezier and QuadraticBezier segments, which follow each other in the path
+        :param msp: modelspace of the dxf file, where the curves are added
+        :return: -
+        """
+        if not segments:
+            return
+        if self.flatten_tolerance is None:
+            bezier_path = None
+            for segment in segments:
+                bezier_path = add_bezier_curve(bezier_path, segment)
+            render_splines_and_polylines(msp, [bezier_path], g1_tol=self.G1_TOL)
+            return
+        for vertices in flatten_bezier_curves(segments, self.flatten_tolerance, self.MIN_SEGMENTS):
+            # a closed polyline is given without its closing vertex (see draw_segment_run)
+            closed = len(vertices) > 2 and np.array_equal(vertices[0], vertices[-1])
+            msp.add_lwpolyline(vertices[:-1] if closed else vertices, format='xy', close=closed)
+
+
+def is_circular_arc(segment):
     """
+    Checks, if an arc segment is circular (radius_x = radius_y).
 
-    # create a new path, move it to start point of cubic Bézier curve
-    dxf_path = from_vertices([(0, 0)])
-    dxf_path.move_to((segment.start.real, segment.start.imag))
+    :param segment: Arc, path segment
+    :return: True if the arc is circular
+    """
+    return segment.radius.real == segment.radius.imag
 
-    # convert the Bézier curve to spline
-    dxf_path.curve4_to((segment.end.real, segment.end.imag),
-                       (segment.control1.real, segment.control1.imag),
-                       (segment.control2.real, segment.control2.imag))
 
-    # add the spline to the model space
-    render_splines_and_polylines(msp, [dxf_path])
+def draw_segment_run(segments, msp):
+    """
+    Draws contiguous lines and circular arcs. A single segment is added as line or arc, several segments are added as
+    one polyline, where the arcs are given by the bulge of their start vertex. If the run ends at its start point,
+    the polyline is closed.
 
+    :param segments: list of Line and circular Arc segments, each one starts at the end of the previous one
+    :param msp: modelspace of the dxf file, where the segments are added
+    :return: -
+    """
+    if not segments:
+        return
+    if len(segments) == 1:
+        segment = segments[0]
+        if isinstance(segment, svgLine):
+            # add line for Line
+            msp.add_line(start=(segment.start.real, segment.start.imag),
+                         end=(segment.end.real, segment.end.imag))
+        else:
+            # add the arc to the modelspace
+            draw_circular_arc((segment.center.real, segment.center.imag), (segment.start.real, segment.start.imag),
+                              (segment.end.real, segment.end.imag), segment.radius.real, segment.sweep, msp)
+        return
+
+    vertices = [(segment.start.real, segment.start.imag, arc_bulge(segment) if isinstance(segment, Arc) else 0)
+                for segment in segments]
+    closed = segments[-1].end == segments[0].start
+    if not closed:
+        vertices.append((segments[-1].end.real, segments[-1].end.imag, 0))
+    msp.add_lwpolyline(vertices, format='xyb', close=closed)
+
+
+def arc_bulge(segment):
+    """
+    Calculates the bulge of a circular arc, the tangent of a quarter of its included angle. The bulge is positive,
+    if the arc goes counterclockwise (in cartesian coordinates, i.e. not sweep) and negative if it goes clockwise.
 
-def approximate_quadratic_bezier_curve(segment, msp):
+    :param segment: circular Arc, already in cartesian coordinates
+    :return: float, bulge of the arc
     """
-    Approximates a quadratic Bézier curve and adds it to the modelspace of the dxf file.
+    bulge = math.tan(math.radians(abs(segment.delta)) / 4)
+    return -bulge if segment.sweep else bulge
 
-    :param segment: path segment, describing the Bézier curve with one control points, start and endpoint.
-    :param msp: modelspace, where the curve is added, i.e. the approximation of the curve
-    :return: -
+
+def add_bezier_curve(dxf_path, segment):
     """
+    Adds a cubic or quadratic Bézier curve to a path of ezdxf. If the curve does not start at the end of the path, a
+    new sub path is started.
 
-    # create a new path, move it to start point of quadratic Bézier curve
-    dxf_path = from_vertices([(0, 0)])
-    dxf_path.move_to((segment.start.real, segment.start.imag))
+    :param dxf_path: ezdxf path, where the curve is added (None creates a new path)
+    :param segment: path segment, describing the Bézier curve with one or two control points, start and endpoint.
+    :return: ezdxf path, with the curve added
+    """
+    start = (segment.start.real, segment.start.imag)
+    if dxf_path is None:
+        # create a new path, starting at the start point of the Bézier curve
+        dxf_path = dxfPath(start)
+    elif not dxf_path.end.isclose(start):
+        dxf_path.move_to(start)
 
     # convert the Bézier curve to spline
-    dxf_path.curve3_to((segment.end.real, segment.end.imag),
-                       (segment.control.real, segment.control.imag))
+    if isinstance(segment, CubicBezier):
+        dxf_path.curve4_to((segment.end.real, segment.end.imag),
+                           (segment.control1.real, segment.control1.imag),
+                           (segment.control2.real, segment.control2.imag))
+    else:
+        dxf_path.curve3_to((segment.end.real, segment.end.imag),
+                           (segment.control.real, segment.control.imag))
+    return dxf_path
+
 
-    # add the spline to the model space
-    render_splines_and_polylines(msp, [dxf_path])
+def flatten_bezier_curves(segments, tolerance, min_segments):
+    """
+    Flattens cubic and quadratic Bézier curves into polylines, all curves are computed at once (see
+    flatten_cubic_curves, quadratic curves are elevated to cubic curves). Contiguous curves are joined into one
+    polyline.
+
+    :param segments: list of CubicBezier and QuadraticBezier segments
+    :param tolerance: float, maximal distance of the polylines to the curves
+    :param min_segments: int, minimal number of lines a curve is split into
+    :return: list of arrays, with the vertices (x, y) of every polyline
+    """
+    control_points = np.empty((len(segments), 4), dtype=complex)
+    for index, segment in enumerate(segments):
+        if isinstance(segment, CubicBezier):
+            control_points[index] = segment.bpoints()
+        else:
+            start, control, end = segment.bpoints()
+            control_points[index] = (start, start + 2 / 3 * (control - start), end + 2 / 3 * (control - end), end)
+    counts, vertices = flatten_cubic_curves(np.stack((control_points.real, control_points.imag), axis=2), tolerance,
+                                            min_segments)
+
+    # split into polylines, where a curve does not start at the end of the previous one
+    breaks = np.flatnonzero(control_points[1:, 0] != control_points[:-1, 3]) + 1
+    firsts = np.append(0, breaks)
+    polylines = np.split(vertices, np.cumsum(counts)[breaks - 1])
+    return [np.concatenate(([(start.real, start.imag)], polyline))
+            for polyline, start in zip(polylines, control_points[firsts, 0])]
 
 
 def draw_circular_arc(center, start_point, end_point, radius, sweep, msp):
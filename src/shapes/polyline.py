@@ -3,7 +3,7 @@ class Polyline:
     Represents a Polyline with several points in a point list.
 
     Attributes
-        points_list:    a list of tuples (x,y) with points
+        points_list:    (N, 2) array with the points (x,y)
     """
 
     def __init__(self, svg_polyline):
@@ -1,70 +1,251 @@
 import xml.etree.ElementTree as ElementTree
 from xml.etree.ElementTree import ParseError
 from src.svg_shapes import *
+from src.svg_shapes.transform_matrix import scaling_matrix, transform_message_matrix
 
 svg_logger = setup_logger(__name__)
 
-def read_svg_file(name):
+# container elements, whose transformation is inherited by their children
+GROUP_TAGS = ('{http://www.w3.org/2000/svg}g', '{http://www.w3.org/2000/svg}a')
+# elements, whose content is not drawn directly, but only where it is referenced by a <use>
+DEFINITION_TAGS = ('{http://www.w3.org/2000/svg}defs', '{http://www.w3.org/2000/svg}symbol')
+USE_TAG = '{http://www.w3.org/2000/svg}use'
+
+
+def read_svg_file(name, scale_x=1, scale_y=1):
     """
     Reads in the svg file under the path given by "name".
     Parses into an iterable, containing all svg elements in the file.
     This is done with xml.etree.ElementTree package.
 
     :param name: Path of the svg file, we want to convert.
+    :param scale_x: float, scaling factor in x direction, folded into the transformation of every figure (default 1)
+    :param scale_y: float, scaling factor in y direction, folded into the transformation of every figure (default 1)
     :return: root, iterable with all svg entities in the file
     """
-    # Path to your SVG file
-    file_path = name
-
     # Parse the SVG file
     try:
-        tree = ElementTree.parse(file_path)
-        root = tree.getroot()
-
-        svg_figures = []
-
-        header = SvgHeader(root)
-        svg_height = header.get_header_height()
-        svg_figures.append(header)
-
-        # iterate through svg content
-        for element in root.iter():
-            match element.tag:
-                # case '{http://www.w3.org/2000/svg}svg':
-                #    header = SvgHeader(element)
-                #    svg_height = header.get_header_height()
-                #    svg_figures.append(header)
-                case '{http://www.w3.org/2000/svg}circle':
-                    circle = SvgCircle(element, svg_height)
-                    if circle.radius_y == 0:
-                        svg_figures.append(circle)
-                    else:  # circle.radius_y != 0:
-                        element = {'cx': circle.center_x, 'cy': (-1) * circle.center_y, 'rx': circle.radius,
-                            'ry': circle.radius_y}
-                        ellipse = SvgEllipse(element, 0)
-                        svg_figures.append(ellipse)
-                case '{http://www.w3.org/2000/svg}ellipse':
-                    svg_figures.append(SvgEllipse(element, svg_height))
-                case '{http://www.w3.org/2000/svg}rect':
-                    svg_figures.append(SvgRectangle(element, svg_height))
-                case '{http://www.w3.org/2000/svg}line':
-                    svg_figures.append(SvgLine(element, svg_height))
-                case '{http://www.w3.org/2000/svg}polygon':
-                    svg_figures.append(SvgPolygon(element, svg_height))
-                case '{http://www.w3.org/2000/svg}polyline':
-                    svg_figures.append(SvgPolyline(element, svg_height))
-                case '{http://www.w3.org/2000/svg}path':
-                    svg_figures.append(SvgPath(element, svg_height))
-                case _:
-                    svg_logger.info(f"svg_element without matching figure tag: {element.tag}: {element.attrib}")
-
-        return svg_figures
+        return list(iter_svg_file(name, scale_x, scale_y))
     except ParseError as parseErr:
         svg_logger.exception(parseErr)
     except FileNotFoundError as pathErr:
         raise FileNotFoundError(pathErr)
 
 
+def iter_svg_file(name, scale_x=1, scale_y=1):
+    """
+    Reads in the svg file under the path given by "name" in streaming mode.
+    The file is parsed with ElementTree.iterparse, every figure is yielded as soon as its element is closed
+    and the processed element is removed from the tree afterwards. Thus, the memory stays bounded, no matter how
+    big the file is. The header is always yielded first.
+    A scaling of the file is folded into the transformation of every figure, thus every figure is only transformed
+    once. This is not the same as scale_file_param afterwards: the folded scaling is an affine transformation, which
+    derives the radii and centers of arcs from the transformed arc, while scale_file_param scales the radii and
+    centers of arcs directly, thus arcs differ for a non-uniform scaling.
+    The transformations of groups (<g>) are inherited by their children: the matrix of every group is composed with
+    the matrix of its parent once at its start, the figures receive the precomposed matrix of their parent.
+    The content of <defs> and <symbol> is kept (by id) instead of being drawn. Every <use> of it is yielded as SvgUse,
+    which is written as insert of a dxf block, the figures of the block are created once per definition.
+    A <use> has to follow the definition it references.
+
+    :param name: Path of the svg file, we want to convert.
+    :param scale_x: float, scaling factor in x direction (default 1)
+    :param scale_y: float, scaling factor in y direction (default 1)
+    :return: generator, yielding the SvgHeader and all svg figures of the file
+    """
+    parent_matrix = None
+    if scale_x != 1 or scale_y != 1:
+        parent_matrix = scaling_matrix(scale_x, scale_y)
+
+    svg_height = None
+    # open elements, the last one is the parent of the element that is processed
+    parents = []
+    # matrices inherited by the children of the open elements (None if there is no transformation)
+    matrices = [parent_matrix]
+    # elements with id inside of <defs>/<symbol>, which can be referenced by a <use>
+    definitions = {}
+    # block names and figures (in block coordinates) of the definitions, which are already used
+    blocks = {}
+    # number of open <defs>/<symbol> elements, their content is not drawn
+    definition_depth = 0
+
+    for event, element in ElementTree.iterparse(name, events=('start', 'end')):
+        if event == 'start':
+            # the first element is the svg root, its attributes are already available at the start event
+            if svg_height is None:
+                header = SvgHeader(element)
+                if parent_matrix is not None:
+                    header.scale(scale_x, scale_y)
+                svg_height = header.get_header_height()
+                yield header
+            parents.append(element)
+            matrices.append(get_group_matrix(element, matrices[-1]))
+            if element.tag in DEFINITION_TAGS:
+                definition_depth += 1
+            continue
+
+        parents.pop()
+        matrices.pop()
+        if definition_depth:
+            # keep the definition with its children, until it is used
+            if element.get('id') is not None:
+                definitions[element.get('id')] = element
+            if element.tag in DEFINITION_TAGS:
+                definition_depth -= 1
+                if definition_depth == 0 and parents:
+                    # the definitions are referenced by the dictionary, they are only removed from the tree
+                    del parents[-1][-1]
+            continue
+
+        if element.tag == USE_TAG:
+            yield from create_svg_use(element, svg_height, matrices[-1], definitions, blocks)
+        else:
+            figure = create_svg_figure(element, svg_height, matrices[-1])
+            if figure is not None:
+                yield figure
+
+        # free the processed element, it is always the last child of its parent
+        element.clear()
+        if parents:
+            del parents[-1][-1]
+
+
+def get_group_matrix(element, parent_matrix):
+    """
+    Gets the matrix, which the children of an element inherit.
+    For a group with a transform message it is the matrix of the group composed with the matrix of its parent,
+    for all other elements the matrix of the parent.
+
+    :param element: svg element, with tag and attributes
+    :param parent_matrix: 3x3 matrix, inherited from the parent of the element (None if there is no transformation)
+    :return: 3x3 matrix or None, inherited by the children of the element
+    """
+    transform_message = element.get('transform')
+    if element.tag not in GROUP_TAGS or transform_message is None:
+        return parent_matrix
+    group_matrix = transform_message_matrix(transform_message)
+    if parent_matrix is None:
+        return group_matrix
+    return parent_matrix @ group_matrix
+
+
+def create_svg_use(element, svg_height, parent_matrix, definitions, blocks, used_references=()):
+    """
+    Creates the figures of a <use> element. If the transformation of the use can be expressed by a dxf insert, it is a
+    single SvgUse, whose block figures are created once per definition. Otherwise (the use skews the definition) the
+    figures of the definition are created at the position of the use.
+
+    :param element: svg use element, with tag and attributes
+    :param svg_height: float, height of svg file
+    :param parent_matrix: 3x3 matrix, transformation applied after the transform message of the element
+    :param definitions: dictionary, {id: element} with the definitions, which can be referenced
+    :param blocks: dictionary, {id: (block name, list of svg figures)} with the blocks of the definitions already
+                   used
+    :param used_references: tuple, ids of the uses the element is part of (to detect circular references)
+    :return: list, with the svg figures of the use (empty if the reference is not valid)
+    """
+    svg_use = SvgUse(element, svg_height, parent_matrix)
+    definition = definitions.get(svg_use.reference)
+    if definition is None:
+        svg_logger.warning(f"use of unknown definition: {svg_use.reference} - it has to be defined before its use")
+        return []
+    if svg_use.reference in used_references:
+        svg_logger.warning(f"circular use of definition: {svg_use.reference} - skipped")
+        return []
+    used_references = used_references + (svg_use.reference,)
+
+    if svg_use.has_skew():
+        # a dxf insert can not skew its block, thus the definition is drawn at the position of the use
+        return list(iter_definition_figures(definition, svg_height, svg_use.svg_matrix, definitions, blocks,
+                                            used_references))
+
+    if svg_use.reference not in blocks:
+        block_figures = list(iter_definition_figures(definition, 0, None, definitions, blocks, used_references))
+        blocks[svg_use.reference] = (unique_block_name(svg_use.block_name, blocks), block_figures)
+    svg_use.block_name, svg_use.block_figures = blocks[svg_use.reference]
+    return [svg_use]
+
+
+def unique_block_name(block_name, blocks):
+    """
+    Makes the name of a block unique: different ids can give the same block name, when their invalid characters are
+    replaced (e.g. 'a:1' and 'a;1'), and dxf block names are not case-sensitive. A name, which is already taken,
+    gets a counter.
+
+    :param block_name: string, name of the block (with valid characters)
+    :param blocks: dictionary, {id: (block name, list of svg figures)} with the blocks of the definitions already used
+    :return: string, unique name of the block
+    """
+    taken = {name.upper() for name, _ in blocks.values()}
+    unique_name, counter = block_name, 1
+    while unique_name.upper() in taken:
+        counter += 1
+        unique_name = f"{block_name}_{counter}"
+    return unique_name
+
+
+def iter_definition_figures(element, svg_height, parent_matrix, definitions, blocks, used_references=()):
+    """
+    Creates the figures of a definition (and all of its children), as it is referenced by a <use>.
+    A referenced <symbol> is drawn like a group, nested <defs> and <symbol> elements are not drawn.
+
+    :param element: svg element of the definition, with its children
+    :param svg_height: float, height of svg file (0 for the coordinates of a block)
+    :param parent_matrix: 3x3 matrix, transformation of the use (None if there is no transformation)
+    :param definitions: dictionary, {id: element} with the definitions, which can be referenced
+    :param blocks: dictionary, {id: (block name, list of svg figures)} with the blocks of the definitions already
+                   used
+    :param used_references: tuple, ids of the uses the element is part of (to detect circular references)
+    :return: generator, yielding the svg figures
+    """
+    if element.tag == USE_TAG:
+        yield from create_svg_use(element, svg_height, parent_matrix, definitions, blocks, used_references)
+    elif element.tag in GROUP_TAGS or element.tag in DEFINITION_TAGS:
+        matrix = get_group_matrix(element, parent_matrix)
+        for child in element:
+            if child.tag not in DEFINITION_TAGS:
+                yield from iter_definition_figures(child, svg_height, matrix, definitions, blocks, used_references)
+    else:
+        figure = create_svg_figure(element, svg_height, parent_matrix)
+        if figure is not None:
+            yield figure
+
+
+def create_svg_figure(element, svg_height, parent_matrix=None):
+    """
+    Creates the svg figure of a single svg element.
+
+    :param element: svg element, with tag and attributes
+    :param svg_height: float, height of svg file
+    :param parent_matrix: 3x3 matrix, transformation applied after the transform message of the element (default None)
+    :return: svg figure, or None if the element is no supported figure
+    """
+    match element.tag:
+        case '{http://www.w3.org/2000/svg}circle':
+            circle = SvgCircle(element, svg_height, parent_matrix)
+            if circle.radius_y == 0:
+                return circle
+            # circle.radius_y != 0, the circle was transformed into an ellipse
+            element = {'cx': circle.center_x, 'cy': (-1) * circle.center_y, 'rx': circle.radius,
+                'ry': circle.radius_y}
+            return SvgEllipse(element, 0)
+        case '{http://www.w3.org/2000/svg}ellipse':
+            return SvgEllipse(element, svg_height, parent_matrix)
+        case '{http://www.w3.org/2000/svg}rect':
+            return SvgRectangle(element, svg_height, parent_matrix)
+        case '{http://www.w3.org/2000/svg}line':
+            return SvgLine(element, svg_height, parent_matrix)
+        case '{http://www.w3.org/2000/svg}polygon':
+            return SvgPolygon(element, svg_height, parent_matrix)
+        case '{http://www.w3.org/2000/svg}polyline':
+            return SvgPolyline(element, svg_height, parent_matrix)
+        case '{http://www.w3.org/2000/svg}path':
+            return SvgPath(element, svg_height, parent_matrix)
+        case _:
+            svg_logger.info(f"svg_element without matching figure tag: {element.tag}: {element.attrib}")
+            return None
+
+
 def get_svg_height(root):
     """
     Gets the height of the svg file, specified in the header.
@@ -168,8 +349,7 @@ def scale_file(svg_figures, new_width, new_height):
     svg_figures[0].set_header_height(new_height)
 
     # iterate through svg content
-    for figure in svg_figures:
-        figure.scale(scale_x, scale_y)
+    scale_figures(svg_figures, scale_x, scale_y)
 
     return svg_figures
 
@@ -186,7 +366,38 @@ def scale_file_param(svg_figures, scale_x, scale_y):
     # here no error handling, as we have no (possible) division by zero
 
     # set new width and height
-    for figures in svg_figures:
-        figures.scale(scale_x, scale_y)
+    scale_figures(svg_figures, scale_x, scale_y)
 
     return svg_figures
+
+
+def scale_figures(svg_figures, scale_x, scale_y):
+    """
+    Scales all figures, the paths are scaled together in one step.
+
+    :param svg_figures: list with svg figures
+    :param scale_x: scaling factor in x direction
+    :param scale_y: scaling factor in y direction
+    :return: -
+    """
+    svg_paths = []
+    for figure in svg_figures:
+        if figure.get_name() == 'path':
+            svg_paths.append(figure)
+        else:
+            figure.scale(scale_x, scale_y)
+    scale_svg_paths(svg_paths, scale_x, scale_y)
+
+
+def iter_scale_file_param(svg_figures, scale_x, scale_y):
+    """
+    Scales the figures of a svg file while they are consumed, e.g. the figures streamed by iter_svg_file.
+
+    :param svg_figures: iterable with svg figures
+    :param scale_x: integer scaling factor in x direction
+    :param scale_y: integer scaling factor in y direction
+    :return: generator, yielding the scaled svg figures
+    """
+    for figure in svg_figures:
+        figure.scale(scale_x, scale_y)
+        yield figure
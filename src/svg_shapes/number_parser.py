@@ -0,0 +1,57 @@
+import warnings
+
+import numpy as np
+
+from src.logging_config import setup_logger
+from src.utilities import NUMBER_PATTERN
+
+number_parser_logger = setup_logger(__name__)
+
+
+def parse_numbers(number_string):
+    """
+    Parses a list of numbers of a svg attribute (e.g. points) into a float64 array.
+    Numbers can be separated by whitespace and/or comma, or not at all if the svg grammar allows it
+    (compact syntax like "1-2" or "0.5.5" = 0.5, 0.5).
+    The numbers are parsed by NumPy directly into the array, without creating a python float for every number.
+
+    :param number_string: string, with the numbers
+    :return: 1d float64 array, with all numbers
+    """
+    number_string = number_string.replace(',', ' ')
+    # NumPy does not recognize a blank string as empty
+    if not number_string or number_string.isspace():
+        return np.empty(0, dtype=np.float64)
+
+    # numbers separated by whitespace - NumPy parses them in one go
+    with warnings.catch_warnings():
+        # NumPy only warns if a part of the string could not be parsed
+        warnings.simplefilter('error', DeprecationWarning)
+        try:
+            return np.fromstring(number_string, dtype=np.float64, sep=' ')
+        except (DeprecationWarning, ValueError):
+            pass
+
+    # compact syntax (or unexpected content): separate the single numbers first
+    numbers = NUMBER_PATTERN.findall(number_string)
+    if NUMBER_PATTERN.sub('', number_string).strip():
+        number_parser_logger.warning(f"unexpected content in number list: {number_string[:50]}")
+    if not numbers:
+        return np.empty(0, dtype=np.float64)
+    return np.fromstring(' '.join(numbers), dtype=np.float64, sep=' ')
+
+
+def parse_points(points_string):
+    """
+    Parses the points attribute of a svg polygon/polyline into a (N, 2) array.
+    Supports all forms of the svg grammar, e.g. "x,y x,y", "x y x y", "x,y,x,y" or "1e-3-2".
+
+    :param points_string: string, points attribute of the svg element
+    :return: (N, 2) float64 array, with the points
+    """
+    numbers = parse_numbers(points_string)
+    if len(numbers) % 2 != 0:
+        # odd number of coordinates - the last one is dropped (as svg renderers do)
+        number_parser_logger.warning(f"odd number of coordinates in points: {len(numbers)}, last one dropped")
+        numbers = numbers[:-1]
+    return numbers.reshape(-1, 2)
@@ -0,0 +1,504 @@
+import re
+
+import numpy as np
+from svgpathtools import Path, Line, QuadraticBezier, CubicBezier, Arc
+
+from src.logging_config import setup_logger
+from src.utilities import NUMBER_PATTERN
+
+path_data_logger = setup_logger(__name__)
+
+# segment kinds
+LINE = 0
+QUADRATIC_BEZIER = 1
+CUBIC_BEZIER = 2
+ARC = 3
+
+# number of arguments of every command
+ARGUMENT_COUNTS = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7, 'Z': 0}
+
+# separators between numbers
+SEPARATORS = ' \t\r\n,'
+
+# array attributes of PathData, one entry per segment
+SEGMENT_ARRAYS = ('kinds', 'points', 'radii', 'rotation', 'large_arc', 'sweep', 'theta', 'delta')
+
+COMMAND_PATTERN = re.compile(r"([MmZzLlHhVvCcSsQqTtAa])")
+# one arc argument group, the flags are single digits and need no separator, e.g. "25 25 0 01-50 0"
+ARC_ARGUMENTS_PATTERN = re.compile(
+    r"[\s,]*({0})[\s,]*({0})[\s,]*({0})[\s,]*([01])[\s,]*([01])[\s,]*({0})[\s,]*({0})".format(NUMBER_PATTERN.pattern))
+
+
+class PathData:
+    """
+    Represents the segments of a svg path as arrays (struct of arrays) instead of one object per segment.
+    Every segment is stored with four points [start, control1, control2, end]:
+        line:             [start, start, end, end]
+        quadratic Bézier: [start, control, control, end]
+        cubic Bézier:     [start, control1, control2, end]
+        arc:              [start, center, center, end]
+
+    Attributes:
+        kinds: (N,) uint8 array, kind of every segment (LINE, QUADRATIC_BEZIER, CUBIC_BEZIER, ARC)
+        points: (N, 4, 2) float64 array, points of every segment
+        radii: (N, 2) float64 array, radii (rx, ry) of the arcs (zero for the other segments)
+        rotation: (N,) float64 array, rotation of the arcs in degree
+        large_arc: (N,) bool array, large arc flag of the arcs
+        sweep: (N,) bool array, sweep flag of the arcs
+        theta: (N,) float64 array, start angle of the arcs in degree (see svgpathtools Arc)
+        delta: (N,) float64 array, angular distance of the arcs in degree (see svgpathtools Arc)
+    """
+
+    def __init__(self, kinds, points, radii=None, rotation=None, large_arc=None, sweep=None, theta=None,
+                 delta=None):
+        """
+        Initializes the path data, missing arc parameters are set to zero.
+        :param kinds: array like, kind of every segment
+        :param points: array like, (N, 4, 2) points of every segment
+        :param radii: array like, (N, 2) radii of the arcs
+        :param rotation: array like, (N,) rotation of the arcs
+        :param large_arc: array like, (N,) large arc flag of the arcs
+        :param sweep: array like, (N,) sweep flag of the arcs
+        :param theta: array like, (N,) start angle of the arcs
+        :param delta: array like, (N,) angular distance of the arcs
+        """
+        self.kinds = np.asarray(kinds, dtype=np.uint8)
+        n = len(self.kinds)
+        self.points = np.asarray(points, dtype=np.float64).reshape(n, 4, 2)
+        self.radii = np.zeros((n, 2)) if radii is None else np.asarray(radii, dtype=np.float64).reshape(n, 2)
+        self.rotation = np.zeros(n) if rotation is None else np.asarray(rotation, dtype=np.float64)
+        self.large_arc = np.zeros(n, dtype=bool) if large_arc is None else np.asarray(large_arc, dtype=bool)
+        self.sweep = np.zeros(n, dtype=bool) if sweep is None else np.asarray(sweep, dtype=bool)
+        self.theta = np.zeros(n) if theta is None else np.asarray(theta, dtype=np.float64)
+        self.delta = np.zeros(n) if delta is None else np.asarray(delta, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def transform(self, matrix):
+        """
+        Transforms all segments of the path with a 3x3 matrix (in svg coordinates).
+        The arcs get the radii and rotation of the transformed ellipse and their center parameters are derived again,
+        with the same results as the transform of svgpathtools.
+        All arrays are changed in place.
+
+        :param matrix: 3x3 matrix
+        :return: -
+        """
+        linear = matrix[:2, :2]
+        self.points[...] = self.points @ linear.T + matrix[:2, 2]
+
+        index = np.flatnonzero(self.kinds == ARC)
+        # a translation moves the arcs (with their centers) without changing them
+        if len(index) == 0 or np.array_equal(linear, np.identity(2)):
+            return
+
+        # ellipse x^T Q x = 1 of every arc, transformed: D = T^-T Q T^-1 (the rotation of the arc is not part of Q,
+        # as in svgpathtools)
+        inverse = np.linalg.inv(linear)
+        q = 1 / self.radii[index] ** 2
+        d = np.einsum('ji,kj,jl->kil', inverse, q, inverse)
+        eigenvalues, eigenvectors = np.linalg.eig(d)
+        # d is symmetric, rounding errors can give complex results with a vanishing imaginary part
+        eigenvalues, eigenvectors = eigenvalues.real, eigenvectors.real
+        radii = 1 / np.sqrt(eigenvalues)
+        rotation = self.rotation[index] + np.degrees(np.arccos(eigenvectors[:, 0, 0]))
+        # a mirroring transformation changes the orientation of the arcs
+        sweep = self.sweep[index] if linear[0, 0] * linear[1, 1] >= 0 else ~self.sweep[index]
+
+        centers, radii, theta, delta = arc_center_parameters(self.points[index, 0], self.points[index, 3], radii,
+                                                             rotation, self.large_arc[index], sweep)
+        self.points[index, 1] = centers
+        self.points[index, 2] = centers
+        self.radii[index] = radii
+        self.rotation[index] = rotation
+        self.sweep[index] = sweep
+        self.theta[index] = theta
+        self.delta[index] = delta
+
+    def flip(self, svg_height):
+        """
+        Changes the coordinates of the path into cartesian coordinates (y-axis in svg is from top to down).
+        Note: the centers of the arcs are just moved like all the other points, radii, rotation and flags are kept
+        (the orientation of the arcs is handled when they are drawn).
+
+        :param svg_height: float, height of svg file
+        :return: -
+        """
+        self.points[..., 1] = svg_height - self.points[..., 1]
+
+    def scale(self, scale_x, scale_y):
+        """
+        Scales the path, the centers and radii of the arcs are just scaled as well.
+        :param scale_x: float, scaling parameter in x-direction
+        :param scale_y: float, scaling parameter in y-direction
+        :return: -
+        """
+        self.points *= (scale_x, scale_y)
+        self.radii *= (abs(scale_x), abs(scale_y))
+
+    def select(self, index):
+        """
+        Selects segments of the path, e.g. to remove segments.
+        :param index: index or bool mask of the segments, which are kept
+        :return: PathData, with the selected segments (copies of the arrays)
+        """
+        return PathData(*(getattr(self, name)[index] for name in SEGMENT_ARRAYS))
+
+    def d(self):
+        """
+        Serializes the path into a svg path string (same format as svgpathtools Path.d()).
+        :return: string, d attribute of a svg path
+        """
+        parts = []
+        current = None
+        points = self.points.tolist()
+        radii = self.radii.tolist()
+        for i, kind in enumerate(self.kinds.tolist()):
+            start, control1, control2, end = points[i]
+            # start a new subpath, if the segment does not start at the end of the previous one
+            if start != current:
+                parts.append('M {},{}'.format(*start))
+            if kind == LINE:
+                parts.append('L {},{}'.format(*end))
+            elif kind == QUADRATIC_BEZIER:
+                parts.append('Q {},{} {},{}'.format(*control1, *end))
+            elif kind == CUBIC_BEZIER:
+                parts.append('C {},{} {},{} {},{}'.format(*control1, *control2, *end))
+            else:
+                parts.append('A {},{} {} {:d},{:d} {},{}'.format(*radii[i], float(self.rotation[i]),
+                                                                int(self.large_arc[i]), int(self.sweep[i]), *end))
+            current = end
+        return ' '.join(parts)
+
+    def to_svgpathtools(self):
+        """
+        Converts the path data into a svgpathtools path (compatibility with code working on segment objects).
+        :return: svgpathtools Path
+        """
+        segments = []
+        points = (self.points[..., 0] + 1j * self.points[..., 1]).tolist()
+        for i, kind in enumerate(self.kinds.tolist()):
+            start, control1, control2, end = points[i]
+            if kind == LINE:
+                segments.append(Line(start, end))
+            elif kind == QUADRATIC_BEZIER:
+                segments.append(QuadraticBezier(start, control1, end))
+            elif kind == CUBIC_BEZIER:
+                segments.append(CubicBezier(start, control1, control2, end))
+            else:
+                radius = complex(*self.radii[i])
+                arc = Arc(start, radius, float(self.rotation[i]), bool(self.large_arc[i]), bool(self.sweep[i]), end)
+                # keep the stored parameters, they are already derived
+                arc.radius = radius
+                arc.center = control1
+                arc.theta = float(self.theta[i])
+                arc.delta = float(self.delta[i])
+                segments.append(arc)
+        return Path(*segments)
+
+
+def path_data_from_svgpathtools(path):
+    """
+    Converts a svgpathtools path into PathData.
+    :param path: svgpathtools Path
+    :return: PathData, with the segments of the path
+    """
+    path_data = PathData(np.zeros(len(path)), np.zeros((len(path), 4, 2)))
+    for i, segment in enumerate(path):
+        if isinstance(segment, Line):
+            points = [segment.start, segment.start, segment.end, segment.end]
+            path_data.kinds[i] = LINE
+        elif isinstance(segment, QuadraticBezier):
+            points = [segment.start, segment.control, segment.control, segment.end]
+            path_data.kinds[i] = QUADRATIC_BEZIER
+        elif isinstance(segment, CubicBezier):
+            points = [segment.start, segment.control1, segment.control2, segment.end]
+            path_data.kinds[i] = CUBIC_BEZIER
+        else:
+            points = [segment.start, segment.center, segment.center, segment.end]
+            path_data.kinds[i] = ARC
+            path_data.radii[i] = segment.radius.real, segment.radius.imag
+            path_data.rotation[i] = segment.rotation
+            path_data.large_arc[i] = segment.large_arc
+            path_data.sweep[i] = segment.sweep
+            path_data.theta[i] = segment.theta
+            path_data.delta[i] = segment.delta
+        path_data.points[i] = [(point.real, point.imag) for point in points]
+    return path_data
+
+
+def concatenate_path_data(path_data_list):
+    """
+    Joins the segments of several paths into one PathData.
+    The arrays of every path are replaced by views into the joined arrays, thus operations on the joined path data
+    (transform, flip, scale) change all paths at once.
+
+    :param path_data_list: list of PathData
+    :return: PathData, with the segments of all paths
+    """
+    joined = PathData(np.zeros(0), np.zeros((0, 4, 2)))
+    if not path_data_list:
+        return joined
+    for name in SEGMENT_ARRAYS:
+        setattr(joined, name, np.concatenate([getattr(path_data, name) for path_data in path_data_list]))
+
+    start = 0
+    for path_data in path_data_list:
+        segments = slice(start, start + len(path_data))
+        for name in SEGMENT_ARRAYS:
+            setattr(path_data, name, getattr(joined, name)[segments])
+        start = segments.stop
+    return joined
+
+
+def parse_path_data(path_string):
+    """
+    Parses the d attribute of a svg path into PathData.
+    Supports all commands of the svg path grammar (absolute and relative), including the compact syntax of numbers
+    and arc flags. The coordinates are collected in one flat list and converted into an array at the end, the centers
+    of all arcs are calculated in one vectorized step.
+
+    :param path_string: string, d attribute of a svg path
+    :return: PathData, with the segments of the path
+    :raises ValueError: if the path string is malformed
+    """
+    tokens = COMMAND_PATTERN.split(path_string)
+    if tokens[0].strip(SEPARATORS):
+        raise ValueError(f"path data has to start with a command: {path_string[:50]}")
+
+    kinds = []
+    coordinates = []  # 8 coordinates of every segment: start, control1, control2, end
+    arcs = []  # (segment index, rx, ry, rotation, large arc flag, sweep flag) of every arc
+    x = y = 0.0  # current point
+    start_x = start_y = 0.0  # start point of the current subpath
+    control_x = control_y = 0.0  # last control point (for the reflection of S and T)
+    previous_command = None
+
+    for i in range(1, len(tokens), 2):
+        command = tokens[i]
+        upper_command = command.upper()
+        relative = command != upper_command
+        arguments = _parse_arguments(tokens[i + 1], upper_command)
+        argument_count = ARGUMENT_COUNTS[upper_command]
+
+        if upper_command == 'Z':
+            if arguments:
+                raise ValueError(f"unexpected arguments after {command}: {tokens[i + 1][:50]}")
+            if x != start_x or y != start_y:
+                kinds.append(LINE)
+                coordinates.extend((x, y, x, y, start_x, start_y, start_x, start_y))
+            x, y = start_x, start_y
+            previous_command = upper_command
+            continue
+        if not arguments or len(arguments) % argument_count != 0:
+            raise ValueError(f"wrong number of arguments for {command}: {tokens[i + 1][:50]}")
+
+        if upper_command == 'M':
+            x, y = (x + arguments[0], y + arguments[1]) if relative else (arguments[0], arguments[1])
+            start_x, start_y = x, y
+            # additional pairs are implicit line to commands
+            for j in range(2, len(arguments), 2):
+                end_x, end_y = (x + arguments[j], y + arguments[j + 1]) if relative else \
+                    (arguments[j], arguments[j + 1])
+                kinds.append(LINE)
+                coordinates.extend((x, y, x, y, end_x, end_y, end_x, end_y))
+                x, y = end_x, end_y
+                upper_command = 'L'
+
+        elif upper_command == 'L':
+            for j in range(0, len(arguments), 2):
+                end_x, end_y = (x + arguments[j], y + arguments[j + 1]) if relative else \
+                    (arguments[j], arguments[j + 1])
+                kinds.append(LINE)
+                coordinates.extend((x, y, x, y, end_x, end_y, end_x, end_y))
+                x, y = end_x, end_y
+
+        elif upper_command == 'H' or upper_command == 'V':
+            for value in arguments:
+                if upper_command == 'H':
+                    end_x, end_y = (x + value if relative else value), y
+                else:
+                    end_x, end_y = x, (y + value if relative else value)
+                kinds.append(LINE)
+                coordinates.extend((x, y, x, y, end_x, end_y, end_x, end_y))
+                x, y = end_x, end_y
+
+        elif upper_command == 'C' or upper_command == 'S':
+            # relative coordinates are relative to the start of their segment
+            offset_x = offset_y = 0.0
+            for j in range(0, len(arguments), argument_count):
+                if relative:
+                    offset_x, offset_y = x, y
+                if upper_command == 'C':
+                    control1_x, control1_y = arguments[j] + offset_x, arguments[j + 1] + offset_y
+                    j += 2
+                elif previous_command == 'C' or previous_command == 'S':
+                    # reflection of the second control point of the previous segment
+                    control1_x, control1_y = 2 * x - control_x, 2 * y - control_y
+                else:
+                    control1_x, control1_y = x, y
+                control_x, control_y = arguments[j] + offset_x, arguments[j + 1] + offset_y
+                end_x, end_y = arguments[j + 2] + offset_x, arguments[j + 3] + offset_y
+                kinds.append(CUBIC_BEZIER)
+                coordinates.extend((x, y, control1_x, control1_y, control_x, control_y, end_x, end_y))
+                x, y = end_x, end_y
+                previous_command = upper_command
+
+        elif upper_command == 'Q' or upper_command == 'T':
+            # relative coordinates are relative to the start of their segment
+            offset_x = offset_y = 0.0
+            for j in range(0, len(arguments), argument_count):
+                if relative:
+                    offset_x, offset_y = x, y
+                if upper_command == 'Q':
+                    control_x, control_y = arguments[j] + offset_x, arguments[j + 1] + offset_y
+                    j += 2
+                elif previous_command == 'Q' or previous_command == 'T':
+                    # reflection of the control point of the previous segment
+                    control_x, control_y = 2 * x - control_x, 2 * y - control_y
+                else:
+                    control_x, control_y = x, y
+                end_x, end_y = arguments[j] + offset_x, arguments[j + 1] + offset_y
+                kinds.append(QUADRATIC_BEZIER)
+                coordinates.extend((x, y, control_x, control_y, control_x, control_y, end_x, end_y))
+                x, y = end_x, end_y
+                previous_command = upper_command
+
+        else:
+            for j in range(0, len(arguments), 7):
+                rx, ry, rotation, large_arc, sweep, end_x, end_y = arguments[j:j + 7]
+                if relative:
+                    end_x, end_y = x + end_x, y + end_y
+                if end_x == x and end_y == y:
+                    # identical end points - the arc is omitted (see svg implementation notes)
+                    continue
+                if rx == 0 or ry == 0:
+                    path_data_logger.warning(f"degenerate (zero radius) arc replaced with a line: {command}"
+                                             f"{arguments[j:j + 7]}")
+                    kinds.append(LINE)
+                    coordinates.extend((x, y, x, y, end_x, end_y, end_x, end_y))
+                else:
+                    arcs.append((len(kinds), abs(rx), abs(ry), rotation, large_arc, sweep))
+                    kinds.append(ARC)
+                    # the center is calculated at the end, for all arcs at once
+                    coordinates.extend((x, y, x, y, end_x, end_y, end_x, end_y))
+                x, y = end_x, end_y
+
+        previous_command = upper_command
+
+    path_data = PathData(kinds, np.array(coordinates, dtype=np.float64))
+    if arcs:
+        arcs = np.array(arcs, dtype=np.float64)
+        index = arcs[:, 0].astype(np.intp)
+        large_arc, sweep = arcs[:, 4] != 0, arcs[:, 5] != 0
+        centers, radii, theta, delta = arc_center_parameters(path_data.points[index, 0], path_data.points[index, 3],
+                                                             arcs[:, 1:3], arcs[:, 3], large_arc, sweep)
+        path_data.points[index, 1] = centers
+        path_data.points[index, 2] = centers
+        path_data.radii[index] = radii
+        path_data.rotation[index] = arcs[:, 3]
+        path_data.large_arc[index] = large_arc
+        path_data.sweep[index] = sweep
+        path_data.theta[index] = theta
+        path_data.delta[index] = delta
+    return path_data
+
+
+def _parse_arguments(argument_string, command):
+    """
+    Parses the arguments of a command into a list of floats.
+    :param argument_string: string, arguments of the command
+    :param command: string, upper case command
+    :return: list of floats
+    :raises ValueError: if the arguments contain anything else than numbers
+    """
+    if command == 'A':
+        return parse_arc_arguments(argument_string)
+    try:
+        # numbers separated by whitespace or comma
+        return list(map(float, argument_string.replace(',', ' ').split()))
+    except ValueError:
+        # compact syntax, e.g. "1-2" or "0.5.5"
+        if NUMBER_PATTERN.sub('', argument_string).strip(SEPARATORS):
+            raise ValueError(f"unexpected content in path data: {argument_string[:50]}")
+        return [float(number) for number in NUMBER_PATTERN.findall(argument_string)]
+
+
+def parse_arc_arguments(argument_string):
+    """
+    Parses the arguments of arc commands, where the flags do not need a separator (e.g. "25 25 0 01-50 0").
+    :param argument_string: string, arguments of one or more arc commands
+    :return: list of floats, 7 values for every arc
+    """
+    arguments = []
+    position = 0
+    for match in ARC_ARGUMENTS_PATTERN.finditer(argument_string):
+        if match.start() != position:
+            break
+        arguments.extend(match.groups())
+        position = match.end()
+    if argument_string[position:].strip(SEPARATORS):
+        raise ValueError(f"malformed arc arguments: {argument_string[:50]}")
+    return [float(argument) for argument in arguments]
+
+
+def arc_center_parameters(starts, ends, radii, rotation, large_arc, sweep):
+    """
+    Calculates center, radii, start angle and angular distance of arcs given in endpoint parameterization,
+    for all arcs in one step (see svg implementation notes, same results as svgpathtools Arc).
+    Radii, which are too small to connect start and end point, are scaled up.
+
+    :param starts: (N, 2) array, start points
+    :param ends: (N, 2) array, end points
+    :param radii: (N, 2) array, radii (rx, ry), positive
+    :param rotation: (N,) array, rotation of the arcs in degree
+    :param large_arc: (N,) bool array, large arc flags
+    :param sweep: (N,) bool array, sweep flags
+    :return: (centers, radii, theta, delta) - (N, 2) centers, (N, 2) scaled radii, (N,) start angles and (N,)
+             angular distances in degree
+    """
+    phi = np.radians(rotation)
+    cos_phi, sin_phi = np.cos(phi), np.sin(phi)
+    # move the midpoint between start and end to the origin and rotate the axes of the ellipse onto the x/y-axis
+    half_x = (starts[:, 0] - ends[:, 0]) / 2
+    half_y = (starts[:, 1] - ends[:, 1]) / 2
+    x1p = cos_phi * half_x + sin_phi * half_y
+    y1p = -sin_phi * half_x + cos_phi * half_y
+
+    # scale up radii, which are too small
+    rx, ry = radii[:, 0].copy(), radii[:, 1].copy()
+    radius_check = x1p ** 2 / rx ** 2 + y1p ** 2 / ry ** 2
+    too_small = radius_check > 1
+    rx[too_small] *= np.sqrt(radius_check[too_small])
+    ry[too_small] *= np.sqrt(radius_check[too_small])
+
+    # center in the rotated coordinates
+    tmp = rx ** 2 * y1p ** 2 + ry ** 2 * x1p ** 2
+    radicand = (rx ** 2 * ry ** 2 - tmp) / tmp
+    radical = np.where(np.isclose(radicand, 0), 0, np.sqrt(np.abs(radicand)))
+    radical = np.where(large_arc == sweep, -radical, radical)
+    cxp = radical * rx * y1p / ry
+    cyp = -radical * ry * x1p / rx
+
+    # center in the original coordinates
+    centers = np.empty_like(starts)
+    centers[:, 0] = cos_phi * cxp - sin_phi * cyp + (starts[:, 0] + ends[:, 0]) / 2
+    centers[:, 1] = sin_phi * cxp + cos_phi * cyp + (starts[:, 1] + ends[:, 1]) / 2
+
+    # start and end point on the unit circle
+    u1x = np.clip((x1p - cxp) / rx, -1, 1)
+    u1y = np.clip((y1p - cyp) / ry, -1, 1)
+    u2x = np.clip((-x1p - cxp) / rx, -1, 1)
+    u2y = np.clip((-y1p - cyp) / ry, -1, 1)
+
+    theta = np.degrees(np.arccos(u1x)) * np.sign(u1y)
+    theta = np.where((u1y == 0) & (u1x <= 0), 180, theta)
+
+    dot = u1x * u2x + u1y * u2y
+    det = u1x * u2y - u1y * u2x
+    delta = np.degrees(np.arccos(np.clip(dot, -1, 1))) * np.sign(det)
+    delta = np.where((det == 0) & (dot <= 0), 180, delta)
+    delta = np.where(~sweep & (delta >= 0), delta - 360, np.where(large_arc & (delta <= 0), delta + 360, delta))
+
+    return centers, np.column_stack((rx, ry)), theta, delta
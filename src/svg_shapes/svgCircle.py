@@ -1,7 +1,8 @@
 from src.logging_config import setup_logger
+from src.svg_shapes.transform_matrix import transform_message_matrix, svg_to_dxf_matrix, has_rotation, \
+    apply_matrix, round_point, axis_scales
 from src.svg_shapes.transform_messages import export_transformations
-from src.utilities import change_svg_to_dxf_coordinate, rotate_clockwise_around_point, \
-    translate_coordinate, scale_coordinate, matrix_transformation
+from src.utilities import scale_coordinate
 
 svg_circle_logger = setup_logger('svg_circle')
 
@@ -17,13 +18,16 @@ class SvgCircle:
         radius:   radius of the circle
         radius_y: y-coordinate of the radius, default = 0 (if radius == radius_y) but need if transform transforms the circle into an ellipse
         transformation_list: list with all transformation given in the svg figure with its values
+        transform_message: string, transform attribute of the svg element
     """
 
-    def __init__(self, segment, svg_height):
+    def __init__(self, segment, svg_height, parent_matrix=None):
         """
         Initialisation of SvgCircle. Transforms the svg command to a circle in the cartesian coordinates.
         :param segment: dictionary, svg segment
         :param svg_height: float, height of the svg file, for coordinate transformation
+        :param parent_matrix: 3x3 matrix, transformation applied after the transform message (e.g. scaling of the
+                              file), default None
         """
         self.name = 'circle'
 
@@ -34,15 +38,29 @@ class SvgCircle:
         # extract radius
         self.radius = float(segment.get('r'))
         self.radius_y = 0
+        # matrix, which transforms the center from svg into cartesian coordinates
+        matrix = svg_to_dxf_matrix(svg_height)
+        if parent_matrix is not None:
+            matrix = matrix @ parent_matrix
+        rotated = False
         # extract transformations
         transform_message = segment.get('transform')
         if transform_message is not None:
             self.transformation_list = export_transformations(transform_message)
-            # transform according to transformations given in svg
-            self.transform()
+            self.transform_message = transform_message
+            # fold the transformations given in svg into the matrix
+            matrix = matrix @ self.transform()
+            rotated = has_rotation(self.transformation_list)
 
-        # change to dxf coordinates
-        self.center_y = change_svg_to_dxf_coordinate(self.center_y, svg_height)
+        if parent_matrix is not None:
+            # the parent transformation scales the radius as well
+            scale_x, scale_y = axis_scales(parent_matrix)
+            self.radius = scale_coordinate(self.radius, scale_x)
+            self.radius_y = scale_coordinate(self.radius_y, scale_y)
+
+        # transform and change to dxf coordinates in one step
+        center = apply_matrix(matrix, self.center_x, self.center_y)
+        self.center_x, self.center_y = round_point(center) if rotated else center
 
     def get_name(self):
         """
@@ -66,58 +84,19 @@ class SvgCircle:
     def transform(self):
         """
         Transforms the figure according to the transform attribute of the svg string.
-        :return: -
+        The radius is scaled directly, the transformation of the center is returned as matrix.
+        :return: 3x3 matrix, transformation of the center
         """
-        # iterate over the transformations
+        # scale the radius, a scale with two values transforms the circle into an ellipse
         for t_type, values in self.transformation_list:
-            match t_type:
-                case 'translate':
-                    if len(values) == 1:  # only translation in x-direction
-                        self.center_x = translate_coordinate(self.center_x, values[0])
-                    elif len(values) == 2:  # translation in x- & y-direction
-                        self.center_x = translate_coordinate(self.center_x, values[0])
-                        self.center_y = translate_coordinate(self.center_y, values[1])
-                    else:
-                        svg_circle_logger.warning(f'unknown translate values - values length: {len(values)}')
-                case 'rotate':
-                    if len(values) == 3:  # rotate around given point
-                        self.center_x, center_y = rotate_clockwise_around_point(self.center_x, -self.center_y,
-                                                                                values[0], values[1], -values[2])
-                        self.center_y = center_y * (-1)
-                    elif len(values) == 1:  # rotate around origin
-                        self.center_x, center_y = rotate_clockwise_around_point(self.center_x, -self.center_y,
-                                                                                values[0], 0, 0)
-                        self.center_y = (-1) * center_y
-                    else:
-                        svg_circle_logger.warning(f"unknown rotation message, value length: {len(values)}")
-                case 'scale':
-                    if len(values) == 1:
-                        # only one scale value given, scale along x and y with same value
-                        self.center_x = scale_coordinate(self.center_x, values[0])
-                        self.center_y = scale_coordinate(self.center_y, values[0])
-                        self.radius = scale_coordinate(self.radius, values[0])
-                    elif len(values) == 2:
-                        # two scale values given - x- and y-scaling for according coordinate direction
-                        self.center_x = scale_coordinate(self.center_x, values[0])
-                        self.center_y = scale_coordinate(self.center_y, values[1])
-                        r = self.radius
-                        self.radius = scale_coordinate(self.radius, values[0])
-                        self.radius_y = scale_coordinate(r, values[1])
-                    else:
-                        svg_circle_logger.warning(f"unknown scale transformation, values len: {len(values)}")
-                case 'skewX':
-                    # not done, as it will shear the circle to ellipse
-                    svg_circle_logger.warning("skewX in circle - would give an ellipse, not handled")
-                case 'skewY':
-                    # not done, as it will shear the circle to ellipse
-                    svg_circle_logger.warning("skewY in circle - would give an ellipse, not handled")
-                case 'matrix':
-                    # matrix trafo without transforming the radius...
-                    if len(values) == 6:
-                        self.center_x, self.center_y = matrix_transformation(self.center_x, self.center_y, values)
-                    elif len(values) == 4:
-                        values.append(0)
-                        values.append(0)
-                        self.center_x, self.center_y = matrix_transformation(self.center_x, self.center_y, values)
-                    else:
-                        svg_circle_logger.warning(f"unknown matrix message, values length: {len(values)}")
+            if t_type == 'scale':
+                if len(values) == 1:
+                    self.radius = scale_coordinate(self.radius, values[0])
+                elif len(values) == 2:
+                    r = self.radius
+                    self.radius = scale_coordinate(self.radius, values[0])
+                    self.radius_y = scale_coordinate(r, values[1])
+
+        # skewX/skewY are not done, as they would shear the circle to an ellipse
+        # matrix transforms only the center, not the radius
+        return transform_message_matrix(self.transform_message, ('translate', 'rotate', 'scale', 'matrix'))
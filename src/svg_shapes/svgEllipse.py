@@ -1,7 +1,7 @@
 from src.logging_config import setup_logger
 from src.svg_shapes import export_transformations
-from src.utilities import change_svg_to_dxf_coordinate, rotate_clockwise_around_point, \
-    translate_coordinate, scale_coordinate
+from src.svg_shapes.transform_matrix import transform_message_matrix, svg_to_dxf_matrix, has_rotation, \
+    apply_matrix, apply_matrix_to_vector, round_point
 
 svg_ellipse_logger = setup_logger(__name__)
 
@@ -17,13 +17,16 @@ class SvgEllipse:
         radius_x: radius in x direction of the ellipse
         radius_y: radius in y direction of the ellipse
         transformation_list: list with all transformation given in the svg figure with its values  
+        transform_message: string, transform attribute of the svg element
     """
 
-    def __init__(self, element, svg_height):
+    def __init__(self, element, svg_height, parent_matrix=None):
         """
         Initializes the SvgEllipse. Already transforms the data and changes it to cartesian coordinates.
         :param element: dictionary, svg ellipse string
         :param svg_height: float, height of svg file
+        :param parent_matrix: 3x3 matrix, transformation applied after the transform message (e.g. scaling of the
+                              file), default None
         """
         self.name = 'ellipse'
         # extract center
@@ -33,14 +36,32 @@ class SvgEllipse:
         self.radius_x = (float(element.get('rx')), 0)
         self.radius_y = (0, float(element.get('ry')))
 
+        # matrix, which transforms the center from svg into cartesian coordinates
+        matrix = svg_to_dxf_matrix(svg_height)
+        if parent_matrix is not None:
+            matrix = matrix @ parent_matrix
+        # the radii are vectors in cartesian coordinates: rotations are mirrored, only the linear part is applied
+        radius_matrix = matrix @ svg_to_dxf_matrix(0)
+        rotated = False
+
         transform_message = element.get('transform')
         if transform_message is not None:
             self.transformation_list = export_transformations(transform_message)
-            # transform according to transform message in svg string
-            self.transform()
+            self.transform_message = transform_message
+            # fold the transformations given in svg string into the matrix
+            matrix = matrix @ self.transform()
+            radius_matrix = matrix @ svg_to_dxf_matrix(0)
+            rotated = has_rotation(self.transformation_list)
 
-        # change the coordinate to cartesian coordinates
-        self.center_y = change_svg_to_dxf_coordinate(self.center_y, svg_height)
+        # transform and change the coordinate to cartesian coordinates in one step
+        center = apply_matrix(matrix, self.center_x, self.center_y)
+        self.radius_x = apply_matrix_to_vector(radius_matrix, *self.radius_x)
+        self.radius_y = apply_matrix_to_vector(radius_matrix, *self.radius_y)
+        if rotated:
+            center = round_point(center)
+            self.radius_x = round_point(self.radius_x)
+            self.radius_y = round_point(self.radius_y)
+        self.center_x, self.center_y = center
 
     def get_name(self):
         """
@@ -66,66 +87,7 @@ class SvgEllipse:
     def transform(self):
         """
         Transform the ellipse according to the transform message given in the svg string.
-        :return: -
+        :return: 3x3 matrix, with all transformations
         """
-        for t_type, values in self.transformation_list:
-            match t_type:
-                case 'translate':
-                    if len(values) == 1:
-                        # only translation in x-direction
-                        self.center_x = translate_coordinate(self.center_x, values[0])
-                    elif len(values) == 2:
-                        # translation in x- and y-direction
-                        self.center_x = translate_coordinate(self.center_x, values[0])
-                        self.center_y = translate_coordinate(self.center_y, values[1])
-                    else:
-                        svg_ellipse_logger.warning(f"unknown translate entry in values, {len(values)}")
-                case 'rotate':
-                    if len(values) == 1:
-                        # rotate around origin (svg origin)
-                        self.center_x, center_y = rotate_clockwise_around_point(self.center_x, -self.center_y,
-                                                                                values[0], 0, 0)
-                        self.center_y = (-1) * center_y
-                        self.radius_x = rotate_clockwise_around_point(self.radius_x[0], self.radius_x[1],
-                                                                      values[0], 0, 0)
-                        self.radius_y = rotate_clockwise_around_point(self.radius_y[0], self.radius_y[1],
-                                                                      values[0], 0, 0)
-                    elif len(values) == 3:
-                        # rotate around given point (in svg coordinate system)
-                        self.center_x, center_y = rotate_clockwise_around_point(self.center_x, -self.center_y,
-                                                                                values[0], values[1], -values[2])
-                        self.center_y = (-1) * center_y
-                        self.radius_x = rotate_clockwise_around_point(self.radius_x[0], self.radius_x[1],
-                                                                      values[0], 0, 0)
-                        self.radius_y = rotate_clockwise_around_point(self.radius_y[0], self.radius_y[1],
-                                                                      values[0], 0, 0)
-                    else:
-                        svg_ellipse_logger.warning(f"unknown rotate entry in values, {len(values)}")
-                case 'scale':
-                    if len(values) == 1:
-                        # only one scale value given, scale x- & y-direction with same value
-                        self.center_x = scale_coordinate(self.center_x, values[0])
-                        self.center_y = scale_coordinate(self.center_y, values[0])
-                        self.radius_x = (scale_coordinate(self.radius_x[0], values[0]),
-                        scale_coordinate(self.radius_x[1], values[0]))
-                        self.radius_y = (scale_coordinate(self.radius_y[0], values[0]),
-                        scale_coordinate(self.radius_y[1], values[0]))
-                    elif len(values) == 2:
-                        # scale x according to first value, y according to second value
-                        self.center_x = scale_coordinate(self.center_x, values[0])
-                        self.center_y = scale_coordinate(self.center_y, values[1])
-                        self.radius_x = (scale_coordinate(self.radius_x[0], values[0]),
-                        scale_coordinate(self.radius_x[1], values[1]))
-                        self.radius_y = (scale_coordinate(self.radius_y[0], values[0]),
-                        scale_coordinate(self.radius_y[1], values[1]))
-                    else:
-                        svg_ellipse_logger.warning(f"unknown scale entry in values, {len(values)}")
-                case 'skewX':
-                    # not done, as it will no longer be an ellipse
-                    svg_ellipse_logger.warning(f'skewX not implemented for ellipse')
-                case 'skewY':
-                    # not done, as it will no longer be an ellipse
-                    svg_ellipse_logger.warning(f'skewY not implemented for ellipse')
-                case 'matrix':
-                    # not done, as it will no longer be an ellipse
-                    svg_ellipse_logger.warning(f'matrix not implemented for ellipse')
+        # skewX/skewY/matrix are not done, as it will no longer be an ellipse
+        return transform_message_matrix(self.transform_message, ('translate', 'rotate', 'scale'))
@@ -1,7 +1,7 @@
 from src.logging_config import setup_logger
+from src.svg_shapes.transform_matrix import transform_message_matrix, svg_to_dxf_matrix, has_rotation, \
+    apply_matrix, round_point
 from src.svg_shapes.transform_messages import export_transformations
-from src.utilities import translate_coordinate, rotate_clockwise_around_point, change_svg_to_dxf_coordinate, \
-    scale_coordinate, skew_x, skew_y, matrix_transformation
 
 svg_line_logger = setup_logger(__name__)
 
@@ -17,13 +17,16 @@ class SvgLine:
         x2: float, x-coordinate of end point
         y2: float, y-coordinate of end point
         transformation_list: list, with all transformations and its values
+        transform_message: string, transform attribute of the svg element
     """
 
-    def __init__(self, element, svg_height):
+    def __init__(self, element, svg_height, parent_matrix=None):
         """
         Initializes the svg line.
         :param element: dictionary, svg line element
         :param svg_height: float, height of svg file
+        :param parent_matrix: 3x3 matrix, transformation applied after the transform message (e.g. scaling of the
+                              file), default None
         """
         self.name = 'line'
         # extract the start/end point
@@ -31,16 +34,26 @@ class SvgLine:
         self.y1 = float(element.get('y1'))
         self.x2 = float(element.get('x2'))
         self.y2 = float(element.get('y2'))
+        # matrix, which transforms the points from svg into cartesian coordinates
+        matrix = svg_to_dxf_matrix(svg_height)
+        if parent_matrix is not None:
+            matrix = matrix @ parent_matrix
+        rotated = False
         # extract transformations
         transform_message = element.get('transform')
         if transform_message is not None:
             self.transformation_list = export_transformations(transform_message)
-            # transform according to transformations given in svg
-            self.transform()
+            self.transform_message = transform_message
+            # fold the transformations given in svg into the matrix
+            matrix = matrix @ self.transform()
+            rotated = has_rotation(self.transformation_list)
 
-        # change svg to cartesian coordinates
-        self.y1 = change_svg_to_dxf_coordinate(self.y1, svg_height)
-        self.y2 = change_svg_to_dxf_coordinate(self.y2, svg_height)
+        # transform and change svg to cartesian coordinates in one step
+        start = apply_matrix(matrix, self.x1, self.y1)
+        end = apply_matrix(matrix, self.x2, self.y2)
+        if rotated:
+            start, end = round_point(start), round_point(end)
+        (self.x1, self.y1), (self.x2, self.y2) = start, end
 
     def get_name(self):
         """
@@ -66,71 +79,6 @@ class SvgLine:
     def transform(self):
         """
         Transforms the line according to the transformations in svg string.
-        :return: -
+        :return: 3x3 matrix, with all transformations
         """
-        # iterate over the transformations
-        for t_type, values in self.transformation_list:
-            match t_type:
-                case 'translate':
-                    if len(values) == 1:  # only translation in x-direction
-                        self.x1 = translate_coordinate(self.x1, values[0])
-                        self.x2 = translate_coordinate(self.x2, values[0])
-                    elif len(values) == 2:  # translation in x- & y-direction
-                        self.x1 = translate_coordinate(self.x1, values[0])
-                        self.x2 = translate_coordinate(self.x2, values[0])
-                        self.y1 = translate_coordinate(self.y1, values[1])
-                        self.y2 = translate_coordinate(self.y2, values[1])
-                    else:
-                        svg_line_logger.warning(f'unknown translate values - values length: {len(values)}')
-                case 'rotate':
-                    if len(values) == 1:  # rotate around origin
-                        self.x1, y1 = rotate_clockwise_around_point(self.x1, -self.y1, values[0], 0, 0)
-                        self.y1 = (-1) * y1
-                        self.x2, y2 = rotate_clockwise_around_point(self.x2, -self.y2, values[0], 0, 0)
-                        self.y2 = (-1) * y2
-                    elif len(values) == 3:  # rotate around given point
-                        self.x1, y1 = rotate_clockwise_around_point(self.x1, -self.y1, values[0], values[1],
-                                                                    -values[2])
-                        self.y1 = (-1) * y1
-                        self.x2, y2 = rotate_clockwise_around_point(self.x2, -self.y2, values[0], values[1],
-                                                                    -values[2])
-                        self.y2 = (-1) * y2
-                    else:
-                        svg_line_logger.warning(f"unknown values length for rotate, length: {len(values)}")
-                case 'scale':
-                    if len(values) == 1:  # if only one value, scale x- and y-direction the same
-                        self.x1 = scale_coordinate(self.x1, values[0])
-                        self.x2 = scale_coordinate(self.x2, values[0])
-                        self.y1 = scale_coordinate(self.y1, values[0])
-                        self.y2 = scale_coordinate(self.y2, values[0])
-                    elif len(values) == 2:  # scale x- and y-coordinates to according values
-                        self.x1 = scale_coordinate(self.x1, values[0])
-                        self.x2 = scale_coordinate(self.x2, values[0])
-                        self.y1 = scale_coordinate(self.y1, values[1])
-                        self.y2 = scale_coordinate(self.y2, values[1])
-                    else:
-                        svg_line_logger.warning(f"unknown scale transformation, values len: {len(values)}")
-                case 'skewX':
-                    # skew in x-direction with tan(value[0])
-                    self.x1 = skew_x(self.x1, self.y1, values[0])
-                    self.x2 = skew_x(self.x2, self.y2, values[0])
-                case 'skewY':
-                    # skew in y-direction with tan(value[0])
-                    self.y1 = skew_y(self.x1, self.y1, values[0])
-                    self.y2 = skew_y(self.x2, self.y2, values[0])
-                case 'matrix':
-                    # if matrix has no translation - add zeros
-                    if len(values) == 4:
-                        values.append(0)
-                        values.append(0)
-
-                    # transform according to the matrix
-                    self.x1, self.y1 = matrix_transformation(self.x1, self.y1, values)
-                    self.x2, self.y2 = matrix_transformation(self.x2, self.y2, values)
-
-                    """new_x1 = values[0] * self.x1 + values[2] * self.y1 + values[4]
-                    new_y1 = values[1] * self.x1 + values[3] * self.y1 + values[5]
-                    self.x1, self.y1 = new_x1, new_y1
-                    new_x2 = values[0] * self.x2 + values[2] * self.y2 + values[4]
-                    new_y2 = values[1] * self.x2 + values[3] * self.y2 + values[5]
-                    self.x2, self.y2 = new_x2, new_y2"""
+        return transform_message_matrix(self.transform_message)
@@ -1,10 +1,9 @@
-from svgpathtools import parse_path, Line, CubicBezier, QuadraticBezier, Arc
-from svgpathtools.parser import parse_transform
-from svgpathtools.path import transform
+from svgpathtools import parse_path
 
 from src.logging_config import setup_logger
 from src.svg_shapes import export_transformations
-from src.utilities import change_svg_to_dxf_coordinate
+from src.svg_shapes.path_data import parse_path_data, path_data_from_svgpathtools, concatenate_path_data
+from src.svg_shapes.transform_matrix import path_transform_matrix
 
 svg_path_logger = setup_logger(__name__)
 
@@ -12,35 +11,84 @@ svg_path_logger = setup_logger(__name__)
 class SvgPath:
     """"
     Represents a svg path, transforms it according to the transform message of svg and changes the coordinates into cartesian system.
+    The segments are stored as arrays (PathData), thus the whole path is transformed, flipped and scaled at once.
 
     Attributes:
         name: string, 'path'
-        parsed_path: svgpathtools path, with all segments
+        path_data: PathData, with all segments
+        parsed_path: svgpathtools path, with all segments (created from path_data when it is used)
         transformation_list: list, with all transformations and its values
     """
 
-    def __init__(self, element, svg_height):
+    def __init__(self, element, svg_height, parent_matrix=None):
         """
         Initializes svg path.
         :param element: dictionary, svg path element
         :param svg_height: float, height of svg file
+        :param parent_matrix: 3x3 matrix, transformation applied after the transform message (e.g. scaling of the
+                              file), default None
         """
         self.name = 'path'
         # extract the path string / values and parse it
         path_string = element.get('d')
-        self.parsed_path = parse_path(path_string)
+        try:
+            self.path_data = parse_path_data(path_string)
+        except ValueError as e:
+            # fallback to the parser of svgpathtools
+            svg_path_logger.warning(f"path could not be parsed ({e}), svgpathtools is used")
+            self.path_data = path_data_from_svgpathtools(parse_path(path_string))
+
         # extract the transformations and apply it to the path
+        transform_mat = parent_matrix
         transform_message = element.get('transform')
         if transform_message is not None:
             self.transformation_list = export_transformations(transform_message)
-            # for every transformation get the transformation matrices
-            transform_mat = parse_transform(transform_message)
+            # for every transformation get the transformation matrices (cached by the transform message)
+            transform_mat = path_transform_matrix(transform_message)
+            if parent_matrix is not None:
+                transform_mat = parent_matrix @ transform_mat
+        if transform_mat is not None:
             # apply it to the path
-            self.parsed_path = transform(self.parsed_path, transform_mat)
+            self.path_data.transform(transform_mat)
 
         # change the coordinates to cartesian format (not svg)
         self.change_path_svg_to_dxf_coordinate(svg_height)
 
+    @property
+    def path_data(self):
+        """
+        The segments of the path as arrays.
+        :return: PathData
+        """
+        return self._path_data
+
+    @path_data.setter
+    def path_data(self, path_data):
+        """
+        Replaces the segments of the path, e.g. by a selection of them, the parsed path is created again.
+        :param path_data: PathData
+        :return: -
+        """
+        self._path_data = path_data
+        self._parsed_path = None
+
+    def invalidate_parsed_path(self):
+        """
+        Discards the parsed path after the path data was changed in place, it is created again when it is used.
+        :return: -
+        """
+        self._parsed_path = None
+
+    @property
+    def parsed_path(self):
+        """
+        The path as svgpathtools segments (for code working on segment objects), created once after every change.
+        :return: svgpathtools Path
+        """
+        if self._parsed_path is None:
+            self._parsed_path = self.path_data.to_svgpathtools()
+        return self._parsed_path
+
     def get_name(self):
         """
         Getter for name.
@@ -55,42 +103,9 @@ class SvgPath:
         :param scale_y: float, scaling parameter in y-direction
         :return: -
         """
-
-        def _scale(z):
-            """
-            Scale a complex number.
-            :param z: complex number, to be scaled
-            :return: complex number, scaled with scale_x, scale_y
-            """
-            return scale_x * z.real + 1j * scale_y * z.imag
-
         # Note: if we would do it via the matrix [[scale_x, 0, 0], [0, scale_y, 0], [0, 0, 1]] (which is the matrix transform of our step), the arc center would be adjusted to the actual coordinates, but we need the old center just scaled
-
-        # iterate over path segments
-        for segment in self.parsed_path:
-            if isinstance(segment, Line):
-                # scale start and end point of line
-                segment.start = _scale(segment.start)
-                segment.end = _scale(segment.end)
-            elif isinstance(segment, QuadraticBezier):
-                # scale start, end and control point of quadratic Bézier curve
-                segment.start = _scale(segment.start)
-                segment.end = _scale(segment.end)
-                segment.control = _scale(segment.control)
-            elif isinstance(segment, CubicBezier):
-                # scale start, end and both control points of quadratic Bézier curve
-                segment.start = _scale(segment.start)
-                segment.end = _scale(segment.end)
-                segment.control1 = _scale(segment.control1)
-                segment.control2 = _scale(segment.control2)
-            elif isinstance(segment, Arc):
-                # scales arc components (start point, end point, center, radii)
-                segment.start = _scale(segment.start)
-                segment.end = _scale(segment.end)
-                segment.center = _scale(segment.center)
-                segment.radius = _scale(segment.radius)
-            else:
-                svg_path_logger.warning("unsupported path segment: {}".format(segment))
+        self.path_data.scale(scale_x, scale_y)
+        self.invalidate_parsed_path()
 
     def change_path_svg_to_dxf_coordinate(self, svg_height):
         """
@@ -99,38 +114,18 @@ class SvgPath:
         :return: -
         """
         # Note: if we would do it via the matrix [[1, 0, 0], [0, -1, height], [0, 0, 1]] (which is the matrix transform of our step), the arc center would be adjusted to the actual coordinates, but we need the old center just translated
+        self.path_data.flip(svg_height)
+        self.invalidate_parsed_path()
+
 
-        # iterate over path segments
-        for segment in self.parsed_path:
-            if isinstance(segment, Line):
-                # change start and end point of line
-                segment.start = complex(segment.start.real,
-                                        change_svg_to_dxf_coordinate(segment.start.imag, svg_height))
-                segment.end = complex(segment.end.real, change_svg_to_dxf_coordinate(segment.end.imag, svg_height))
-            elif isinstance(segment, QuadraticBezier):
-                # change start, end and control point of quadratic Bézier curve
-                segment.start = complex(segment.start.real,
-                                        change_svg_to_dxf_coordinate(segment.start.imag, svg_height))
-                segment.end = complex(segment.end.real, change_svg_to_dxf_coordinate(segment.end.imag, svg_height))
-                segment.control = complex(segment.control.real,
-                                          change_svg_to_dxf_coordinate(segment.control.imag, svg_height))
-            elif isinstance(segment, CubicBezier):
-                # change start, end and both control points of cubic Bézier curve
-                segment.start = complex(segment.start.real,
-                                        change_svg_to_dxf_coordinate(segment.start.imag, svg_height))
-                segment.end = complex(segment.end.real, change_svg_to_dxf_coordinate(segment.end.imag, svg_height))
-                segment.control1 = complex(segment.control1.real,
-                                           change_svg_to_dxf_coordinate(segment.control1.imag, svg_height))
-                segment.control2 = complex(segment.control2.real,
-                                           change_svg_to_dxf_coordinate(segment.control2.imag, svg_height))
-
-            elif isinstance(segment, Arc):
-                # change start and end point of arc, as well as its center
-                segment.start = complex(segment.start.real,
-                                        change_svg_to_dxf_coordinate(segment.start.imag, svg_height))
-                segment.end = complex(segment.end.real, change_svg_to_dxf_coordinate(segment.end.imag, svg_height))
-                segment.center = complex(segment.center.real,
-                                         change_svg_to_dxf_coordinate(segment.center.imag, svg_height))
-
-            else:
-                svg_path_logger.warning("unsupported path segment: {}".format(segment))
+def scale_svg_paths(svg_paths, scale_x, scale_y):
+    """
+    Scales several paths (e.g. all paths of a file) in one step.
+    :param svg_paths: list of SvgPath
+    :param scale_x: float, scaling parameter in x-direction
+    :param scale_y: float, scaling parameter in y-direction
+    :return: -
+    """
+    concatenate_path_data([svg_path.path_data for svg_path in svg_paths]).scale(scale_x, scale_y)
+    for svg_path in svg_paths:
+        svg_path.invalidate_parsed_path()
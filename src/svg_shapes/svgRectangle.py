@@ -1,7 +1,9 @@
+import numpy as np
+
 from src.logging_config import setup_logger
 from src.svg_shapes import export_transformations
-from src.utilities import change_svg_to_dxf_coordinate, translate_coordinate, rotate_clockwise_around_point, \
-    scale_coordinate, skew_x, skew_y, matrix_transformation
+from src.svg_shapes.transform_matrix import compose_transformations, transform_message_matrix, svg_to_dxf_matrix, has_rotation, \
+    apply_matrix, apply_matrix_to_vector, round_point
 
 svg_rect_logger = setup_logger(__name__)
 
@@ -19,13 +21,16 @@ class SvgRectangle:
         rx: float, radius in x-direction of rounded corner
         ry: float, radius in y-direction of rounded corner
         transformation_list: list, with all transformations and its values
+        transform_message: string, transform attribute of the svg element
     """
 
-    def __init__(self, element, svg_height):
+    def __init__(self, element, svg_height, parent_matrix=None):
         """
         Initializes the svg rectangle.
         :param element: dictionary, with svg rectangle content
         :param svg_height: float, height of svg file
+        :param parent_matrix: 3x3 matrix, transformation applied after the transform message (e.g. scaling of the
+                              file), default None
         """
         self.name = 'rectangle'
         # extract the top left corner
@@ -48,16 +53,39 @@ class SvgRectangle:
             rx = ensure_applicable_radius(self.ry[1], self.rect_width[0])
             self.rx = (rx, 0)
 
-        # get transform message and transform rect
+        # matrix, which transforms the rectangle from svg into cartesian coordinates
+        cartesian_matrix = svg_to_dxf_matrix(svg_height)
+        if parent_matrix is not None:
+            cartesian_matrix = cartesian_matrix @ parent_matrix
+        matrix = cartesian_matrix
+        corner_matrix = np.identity(3)
+        rotated = False
+
+        # get transform message and fold it into the matrices
         transform = element.get('transform')
         if transform is not None:
             self.transformation_list = export_transformations(transform)
-            self.transform()
-
-        # change to dxf / cartesian coordinates
-        self.y = change_svg_to_dxf_coordinate(self.y, svg_height)
-        self.rect_height = (self.rect_height[0], (-1) * self.rect_height[1])
-        self.rect_width = (self.rect_width[0], (-1) * self.rect_width[1])
+            self.transform_message = transform
+            transform_matrix, corner_matrix = self.transform()
+            matrix = cartesian_matrix @ transform_matrix
+            rotated = has_rotation(self.transformation_list)
+
+        # the corner radii are vectors in cartesian coordinates: rotations are mirrored, only the linear part is applied
+        radius_matrix = cartesian_matrix @ corner_matrix @ svg_to_dxf_matrix(0)
+
+        # transform and change to dxf / cartesian coordinates in one step
+        corner = apply_matrix(matrix, self.x, self.y)
+        self.rect_width = apply_matrix_to_vector(matrix, *self.rect_width)
+        self.rect_height = apply_matrix_to_vector(matrix, *self.rect_height)
+        self.rx = apply_matrix_to_vector(radius_matrix, *self.rx)
+        self.ry = apply_matrix_to_vector(radius_matrix, *self.ry)
+        if rotated:
+            corner = round_point(corner)
+            self.rect_width = round_point(self.rect_width)
+            self.rect_height = round_point(self.rect_height)
+            self.rx = round_point(self.rx)
+            self.ry = round_point(self.ry)
+        self.x, self.y = corner
 
     def get_name(self):
         """
@@ -84,101 +112,14 @@ class SvgRectangle:
         self.ry = (self.ry[0] * scale_x, self.ry[1] * scale_y)
 
     def transform(self):
-        # iterate over transform message and its values
-        for t_type, values in self.transformation_list:
-            match t_type:
-                case 'translate':
-                    if len(values) == 1:  # only translate in x-direction
-                        self.x = translate_coordinate(self.x, values[0])
-                    elif len(values) == 2:  # translate in x- and y-direction
-                        self.x = translate_coordinate(self.x, values[0])
-                        self.y = translate_coordinate(self.y, values[1])
-                    else:
-                        svg_rect_logger.warning(f"unknown translate entry in values, {len(values)}")
-                case 'rotate':
-                    # rotate x,y
-                    if len(values) == 1:  # around svg origin
-                        self.x, y = rotate_clockwise_around_point(self.x, -self.y, values[0], 0, 0)
-                        self.y = (-1) * y
-                    elif len(values) == 3:  # around point (in svg coordinates)
-                        self.x, y = rotate_clockwise_around_point(self.x, -self.y, values[0], values[1], -values[2])
-                        self.y = (-1) * y
-                    else:
-                        svg_rect_logger.warning(f"unknown rotation value, length of values: {len(values)}")
-
-                    # rotate rect_with,rect_height (around origin, as vectors/directions)
-                    w_x, w_y = rotate_clockwise_around_point(self.rect_width[0], -self.rect_width[1],
-                                                             values[0], 0, 0)
-                    self.rect_width = (w_x, (-1) * w_y)
-                    h_x, h_y = rotate_clockwise_around_point(self.rect_height[0], -self.rect_height[1],
-                                                             values[0], 0, 0)
-                    self.rect_height = (h_x, (-1) * h_y)
-
-                    # rotate rx - if necessary
-                    if self.rx != (0, 0):  # and self.ry != (0, 0)
-                        self.rx = rotate_clockwise_around_point(self.rx[0], self.rx[1], values[0], 0, 0)
-                        self.ry = rotate_clockwise_around_point(self.ry[0], self.ry[1], values[0], 0, 0)
-                case 'scale':
-                    if len(values) == 1:  # only one value - scale all with same parameter
-                        # scale top left corner
-                        self.x = scale_coordinate(self.x, values[0])
-                        self.y = scale_coordinate(self.y, values[0])
-                        # scale height and width of rectangle
-                        self.rect_width = (scale_coordinate(self.rect_width[0], values[0]),
-                        scale_coordinate(self.rect_width[1], values[0]))
-                        self.rect_height = (scale_coordinate(self.rect_height[0], values[0]),
-                        scale_coordinate(self.rect_height[1], values[0]))
-                        # scale radii of rounded corners
-                        self.rx = (scale_coordinate(self.rx[0], values[0]), scale_coordinate(self.rx[1], values[0]))
-                        self.ry = (scale_coordinate(self.ry[0], values[0]), scale_coordinate(self.ry[1], values[0]))
-                    elif len(values) == 2:  # two values - scale in x- and y-direction differently
-                        # scale top left corner
-                        self.x = scale_coordinate(self.x, values[0])
-                        self.y = scale_coordinate(self.y, values[1])
-                        # scale height and width of rectangle
-                        self.rect_width = (scale_coordinate(self.rect_width[0], values[0]),
-                        scale_coordinate(self.rect_width[1], values[1]))
-                        self.rect_height = (scale_coordinate(self.rect_height[0], values[0]),
-                        scale_coordinate(self.rect_height[1], values[1]))
-                        # scale radii of rounded corners
-                        self.rx = (scale_coordinate(self.rx[0], values[0]), scale_coordinate(self.rx[1], values[1]))
-                        self.ry = (scale_coordinate(self.ry[0], values[0]), scale_coordinate(self.ry[1], values[1]))
-                    else:
-                        svg_rect_logger.warning(f"unknown scale entry in values, {len(values)}")
-                case 'skewX':
-                    # skew in x direction
-                    self.x = skew_x(self.x, self.y, values[0])
-                    self.rect_width = (skew_x(self.rect_width[0], self.rect_width[1], values[0]), self.rect_width[1])
-                    self.rect_height = (
-                        skew_x(self.rect_height[0], self.rect_height[1], values[0]), self.rect_height[1])
-                    # TODO skewX/skewY and rounded corners
-                case 'skewY':
-                    # skew in y direction
-                    self.y = skew_y(self.x, self.y, values[0])
-                    self.rect_width = (
-                        self.rect_width[0], skew_y(self.rect_width[0], self.rect_width[1], values[0]))
-                    self.rect_height = (
-                        self.rect_height[0], skew_y(self.rect_height[0], self.rect_height[1], values[0]))
-                    # TODO skewX/skewY and rounded corners
-                case 'matrix':
-                    # if matrix without translation, add zeros
-                    if len(values) == 4:
-                        values.append(0)
-                        values.append(0)
-
-                    # transform top left corners
-                    self.x, self.y = matrix_transformation(self.x, self.y, values)
-
-                    # transform height and width from rectangle
-                    rect_width_x = values[0] * self.rect_width[0] + values[2] * self.rect_width[1]
-                    rect_width_y = values[1] * self.rect_width[0] + values[3] * self.rect_width[1]
-                    self.rect_width = (rect_width_x, rect_width_y)
-
-                    rect_height_x = values[0] * self.rect_height[0] + values[2] * self.rect_height[1]
-                    rect_height_y = values[1] * self.rect_height[0] + values[3] * self.rect_height[1]
-                    self.rect_height = (rect_height_x, rect_height_y)
-
-                    # TODO skewX/skewY and rounded corners
+        """
+        Transforms the rectangle according to the transformations in svg string.
+        The corner radii are only rotated and scaled (skewX/skewY/matrix and rounded corners are not done yet).
+        :return: (matrix, corner_matrix), 3x3 matrices with all transformations and for the corner radii
+        """
+        return (transform_message_matrix(self.transform_message),
+                compose_transformations([(t_type, values) for t_type, values in self.transformation_list
+                                         if t_type in ('rotate', 'scale')]))
 
 
 def ensure_applicable_radius(r, length):
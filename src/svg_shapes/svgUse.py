@@ -0,0 +1,99 @@
+import re
+
+from src.logging_config import setup_logger
+from src.svg_shapes.transform_matrix import transform_message_matrix, svg_to_dxf_matrix, translation_matrix, \
+    scaling_matrix, has_skew, insert_parameters
+from src.svg_shapes.transform_messages import export_transformations
+
+svg_use_logger = setup_logger(__name__)
+
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+# characters, which are not allowed in the name of a dxf block
+INVALID_BLOCK_NAME_CHARACTERS = re.compile(r'[<>/\\":;?*|=`]')
+
+
+class SvgUse:
+    """"
+    Represents a svg use element, i.e. a reference to a definition (<symbol> or element in <defs>), which is drawn once
+    as dxf block and inserted for every use.
+    The transformation of the use is kept as matrix (in cartesian coordinates), which maps the block onto the
+    position of the use.
+
+    Attributes:
+        name: string, 'use'
+        reference: string, id of the referenced definition (None if there is no valid reference)
+        block_name: string, name of the dxf block
+        block_figures: list, with the svg figures of the definition in block coordinates (set by the svg handler)
+        matrix: 3x3 matrix, transforms the block into the cartesian coordinates of the use
+        svg_matrix: 3x3 matrix, transforms the definition into the svg coordinates of the use
+        insert: tuple, (x, y) insertion point of the block
+        scale_x: float, scaling of the block in x-direction
+        scale_y: float, scaling of the block in y-direction (negative if it is mirrored)
+        rotation: float, rotation of the block in degree
+        transformation_list: list, with all transformations and its values
+        transform_message: string, transform attribute of the svg element
+    """
+
+    def __init__(self, element, svg_height, parent_matrix=None):
+        """
+        Initializes the svg use.
+        :param element: dictionary, svg use element
+        :param svg_height: float, height of svg file
+        :param parent_matrix: 3x3 matrix, transformation applied after the transform message (e.g. scaling of the
+                              file), default None
+        """
+        self.name = 'use'
+        # extract the reference, svg 2 uses href, svg 1.1 xlink:href
+        href = element.get('href') or element.get(XLINK_HREF)
+        self.reference = href[1:] if href and href.startswith('#') else None
+        self.block_name = INVALID_BLOCK_NAME_CHARACTERS.sub('_', self.reference or '')
+        self.block_figures = []
+
+        # x/y are an additional translation after the transform message
+        self.svg_matrix = translation_matrix(float(element.get('x', 0)), float(element.get('y', 0)))
+        transform_message = element.get('transform')
+        if transform_message is not None:
+            self.transformation_list = export_transformations(transform_message)
+            self.transform_message = transform_message
+            self.svg_matrix = self.transform() @ self.svg_matrix
+        if parent_matrix is not None:
+            self.svg_matrix = parent_matrix @ self.svg_matrix
+
+        # the block is drawn in cartesian coordinates of the definition (svg height 0), thus it is flipped back into
+        # svg coordinates, transformed and changed into the cartesian coordinates of the file
+        self.matrix = svg_to_dxf_matrix(svg_height) @ self.svg_matrix @ svg_to_dxf_matrix(0)
+        self.insert, self.scale_x, self.scale_y, self.rotation = insert_parameters(self.matrix)
+
+    def get_name(self):
+        """
+        Getter of name.
+        :return: 'use'
+        """
+        return self.name
+
+    def has_skew(self):
+        """
+        Checks, if the use skews the definition, which can not be expressed by a dxf insert.
+        :return: True if the use skews the definition
+        """
+        return has_skew(self.matrix)
+
+    def scale(self, scale_x, scale_y):
+        """
+        Scales the use, i.e. its insertion point and the scaling of the block.
+        :param scale_x: float, parameter for scaling in x-direction
+        :param scale_y: float, parameter for scaling in y-direction
+        :return: -
+        """
+        self.matrix = scaling_matrix(scale_x, scale_y) @ self.matrix
+        if self.has_skew():
+            # a rotated block scaled unequally would be skewed
+            svg_use_logger.warning(f"use of {self.reference} is skewed by scaling - the skew is lost in dxf")
+        self.insert, self.scale_x, self.scale_y, self.rotation = insert_parameters(self.matrix)
+
+    def transform(self):
+        """
+        Transforms the use according to the transformations in svg string.
+        :return: 3x3 matrix, with all transformations
+        """
+        return transform_message_matrix(self.transform_message)
@@ -0,0 +1,289 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+from svgpathtools.parser import parse_transform
+
+from src.logging_config import setup_logger
+from src.utilities import parse_transform_message, TRANSFORM_CACHE_SIZE
+
+transform_matrix_logger = setup_logger(__name__)
+
+# digits the coordinates are rounded to, if the figure is rotated (same as the rotate functions in utilities)
+ROTATION_DIGITS = 5
+
+
+def cos_sin_degree(angle):
+    """
+    Calculates cosine and sine of an angle given in degree.
+    Multiples of 90 degree are returned exact, to not end up with values like 6.123e-17 instead of 0.
+    :param angle: float, angle in degree
+    :return: (cos, sin) of the angle
+    """
+    if angle % 90 == 0:
+        return [(1, 0), (0, 1), (-1, 0), (0, -1)][int(angle // 90) % 4]
+    angle_rad = math.radians(angle)
+    return math.cos(angle_rad), math.sin(angle_rad)
+
+
+def translation_matrix(tx, ty=0):
+    """
+    Matrix of the svg transformation translate(tx, ty).
+    :param tx: float, translation in x-direction
+    :param ty: float, translation in y-direction
+    :return: 3x3 matrix
+    """
+    return np.array([[1, 0, tx], [0, 1, ty], [0, 0, 1]], dtype=float)
+
+
+def rotation_matrix(angle, cx=0, cy=0):
+    """
+    Matrix of the svg transformation rotate(angle, cx, cy), in svg coordinates (y-axis from top to down).
+    :param angle: float, rotation angle in degree
+    :param cx: float, x-coordinate of the rotation point
+    :param cy: float, y-coordinate of the rotation point
+    :return: 3x3 matrix
+    """
+    cos, sin = cos_sin_degree(angle)
+    return np.array([[cos, -sin, cx - cx * cos + cy * sin],
+                     [sin, cos, cy - cx * sin - cy * cos],
+                     [0, 0, 1]], dtype=float)
+
+
+def scaling_matrix(sx, sy=None):
+    """
+    Matrix of the svg transformation scale(sx, sy).
+    :param sx: float, scaling in x-direction
+    :param sy: float, scaling in y-direction, if None the same as in x-direction
+    :return: 3x3 matrix
+    """
+    if sy is None:
+        sy = sx
+    return np.array([[sx, 0, 0], [0, sy, 0], [0, 0, 1]], dtype=float)
+
+
+def skew_x_matrix(angle):
+    """
+    Matrix of the svg transformation skewX(angle).
+    :param angle: float, skew angle in degree
+    :return: 3x3 matrix
+    """
+    return np.array([[1, math.tan(math.radians(angle)), 0], [0, 1, 0], [0, 0, 1]], dtype=float)
+
+
+def skew_y_matrix(angle):
+    """
+    Matrix of the svg transformation skewY(angle).
+    :param angle: float, skew angle in degree
+    :return: 3x3 matrix
+    """
+    return np.array([[1, 0, 0], [math.tan(math.radians(angle)), 1, 0], [0, 0, 1]], dtype=float)
+
+
+def values_matrix(values):
+    """
+    Matrix of the svg transformation matrix(a, b, c, d, e, f).
+    :param values: list, [a, b, c, d, e, f] or [a, b, c, d] if there is no translation
+    :return: 3x3 matrix
+    """
+    a, b, c, d = values[:4]
+    e, f = values[4:6] if len(values) == 6 else (0, 0)
+    return np.array([[a, c, e], [b, d, f], [0, 0, 1]], dtype=float)
+
+
+def svg_to_dxf_matrix(svg_height):
+    """
+    Matrix, which changes svg coordinates into cartesian coordinates (y-axis in svg is from top to down).
+    :param svg_height: float, height of svg file
+    :return: 3x3 matrix
+    """
+    return np.array([[1, 0, 0], [0, -1, svg_height], [0, 0, 1]], dtype=float)
+
+
+def transformation_to_matrix(t_type, values):
+    """
+    Converts a single transformation (type, values) of export_transformations into its matrix.
+    :param t_type: string, type of the transformation (translate, rotate, scale, skewX, skewY, matrix)
+    :param values: list, values of the transformation
+    :return: 3x3 matrix, or None if the values do not fit to the transformation type
+    """
+    match t_type, len(values):
+        case 'translate', 1 | 2:
+            return translation_matrix(*values)
+        case 'rotate', 1 | 3:
+            return rotation_matrix(*values)
+        case 'scale', 1 | 2:
+            return scaling_matrix(*values)
+        case 'skewX', 1:
+            return skew_x_matrix(values[0])
+        case 'skewY', 1:
+            return skew_y_matrix(values[0])
+        case 'matrix', 4 | 6:
+            return values_matrix(values)
+        case _:
+            transform_matrix_logger.warning(f"unknown {t_type} transformation - values length: {len(values)}")
+            return None
+
+
+def compose_transformations(transformation_list, supported_types=None):
+    """
+    Folds all transformations of a figure into one matrix.
+    The transformations are applied in the order of the list, the first transformation first.
+
+    :param transformation_list: list of tuples, [(type, values), ..., (type, values)] (see export_transformations)
+    :param supported_types: tuple of transformation types, which are taken into account (default all types),
+                            the other ones are skipped with a warning
+    :return: 3x3 matrix
+    """
+    matrix = np.identity(3)
+    for t_type, values in transformation_list:
+        if supported_types is not None and t_type not in supported_types:
+            transform_matrix_logger.warning(f"{t_type} not supported for this figure - skipped")
+            continue
+        t_matrix = transformation_to_matrix(t_type, values)
+        if t_matrix is not None:
+            matrix = t_matrix @ matrix
+    return matrix
+
+
+@lru_cache(maxsize=TRANSFORM_CACHE_SIZE)
+def transform_message_matrix(transform_message, supported_types=None):
+    """
+    Composes the matrix of a transform message (see compose_transformations).
+    The matrix is cached by the message, it is read-only and shared by all figures with the same message.
+    Warnings about skipped transformations are only logged the first time a message is composed.
+
+    :param transform_message: string, transform message of the svg element
+    :param supported_types: tuple of transformation types, which are taken into account (default all types)
+    :return: 3x3 matrix (read-only)
+    """
+    matrix = compose_transformations(parse_transform_message(transform_message), supported_types)
+    matrix.flags.writeable = False
+    return matrix
+
+
+@lru_cache(maxsize=TRANSFORM_CACHE_SIZE)
+def path_transform_matrix(transform_message):
+    """
+    Matrix of the transform message of a path, the transformations are composed as in svgpathtools (svg order).
+    The matrix is cached by the message and read-only.
+
+    :param transform_message: string, transform message of the svg path
+    :return: 3x3 matrix (read-only)
+    """
+    matrix = parse_transform(transform_message)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def transform_cache_info():
+    """
+    Hit and miss counters of the transform caches.
+    :return: dictionary, {'messages': ..., 'matrices': ..., 'path_matrices': ...} with the cache info
+             (hits, misses, maxsize, currsize) of the parsed messages and the composed matrices
+    """
+    return {'messages': parse_transform_message.cache_info(),
+            'matrices': transform_message_matrix.cache_info(),
+            'path_matrices': path_transform_matrix.cache_info()}
+
+
+def clear_transform_caches():
+    """
+    Clears the transform caches (and their counters).
+    :return: -
+    """
+    parse_transform_message.cache_clear()
+    transform_message_matrix.cache_clear()
+    path_transform_matrix.cache_clear()
+
+
+def has_rotation(transformation_list):
+    """
+    Checks, if there is a rotation in the transformation list.
+    :param transformation_list: list of tuples, [(type, values), ..., (type, values)]
+    :return: True if one of the transformations is a rotation
+    """
+    return any(t_type == 'rotate' for t_type, _ in transformation_list)
+
+
+def apply_matrix(matrix, x, y):
+    """
+    Transforms the point (x, y) with a 3x3 matrix.
+    :param matrix: 3x3 matrix
+    :param x: float, x-coordinate of the point
+    :param y: float, y-coordinate of the point
+    :return: (x, y) (tuple) transformed point
+    """
+    return (float(matrix[0, 0] * x + matrix[0, 1] * y + matrix[0, 2]),
+            float(matrix[1, 0] * x + matrix[1, 1] * y + matrix[1, 2]))
+
+
+def apply_matrix_to_vector(matrix, x, y):
+    """
+    Transforms the vector (x, y) with a 3x3 matrix, i.e. only with its linear part (without translation).
+    :param matrix: 3x3 matrix
+    :param x: float, x-component of the vector
+    :param y: float, y-component of the vector
+    :return: (x, y) (tuple) transformed vector
+    """
+    return (float(matrix[0, 0] * x + matrix[0, 1] * y),
+            float(matrix[1, 0] * x + matrix[1, 1] * y))
+
+
+def apply_matrix_to_points(matrix, points):
+    """
+    Transforms all points with a 3x3 matrix in one vectorized step.
+    :param matrix: 3x3 matrix
+    :param points: array like, (N, 2) points
+    :return: (N, 2) array, transformed points
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return points @ matrix[:2, :2].T + matrix[:2, 2]
+
+
+def round_point(point, digits=ROTATION_DIGITS):
+    """
+    Rounds a point (or vector) to the given digits.
+    :param point: (x, y) tuple
+    :param digits: int, number of digits
+    :return: (x, y) rounded tuple
+    """
+    return round(point[0], digits), round(point[1], digits)
+
+
+def axis_scales(matrix):
+    """
+    Calculates how much a 3x3 matrix stretches the x- and the y-axis.
+    :param matrix: 3x3 matrix
+    :return: (scale_x, scale_y) lengths of the transformed unit vectors
+    """
+    return float(math.hypot(matrix[0, 0], matrix[1, 0])), float(math.hypot(matrix[0, 1], matrix[1, 1]))
+
+
+def has_skew(matrix, tolerance=1e-9):
+    """
+    Checks, if a 3x3 matrix skews, i.e. if the transformed axes are not perpendicular anymore.
+    A matrix without skew can be split into translation, rotation and scaling (see insert_parameters).
+    :param matrix: 3x3 matrix
+    :param tolerance: float, relative tolerance of the check
+    :return: True if the matrix skews
+    """
+    scale_x, scale_y = axis_scales(matrix)
+    dot = matrix[0, 0] * matrix[0, 1] + matrix[1, 0] * matrix[1, 1]
+    return bool(abs(dot) > tolerance * scale_x * scale_y)
+
+
+def insert_parameters(matrix):
+    """
+    Splits a 3x3 matrix without skew into the parameters of a dxf INSERT: the matrix scales first, then rotates and
+    translates at last. A mirroring is expressed by a negative y-scale.
+    For a matrix with skew (see has_skew), the skew is lost.
+    :param matrix: 3x3 matrix
+    :return: (insert, scale_x, scale_y, rotation) tuple, insert point (x, y), the scaling factors and the rotation
+             angle in degree
+    """
+    scale_x, scale_y = axis_scales(matrix)
+    if matrix[0, 0] * matrix[1, 1] - matrix[0, 1] * matrix[1, 0] < 0:
+        scale_y = -scale_y
+    rotation = math.degrees(math.atan2(matrix[1, 0], matrix[0, 0]))
+    return (float(matrix[0, 2]), float(matrix[1, 2])), scale_x, scale_y, rotation
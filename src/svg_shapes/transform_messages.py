@@ -1,6 +1,5 @@
-import re
-
 from src.logging_config import setup_logger
+from src.utilities import parse_transform_message
 
 transform_logger = setup_logger("transform-messages")
 
@@ -8,20 +7,16 @@ transform_logger = setup_logger("transform-messages")
 def export_transformations(transformation):
     """
     Export the transformation message from the svg element.
+    The parsing is cached by the message (see parse_transform_message).
     :param transformation: string, transform message from svg element
     :return: list of tuples, [(type, values), ..., (type, values)]
     """
-    pattern = r"(translate|rotate|scale|skewX|skewY|matrix)\(([^)]+)\)"
-
     try:
         # match all possible transformation
-        matches = re.findall(pattern, transformation)
+        transformations = parse_transform_message(transformation)
     except TypeError as e:
         transform_logger.exception(e)
         return None
     else:
-        # convert the patterns into tuples (type, [values])
-        transformations = [(t_type, list(map(float, values.replace(', ', ',').replace(' ', ',').split(','))))
-            for t_type, values in matches]
-
-        return transformations
+        # new lists for every call, the cached result must not be changed by the caller
+        return [(t_type, list(values)) for t_type, values in transformations]
@@ -1,5 +1,6 @@
 import math
 import re
+from functools import lru_cache
 
 import numpy as np
 
@@ -27,91 +28,99 @@ def change_dxf_to_svg_coordinate(y, height):
 
 # get values of transformation messages
 
-def export_rotation(transformation):
+# number of different transform messages kept in the caches
+TRANSFORM_CACHE_SIZE = 1024
+# a single transformation of a transform message, e.g. "rotate(30, 10, 10)"
+TRANSFORMATION_PATTERN = re.compile(r"(translate|rotate|scale|skewX|skewY|matrix)\s*\(([^)]+)\)")
+# a single number of the svg grammar, e.g. "-1.5", ".5", "1e-3", "10.e5"
+NUMBER_PATTERN = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+@lru_cache(maxsize=TRANSFORM_CACHE_SIZE)
+def parse_transform_message(transformation):
     """
-    Exports the rotation angle (in degree) given in the transformation message.
-    If none is given, the method returns 0.
+    Parses a transform message into its transformations.
+    The result is cached (bounded LRU cache keyed by the message), as exported files repeat the same message across
+    many elements. Transformations with invalid values are skipped.
+
+    :param transformation: string, transform message of the svg object
+    :return: tuple of tuples, ((type, (values)), ..., (type, (values)))
+    :raises TypeError: if transformation is not a string
+    """
+    transformations = []
+    for t_type, values in TRANSFORMATION_PATTERN.findall(transformation):
+        if NUMBER_PATTERN.sub('', values).strip(' \t\r\n,'):
+            utilities_logger.warning(f"invalid values in transformation {t_type}({values}) - skipped")
+            continue
+        transformations.append((t_type, tuple(map(float, NUMBER_PATTERN.findall(values)))))
+    return tuple(transformations)
+
+
+def find_transformation(transformation, t_type, value_counts):
+    """
+    Finds the first transformation of a type with an allowed number of values in the transformation message.
 
     :param transformation: transformation message of the svg object
-    :return: rotation angle given in the transformation message, if none is given, it returns 0
+    :param t_type: string, type of the transformation (translate, rotate, scale, skewX, skewY, matrix)
+    :param value_counts: tuple, allowed number of values
+    :return: tuple, values of the transformation, None if there is no such transformation
     """
     try:
-        match = re.search(r'rotate\(([-\d.e]+)(?:,\s*([-\d.e]+),\s*([-\d.e]+))?\)', transformation)
+        transformations = parse_transform_message(transformation)
     except TypeError as e:
         utilities_logger.exception(e)
         return None
-    else:
-        if match:
-            angle = float(match.group(1))  # Extract the angle
-            cx = float(match.group(2)) if match.group(2) else 0  # Default cx = 0 if not present
-            cy = float(match.group(3)) if match.group(3) else 0  # Default cy = 0 if not present
-            return angle, cx, cy
+    for found_type, values in transformations:
+        if found_type == t_type and len(values) in value_counts:
+            return values
+    return None
+
+
+def export_rotation(transformation):
+    """
+    Exports the rotation angle (in degree) given in the transformation message.
+    If none is given, the method returns 0.
+
+    :param transformation: transformation message of the svg object
+    :return: rotation angle given in the transformation message, if none is given, it returns 0
+    """
+    values = find_transformation(transformation, 'rotate', (1, 3))
+    if values is None:
         return None  # Default values if no rotation is found
+    angle = values[0]  # Extract the angle
+    cx, cy = values[1:] if len(values) == 3 else (0, 0)  # Default cx = cy = 0 if not present
+    return angle, cx, cy
 
 
 def export_translation(transformation):
-    try:
-        match = re.search(r'translate\(([-\d.e]+),\s*([-\d.e]+)\)', transformation)
-    except TypeError as e:
-        utilities_logger.exception(e)
-        return None
-    else:
-        if match:
-            dx = float(match.group(1))
-            dy = float(match.group(2))  # if no translation in y-direction is given
-            return dx, dy
+    values = find_transformation(transformation, 'translate', (2,))
+    if values is None:
         return None
+    dx, dy = values
+    return dx, dy
 
 
 def export_scale(transformation):
-    try:
-        match = re.search(r'scale\(([-\d.e]+)(?:,\s*([-\d.e]+))?\)', transformation)
-    except TypeError as e:
-        utilities_logger.exception(e)
-        return None
-    else:
-        if match:
-            sx = float(match.group(1))
-            sy = float(match.group(2)) if match.group(2) else sx
-            return sx, sy
+    values = find_transformation(transformation, 'scale', (1, 2))
+    if values is None:
         return None
+    sx = values[0]
+    sy = values[1] if len(values) == 2 else sx
+    return sx, sy
 
 
 def export_skew_x(transformation):
-    try:
-        match = re.search(r'skewX\(([-\d.e]+)\)', transformation)
-    except TypeError as e:
-        utilities_logger.exception(e)
-        return None
-    else:
-        if match:
-            return float(match.group(1))
-        return None
+    values = find_transformation(transformation, 'skewX', (1,))
+    return values[0] if values is not None else None
 
 
 def export_skew_y(transformation):
-    try:
-        match = re.search(r'skewY\(([-\d.]+)\)', transformation)
-    except TypeError as e:
-        utilities_logger.exception(e)
-        return None
-    else:
-        if match:
-            return float(match.group(1))
-        return None
+    values = find_transformation(transformation, 'skewY', (1,))
+    return values[0] if values is not None else None
 
 
 def export_matrix(transformation):
-    try:
-        match = re.search(r'matrix\(([-\d.e]+),\s*([-\d.e]+),\s*([-\d.e]+),\s*([-\d.e]+),\s*([-\d.e]+),\s*([-\d.e]+)\)',
-                          transformation)
-    except TypeError as e:
-        utilities_logger.exception(e)
-        return None
-    else:
-        if match:
-            return tuple(float(match.group(i)) for i in range(1, 7))
-        return None  # Return None if no matrix transformation is found
+    return find_transformation(transformation, 'matrix', (6,))  # None if no matrix transformation is found
 
 
 # geometric functions
@@ -0,0 +1,138 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.batch_converter import collect_svg_files, convert_file, convert_files, summarize_results
+from src.main import main
+
+SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <circle cx="50" cy="50" r="10"/>
+  <line x1="0" y1="0" x2="100" y2="50"/>
+</svg>
+"""
+
+
+class TestBatchConverter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.svg_dir = os.path.join(self.directory, 'svg')
+        os.makedirs(os.path.join(self.svg_dir, 'sub'))
+        for name in ('b.svg', 'a.svg', os.path.join('sub', 'a.svg')):
+            with open(os.path.join(self.svg_dir, name), 'w') as svg_file:
+                svg_file.write(SVG_CONTENT)
+        with open(os.path.join(self.svg_dir, 'broken.svg'), 'w') as svg_file:
+            svg_file.write("<svg")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_collect_svg_files(self):
+        svg_files = collect_svg_files([self.svg_dir, os.path.join(self.svg_dir, 'sub', '*.svg')])
+        self.assertEqual([dxf_name for _, dxf_name in svg_files],
+                         ['a', 'b', 'broken', os.path.join('sub', 'a')])
+
+        # the same name from different directories gets a counter
+        svg_files = collect_svg_files([os.path.join(self.svg_dir, '**', 'a.svg')])
+        self.assertEqual([dxf_name for _, dxf_name in svg_files], ['a', 'a_2'])
+
+    def test_convert_file(self):
+        output_dir = os.path.join(self.directory, 'dxf')
+        result = convert_file(os.path.join(self.svg_dir, 'a.svg'), os.path.join('sub', 'a'), output_dir, 2, 2)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.figure_count, 2)
+        self.assertTrue(os.path.isfile(os.path.join(output_dir, 'sub', 'a.dxf')))
+
+        streamed = convert_file(os.path.join(self.svg_dir, 'a.svg'), 'a', output_dir, 2, 2, streaming=True)
+        self.assertEqual((streamed.error, streamed.figure_count), (None, 2))
+
+        for streaming in (False, True):
+            result = convert_file(os.path.join(self.svg_dir, 'a.svg'), 'a', output_dir, streaming=streaming,
+                                  duplicate_tolerance=1e-3)
+            self.assertEqual((result.error, result.figure_count, result.duplicates), (None, 2, 0))
+
+        ordered = convert_file(os.path.join(self.svg_dir, 'a.svg'), 'a', output_dir, optimize_order=True)
+        self.assertIsNone(ordered.error)
+        self.assertLessEqual(ordered.travel[1], ordered.travel[0])
+        self.assertIsNotNone(convert_file(os.path.join(self.svg_dir, 'a.svg'), 'a', output_dir, streaming=True,
+                                          optimize_order=True).error)
+
+        checked = convert_file(os.path.join(self.svg_dir, 'a.svg'), 'a', output_dir, thickness=20)
+        self.assertEqual([(violation.rule, violation.figure) for violation in checked.violations],
+                         [('distance', 1), ('radius', 1)])
+        self.assertIsNone(ordered.violations)
+        for _ in range(2):
+            cached = convert_file(os.path.join(self.svg_dir, 'a.svg'), 'a', output_dir, thickness=20, incremental=True)
+            self.assertEqual(cached.violations, checked.violations)
+        self.assertTrue(os.path.isfile(os.path.join(output_dir, 'a.rules.npz')))
+
+        failed = convert_file(os.path.join(self.svg_dir, 'broken.svg'), 'broken', output_dir)
+        self.assertIsNone(failed.dxf_file)
+        self.assertIn("not a valid svg file", failed.error)
+
+    def test_convert_files_independent_of_workers(self):
+        svg_files = collect_svg_files([self.svg_dir])
+        outputs = []
+        for workers in (1, 3):
+            output_dir = os.path.join(self.directory, f'dxf_{workers}')
+            results = list(convert_files(svg_files, output_dir, workers=workers, reproducible=True))
+            self.assertEqual([result.svg_file for result in results], [svg_file for svg_file, _ in svg_files])
+            self.assertEqual([result.error is None for result in results], [True, True, False, True])
+            contents = []
+            for result in results[:2] + results[3:]:
+                with open(result.dxf_file, 'rb') as dxf_file:
+                    contents.append(dxf_file.read())
+            outputs.append(contents)
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_reproducible_in_every_process(self):
+        # the dxf classes and all other sections must not depend on the hash seed of the process or on the number of
+        # processes drawing the figures, thus the written bytes are compared for separate interpreters
+        svg_file = os.path.join(self.svg_dir, 'a.svg')
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        contents = []
+        for hash_seed, figure_workers in (('1', '1'), ('2', '2'), ('3', '1')):
+            for streaming in ([], ['--streaming']):
+                output_dir = os.path.join(self.directory, f'dxf_{hash_seed}_{len(streaming)}')
+                subprocess.run([sys.executable, '-m', 'src.main', svg_file, '-o', output_dir, '-w', '1',
+                                '--figure-workers', figure_workers, '--reproducible'] + streaming, cwd=root,
+                               env=dict(os.environ, PYTHONHASHSEED=hash_seed), check=True, capture_output=True)
+                with open(os.path.join(output_dir, 'a.dxf'), 'rb') as dxf_file:
+                    contents.append(dxf_file.read())
+        self.assertEqual(contents[2:4], contents[:2])
+        self.assertEqual(contents[4:], contents[:2])
+
+    def test_summarize_results(self):
+        results = list(convert_files(collect_svg_files([self.svg_dir]), os.path.join(self.directory, 'dxf'),
+                                     workers=1))
+        summary = summarize_results(results, 2)
+        self.assertEqual((summary['converted'], summary['failed'], summary['files_per_second']), (3, 1, 2))
+        self.assertAlmostEqual(summary['megabytes'], 3 * len(SVG_CONTENT) / 1e6)
+
+    def test_main(self):
+        output_dir = os.path.join(self.directory, 'dxf')
+        self.assertEqual(main([os.path.join(self.svg_dir, 'a.svg'), '-o', output_dir, '-w', '1']), 0)
+        self.assertTrue(os.path.isfile(os.path.join(output_dir, 'a.dxf')))
+        self.assertEqual(main([self.svg_dir, '-o', output_dir, '-w', '2', '-s', '0.5', '2']), 1)
+
+        self.assertEqual(main([os.path.join(self.svg_dir, 'b.svg'), '-o', output_dir, '--binary']), 0)
+        with open(os.path.join(output_dir, 'b.dxf'), 'rb') as dxf_file:
+            self.assertTrue(dxf_file.read().startswith(b"AutoCAD Binary DXF"))
+
+        self.assertEqual(main([os.path.join(self.svg_dir, 'b.svg'), '-o', output_dir, '--flatten']), 0)
+        self.assertEqual(main([os.path.join(self.svg_dir, 'b.svg'), '-o', output_dir, '--flatten', '0.01']), 0)
+        with self.assertRaises(SystemExit):
+            main([os.path.join(self.svg_dir, 'b.svg'), '--flatten', '0'])
+
+        self.assertEqual(main([os.path.join(self.svg_dir, 'b.svg'), '-o', output_dir, '--join-lines']), 0)
+        self.assertEqual(main([os.path.join(self.svg_dir, 'b.svg'), '-o', output_dir, '--remove-duplicates']), 0)
+        self.assertEqual(main([os.path.join(self.svg_dir, 'b.svg'), '-o', output_dir, '--optimize-order']), 0)
+        with self.assertRaises(SystemExit):
+            main([os.path.join(self.svg_dir, 'b.svg'), '--join-lines', '--streaming'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import random
+import unittest
+
+import ezdxf
+import numpy as np
+
+from src.contour_joiner import join_lines, cluster_points, chain_segments
+
+
+class TestContourJoiner(unittest.TestCase):
+    def setUp(self):
+        self.doc = ezdxf.new()
+        self.msp = self.doc.modelspace()
+
+    def test_join_lines(self):
+        random.seed(0)
+        square = [((0, 0), (10, 0)), ((10, 0), (10, 10)), ((10, 10), (0, 10)), ((0, 10), (0, 0))]
+        # the lines of the square in random order and direction, with small differences of the endpoints
+        lines = [(start, (end[0] + 1e-8, end[1])) if random.random() < 0.5 else (end, start) for start, end in square]
+        random.shuffle(lines)
+        # an open chain and a single line
+        lines += [((20, 0), (30, 0)), ((40, 5), (30, 0)), ((50, 50), (60, 60))]
+        for start, end in lines:
+            self.msp.add_line(start, end)
+        # lines on an other layer are not joined with them
+        self.msp.add_line((60, 60), (70, 70), dxfattribs={'layer': 'other'})
+
+        self.assertEqual(join_lines(self.msp), 6)
+
+        polylines = self.msp.query('LWPOLYLINE')
+        self.assertEqual(len(polylines), 2)
+        closed = [polyline for polyline in polylines if polyline.closed]
+        self.assertEqual(len(closed), 1)
+        np.testing.assert_allclose(sorted(closed[0].get_points('xy')), sorted(start for start, _ in square),
+                                   atol=1e-6)
+        chain = [polyline for polyline in polylines if not polyline.closed][0]
+        self.assertIn(list(chain.get_points('xy')), [[(20, 0), (30, 0), (40, 5)], [(40, 5), (30, 0), (20, 0)]])
+        self.assertEqual(len(self.msp.query('LINE')), 2)
+        self.assertEqual(len(self.doc.entitydb.query('LINE')), 2)
+
+    def test_cluster_points(self):
+        tolerance = 0.1
+        # points on both sides of a cell border are clustered as well
+        points = np.array([(0.099, 0), (0.101, 0), (0.5, 0.5), (0.5, 0.55), (1, 1)])
+
+        nodes, positions = cluster_points(points, tolerance)
+
+        self.assertEqual(nodes[0], nodes[1])
+        self.assertEqual(nodes[2], nodes[3])
+        self.assertEqual(len(set(nodes.tolist())), 3)
+        np.testing.assert_array_equal(positions[nodes[4]], (1, 1))
+
+        # every pair of points within the tolerance is clustered, independent of the grid
+        nodes, _ = cluster_points(np.array([(0, 5e-4), (9.9e-4, 5e-4), (1.02e-3, 5e-4), (2.5e-3, 0)]), 1e-3)
+        self.assertEqual(nodes.tolist(), [0, 0, 0, 1])
+        # points in the same square of the tolerance, but farther apart, are not clustered
+        nodes, _ = cluster_points(np.array([(0, 0), (0.99e-3, 0.99e-3)]), 1e-3)
+        self.assertEqual(nodes.tolist(), [0, 1])
+
+    def test_chain_segments(self):
+        # a figure eight: two loops through node 0 and a tail from node 0 to 5
+        segment_nodes = np.array([(0, 1), (1, 2), (2, 0), (0, 3), (3, 4), (4, 0), (0, 5), (6, 6)])
+
+        chains = chain_segments(segment_nodes)
+
+        # every segment, besides the loop of node 6, is used once and the open end is the end of a chain
+        self.assertEqual(sorted(segment for _, segments, _ in chains for segment in segments), list(range(7)))
+        self.assertTrue(all(5 in (path[0], path[-1]) for path, _, closed in chains if not closed))
+        for path, segments, _ in chains:
+            for (start, end), segment in zip(zip(path, path[1:]), segments):
+                self.assertEqual(sorted((start, end)), sorted(segment_nodes[segment].tolist()))
+
+
+if __name__ == "__main__":
+    unittest.main()
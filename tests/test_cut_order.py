@@ -0,0 +1,93 @@
+import os
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.cut_order import optimize_cut_order, nesting_children, nearest_neighbour_tour, two_opt, travel_length
+from src.svg_handler import read_svg_file
+
+NESTED_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <rect x="100" y="10" width="80" height="80"/>
+  <circle cx="20" cy="80" r="5"/>
+  <circle cx="140" cy="50" r="20"/>
+  <line x1="135" y1="50" x2="145" y2="50"/>
+  <rect x="10" y="10" width="30" height="30"/>
+  <circle cx="25" cy="25" r="5"/>
+</svg>
+"""
+
+
+class TestCutOrder(unittest.TestCase):
+    def test_optimize_cut_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'nested.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write(NESTED_SVG_CONTENT)
+            svg_figures = read_svg_file(svg_file)
+
+        figures, travel_before, travel_after = optimize_cut_order(svg_figures)
+
+        self.assertEqual(figures[0].get_name(), 'header')
+        self.assertEqual(sorted(map(id, figures)), sorted(map(id, svg_figures)))
+        self.assertLess(travel_after, travel_before)
+        # the inner contours are cut before their outer contour: the line before the big circle before the big
+        # rectangle and the small circle before the small rectangle
+        positions = {id(figure): position for position, figure in enumerate(figures)}
+        big_rectangle, small_circle, big_circle, line, small_rectangle, inner_circle = svg_figures[1:]
+        self.assertLess(positions[id(line)], positions[id(big_circle)])
+        self.assertLess(positions[id(big_circle)], positions[id(big_rectangle)])
+        self.assertLess(positions[id(inner_circle)], positions[id(small_rectangle)])
+        # the parts are cut one after the other
+        self.assertEqual(abs(positions[id(inner_circle)] - positions[id(small_rectangle)]), 1)
+
+    def test_nesting_children(self):
+        boxes = np.array([(0, 0, 100, 100), (10, 10, 20, 20), (12, 12, 18, 18), (50, 50, 50, 60), (200, 0, 210, 10)],
+                         dtype=float)
+        closed = np.array([True, True, True, False, True])
+
+        children = nesting_children(boxes, closed)
+
+        self.assertEqual(children, {-1: [0, 4], 0: [1, 3], 1: [2]})
+
+    def test_tour(self):
+        random.seed(0)
+        points = np.array([(random.uniform(0, 100), random.uniform(0, 100)) for _ in range(500)])
+        start = np.zeros(2)
+
+        tour = nearest_neighbour_tour(points, points, start)
+        self.assertEqual(sorted(tour.tolist()), list(range(500)))
+        self.assertEqual(tour[0], np.argmin(np.linalg.norm(points, axis=1)))
+
+        improved = two_opt(tour.copy(), points, points, start)
+        self.assertEqual(sorted(improved.tolist()), list(range(500)))
+        self.assertLessEqual(travel_length(improved, points, points, start),
+                             travel_length(tour, points, points, start))
+
+    def test_tour_from_exits(self):
+        # lines from left to right, the head goes on from the right end of every line to the nearest left end
+        entries = np.array([(0, 0), (10, 0), (-9, 0), (20, 0)], dtype=float)
+        exits = entries + (9, 0)
+        start = np.zeros(2)
+
+        tour = nearest_neighbour_tour(entries, exits, start)
+
+        self.assertEqual(tour.tolist(), [0, 1, 3, 2])
+        self.assertAlmostEqual(travel_length(tour, entries, exits, start), 1 + 1 + 38)
+
+    def test_two_opt_open_figures(self):
+        # lines from left to right, a crossing tour is untangled, the direction of the lines is kept
+        entries = np.array([(0, 0), (0, 10), (0, 20), (0, 30)], dtype=float)
+        exits = entries + (5, 0)
+        start = np.zeros(2)
+
+        tour = two_opt(np.array([0, 2, 1, 3]), entries, exits, start)
+
+        self.assertEqual(tour.tolist(), [0, 1, 2, 3])
+        self.assertAlmostEqual(travel_length(tour, entries, exits, start), 3 * np.hypot(5, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
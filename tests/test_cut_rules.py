@@ -0,0 +1,308 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.cut_rules import enforce_cut_rules, measure_figures, axes_curvature_radius, bezier_curvature_radius, \
+    check_tiles, find_close_figures, find_thin_webs, segment_distances
+from src.flattening import flatten_figures
+from src.svg_handler import read_svg_file
+
+CUT_RULES_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <defs>
+    <g id="hole"><circle cx="0" cy="0" r="0.4"/></g>
+  </defs>
+  <circle cx="50" cy="50" r="0.5"/>
+  <circle cx="60" cy="50" r="5"/>
+  <ellipse cx="20" cy="20" rx="10" ry="1"/>
+  <rect x="10" y="10" width="30" height="0.2"/>
+  <rect x="10" y="50" width="30" height="20" rx="0.3"/>
+  <line x1="0" y1="0" x2="0.1" y2="0"/>
+  <polygon points="0,0 0.2,0 0.2,5"/>
+  <path d="M 0,0 L 10,0 A 0.5,0.5 0 0 1 11,0 C 11,10 30,10 30,0"/>
+  <use href="#hole" x="10" y="20"/>
+  <use href="#hole" x="10" y="20" transform="scale(2)"/>
+</svg>
+"""
+
+DISTANCE_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <circle cx="20" cy="50" r="5"/>
+  <circle cx="30.5" cy="50" r="5"/>
+  <rect x="36.1" y="45" width="10" height="10"/>
+  <line x1="40" y1="40" x2="40" y2="60"/>
+  <circle cx="80" cy="50" r="5"/>
+</svg>
+"""
+
+WEB_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <polygon points="0,0 20,0 20,20 10.5,20 10.5,5 9.5,5 9.5,20 0,20"/>
+  <polygon points="30,0 40,0 40,4.5 50,4.5 50,0 60,0 60,10 50,10 50,5.5 40,5.5 40,10 30,10"/>
+  <circle cx="80" cy="50" r="1"/>
+  <rect x="100" y="0" width="20" height="20" rx="2"/>
+  <path d="M 130,0 h 20 v 20 h -20 z M 131,1 h 18 v 0.5 h -18 z"/>
+</svg>
+"""
+
+
+class TestCutRules(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'cut_rules.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write(CUT_RULES_SVG_CONTENT)
+            self.svg_figures = read_svg_file(svg_file)
+
+    def test_enforce_cut_rules(self):
+        violations = [violation for violation in enforce_cut_rules(self.svg_figures, thickness=1)
+                      if violation.rule not in ('distance', 'web_width')]
+
+        self.assertEqual([(violation.rule, violation.figure, violation.segment) for violation in violations],
+                         [('radius', 1, 0), ('radius', 3, 0), ('line_width', 4, 1), ('corner_radius', 5, 0),
+                          ('line_width', 6, 0), ('line_width', 7, 0), ('radius', 8, 1), ('radius', 9, 0)])
+        self.assertTrue(all(violation.limit == (0.3 if violation.rule == 'line_width' else 0.7)
+                            for violation in violations))
+        # the minimal radius of curvature of the ellipse is ry^2 / rx
+        self.assertAlmostEqual(violations[1].value, 0.1)
+        # the circle of the block is checked at the position of the first use, the scaled use is large enough
+        self.assertEqual(violations[-1].position, (10, 80))
+        self.assertAlmostEqual(violations[-1].value, 0.4)
+
+    def test_limits(self):
+        self.assertEqual([violation for violation in enforce_cut_rules(self.svg_figures, thickness=0.1,
+                                                                        min_line_width=0.05)
+                          if violation.rule not in ('distance', 'web_width')], [])
+        # the circle with radius 5 and the Bézier curve are too small for a thick material
+        violations = enforce_cut_rules(self.svg_figures, thickness=10, min_line_width=0.05)
+        self.assertIn(('radius', 2), [(violation.rule, violation.figure) for violation in violations])
+        self.assertIn(('radius', 8, 2), [(violation.rule, violation.figure, violation.segment)
+                                         for violation in violations])
+
+    def test_line_width_of_features(self):
+        circle = [(50 + 10 * np.cos(angle), 50 + 10 * np.sin(angle))
+                  for angle in np.linspace(0, 2 * np.pi, 400, endpoint=False)]
+        circle_points = " ".join(f"{x:.6f},{y:.6f}" for x, y in circle)
+        circle_lines = " ".join(f"L {x + 30:.6f},{y:.6f}" for x, y in circle[1:])
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'line_width.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write(f'''<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm"
+                    viewBox="0 0 200 100"><polygon points="{circle_points}"/><polyline points="{circle_points}"/>
+                    <path d="M {circle[0][0] + 30:.6f},{circle[0][1]:.6f} {circle_lines} Z M 0,0 h 10 v 0.2 h -10 z"/>
+                    <polygon points="0,0 10,0 10,0.1 10.1,0.1 10.1,5 0,5"/></svg>''')
+            svg_figures = read_svg_file(svg_file)
+
+        violations = [violation for violation in enforce_cut_rules(svg_figures, thickness=0.1)
+                      if violation.rule == 'line_width']
+
+        # the flattened circles are one feature each, not 400 short edges, the short sides of the thin rectangle of the
+        # path and the step of the last polygon are too short
+        self.assertEqual([(violation.figure, violation.segment) for violation in violations],
+                         [(3, 401), (3, 403), (4, 1), (4, 2)])
+        np.testing.assert_allclose([violation.value for violation in violations], [0.2, 0.2, 0.1, 0.1])
+
+    def test_distance(self):
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'distance.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write(DISTANCE_SVG_CONTENT)
+            svg_figures = read_svg_file(svg_file)
+
+        violations = [violation for violation in enforce_cut_rules(svg_figures, thickness=1)
+                      if violation.rule == 'distance']
+
+        # the circles are 0.5 mm apart, the rectangle 0.6 mm from the second circle, the crossing line has the
+        # distance 0 to the rectangle, the last circle is far enough
+        self.assertEqual([(violation.figure, violation.other) for violation in violations],
+                         [(1, 2), (2, 3), (3, 4)])
+        self.assertAlmostEqual(violations[0].value, 0.5, places=3)
+        self.assertAlmostEqual(violations[1].value, 0.6, places=3)
+        self.assertEqual(violations[2].value, 0)
+        np.testing.assert_allclose(violations[0].position, (25.25, 50), atol=1e-3)
+        self.assertTrue(all(violation.limit == 0.7 for violation in violations))
+
+    def test_distance_between_sub_paths(self):
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'sub_paths.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write('<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" '
+                                      'viewBox="0 0 200 100"><path d="M 0 0 L 10 0 L 10 10 L 0 10 Z '
+                                      'M 10.1 0 L 20 0 L 20 10 L 10.1 10 Z"/></svg>')
+            svg_figures = read_svg_file(svg_file)
+
+        # the two contours of the path are 0.1 mm apart, like two separate rectangles
+        for workers in (1, 2):
+            violations = [violation for violation in enforce_cut_rules(svg_figures, thickness=1, workers=workers)
+                          if violation.rule == 'distance']
+            self.assertEqual([(violation.figure, violation.other) for violation in violations], [(1, 1)])
+            self.assertAlmostEqual(violations[0].value, 0.1)
+
+    def test_distance_of_touching_lines(self):
+        # three open polylines forming one square touch at their end points, the joints are no gaps
+        polylines = [(0, np.array([(0, 0), (10, 0)], dtype=float), False),
+                     (1, np.array([(10, 0), (10, 10)], dtype=float), False),
+                     (2, np.array([(10, 10), (0, 10), (0, 0)], dtype=float), False)]
+        self.assertEqual(find_close_figures(polylines, 0.7), [])
+        self.assertEqual(check_tiles(polylines, 0.7, workers=2), ([], []))
+
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'touching.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write('<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" '
+                                      'viewBox="0 0 200 100"><line x1="0" y1="0" x2="10" y2="0"/>'
+                                      '<line x1="10" y1="0" x2="10" y2="10"/><line x1="10" y1="10" x2="0" y2="10"/>'
+                                      '<line x1="0" y1="10" x2="0" y2="0"/><line x1="10.5" y1="0" x2="10.5" y2="10"/>'
+                                      '<path d="M 50,50 L 60,50 M 60,50.001 L 60,60"/></svg>')
+            svg_figures = read_svg_file(svg_file)
+
+        # only the separate line 0.5 mm beside the square is too close (to the three lines reaching x = 10), the sub
+        # paths of the path meet at a point
+        for workers in (1, 2):
+            violations = [violation for violation in enforce_cut_rules(svg_figures, thickness=1, workers=workers)
+                          if violation.rule == 'distance']
+            self.assertEqual([(violation.figure, violation.other) for violation in violations],
+                             [(1, 5), (2, 5), (3, 5)])
+            self.assertAlmostEqual(violations[0].value, 0.5)
+
+    def test_web_width(self):
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'web.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write(WEB_SVG_CONTENT)
+            svg_figures = read_svg_file(svg_file)
+
+        all_violations = enforce_cut_rules(svg_figures, thickness=2)
+        violations = [violation for violation in all_violations if violation.rule == 'web_width']
+
+        # the slot of the first polygon and the neck of the second polygon are 1 mm wide, the inner contour of the
+        # path is a slot of 0.5 mm, the circle with the diameter of the minimal web width and the rounded rectangle
+        # are fine (the web of 1 mm between the two contours of the path is checked by the distance)
+        self.assertEqual([(violation.figure, violation.other, violation.value) for violation in all_violations
+                          if violation.rule == 'distance'], [(5, 5, 1)])
+        self.assertEqual([violation.figure for violation in violations], [1, 2, 5])
+        self.assertTrue(all(violation.limit == 1.4 for violation in violations))
+        self.assertAlmostEqual(violations[0].value, 1)
+        self.assertAlmostEqual(violations[1].value, 1)
+        self.assertEqual(violations[0].position[0], 10)
+        self.assertEqual(violations[1].position[1], 95)
+        self.assertAlmostEqual(violations[2].value, 0.5)
+
+    def test_web_width_of_compound_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'compound_path.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write('<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" '
+                                      'viewBox="0 0 200 100"><path d="M 0,0 h 20 v 20 h -20 z '
+                                      'M 2,0.5 h 16 v 17.5 h -16 z"/></svg>')
+            svg_figures = read_svg_file(svg_file)
+
+        violations = enforce_cut_rules(svg_figures, thickness=2)
+
+        # the bridge of 0.5 mm between the outer contour and the counter is the distance between the two contours of
+        # the path, the other bridges are 2 mm wide
+        self.assertEqual([(violation.rule, violation.figure, violation.other) for violation in violations],
+                         [('distance', 1, 1)])
+        self.assertAlmostEqual(violations[0].value, 0.5)
+        self.assertAlmostEqual(violations[0].position[1], 99.75)
+        self.assertEqual(find_thin_webs(flatten_figures(svg_figures), 1.4), [])
+
+    def test_find_thin_webs(self):
+        # the smallest width of a region is the smallest distance of two points, which are apart along the contour
+        points = np.array([(0, 0), (10, 0), (10, 3), (2, 3), (2, 3.5), (10, 3.5), (10, 10), (0, 10), (0, 0)],
+                          dtype=float)
+        webs = find_thin_webs([(4, points, True), (5, points[:5], False)], 1)
+        self.assertEqual(len(webs), 1)
+        figure, width, position = webs[0]
+        self.assertEqual(figure, 4)
+        self.assertAlmostEqual(width, 0.5)
+        self.assertAlmostEqual(position[1], 3.25)
+        self.assertEqual(find_thin_webs([(4, points, True)], 0.4), [])
+
+    def test_find_close_figures(self):
+        # the result is the same as comparing all pairs of edges
+        random = np.random.default_rng(0)
+        polylines = [(figure, random.uniform(0, 50, 2) + random.uniform(-3, 3, (random.integers(2, 6), 2)), False)
+                     for figure in range(100)]
+        close_figures = find_close_figures(polylines, 0.7)
+
+        edges = [(figure, points[index], points[index + 1]) for figure, points, _ in polylines
+                 for index in range(len(points) - 1)]
+        figures, starts, ends = (np.array(values) for values in zip(*edges))
+        first, second = np.triu_indices(len(edges), 1)
+        different = figures[first] != figures[second]
+        first, second = first[different], second[different]
+        distances, _, _ = segment_distances(starts[first], ends[first], starts[second], ends[second])
+        expected = {}
+        for figure, other, distance in zip(figures[first], figures[second], distances):
+            if distance < 0.7:
+                pair = (min(figure, other), max(figure, other))
+                expected[pair] = min(expected.get(pair, distance), distance)
+
+        self.assertEqual([(figure, other) for figure, other, _, _ in close_figures], sorted(expected))
+        np.testing.assert_allclose([distance for _, _, distance, _ in close_figures],
+                                   [expected[pair] for pair in sorted(expected)])
+
+    def test_check_tiles(self):
+        # the tiles give the same result as the whole sheet: open polylines, closed polylines with thin webs and
+        # polylines over several tiles
+        random = np.random.default_rng(1)
+        slot = np.array([(0, 0), (6, 0), (6, 6), (3.2, 6), (3.2, 2), (2.8, 2), (2.8, 6), (0, 6), (0, 0)], dtype=float)
+        polylines = [(figure, random.uniform(0, 50, 2) + random.uniform(-3, 3, (random.integers(2, 6), 2)), False)
+                     for figure in range(100)]
+        polylines += [(figure, slot + random.uniform(0, 50, 2), True) for figure in range(100, 150)]
+        polylines += [(150, np.array([(0, 25), (50, 25.5)]), False)]
+
+        with mock.patch('src.cut_rules.TILES_PER_WORKER', 8):
+            close_figures, webs = check_tiles(polylines, 0.7, workers=2)
+
+        self.assertEqual(close_figures, find_close_figures(polylines, 0.7))
+        self.assertEqual(webs, find_thin_webs(polylines, 0.7))
+        self.assertEqual(len(webs), 50)
+        self.assertIn(150, [other for _, other, _, _ in close_figures])
+
+    def test_enforce_cut_rules_parallel(self):
+        self.assertEqual(enforce_cut_rules(self.svg_figures, thickness=1, workers=2),
+                         enforce_cut_rules(self.svg_figures, thickness=1))
+
+    def test_segment_distances(self):
+        starts_a = np.array([(0, 0), (0, 0), (0, 0)], dtype=float)
+        ends_a = np.array([(2, 0), (2, 2), (1, 0)], dtype=float)
+        starts_b = np.array([(1, 1), (0, 2), (3, 0)], dtype=float)
+        ends_b = np.array([(1, 3), (2, 0), (4, 0)], dtype=float)
+
+        distances, closest_a, closest_b = segment_distances(starts_a, ends_a, starts_b, ends_b)
+
+        np.testing.assert_allclose(distances, (1, 0, 2))
+        np.testing.assert_allclose(closest_a, ((1, 0), (1, 1), (1, 0)))
+        np.testing.assert_allclose(closest_b, ((1, 1), (1, 1), (3, 0)))
+
+    def test_measure_figures(self):
+        measurements = measure_figures(self.svg_figures)
+        for rule, figures, segments, values, positions in measurements:
+            self.assertIn(rule, ('radius', 'corner_radius', 'line_width'))
+            self.assertEqual((len(figures), len(segments), len(values)), (len(positions),) * 3)
+        # the header is not measured
+        self.assertNotIn(0, np.concatenate([figures for _, figures, _, _, _ in measurements]))
+
+    def test_curvature_radius(self):
+        # a rotated ellipse with the semi-axes sqrt(8) and sqrt(0.5)
+        axes = np.array([[(2, 2), (-0.5, 0.5)]])
+        np.testing.assert_allclose(axes_curvature_radius(axes), [0.5 / np.sqrt(8)])
+
+        # a quarter circle with radius 1 approximated by a cubic Bézier curve
+        k = 4 / 3 * (np.sqrt(2) - 1)
+        values, positions = bezier_curvature_radius(np.array([[(1, 0), (1, k), (k, 1), (0, 1)]]))
+        self.assertAlmostEqual(values[0], 1, delta=0.02)
+        self.assertAlmostEqual(np.linalg.norm(positions[0]), 1, places=3)
+
+        # a straight curve has no curvature
+        values, _ = bezier_curvature_radius(np.array([[(0, 0), (1, 0), (2, 0), (3, 0)]]))
+        self.assertEqual(values[0], np.inf)
+
+
+if __name__ == "__main__":
+    unittest.main()
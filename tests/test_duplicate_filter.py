@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+from src.duplicate_filter import DuplicateFilter, remove_duplicates, ring_variants, point_variants
+from src.svg_handler import read_svg_file, iter_svg_file
+
+DUPLICATES_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <circle cx="50" cy="50" r="10"/>
+  <circle cx="50.0001" cy="50" r="10"/>
+  <circle cx="50" cy="50" r="11"/>
+  <line x1="0" y1="0" x2="100" y2="50"/>
+  <line x1="100" y1="50" x2="0" y2="0"/>
+  <polygon points="80,50 150,130 50,150"/>
+  <polygon points="50,150 150,130 80,50"/>
+  <polyline points="0,0 10,10 20,0"/>
+  <polyline points="20,0 10,10 0,0"/>
+  <rect x="10" y="10" width="30" height="20"/>
+  <rect x="10" y="10" width="30" height="20"/>
+  <path d="M 0,0 L 100,50 A 10,10 0 0 1 120,50 C 130,60 140,60 150,50"/>
+  <path d="M 150,50 C 140,60 130,60 120,50 A 10,10 0 0 0 100,50"/>
+  <path d="M 120,50 A 10,10 0 0 0 100,50 L 100,80"/>
+</svg>
+"""
+
+
+class TestDuplicateFilter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.svg_file = os.path.join(self.directory.name, 'duplicates.svg')
+        with open(self.svg_file, 'w') as svg_file:
+            svg_file.write(DUPLICATES_SVG_CONTENT)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_remove_duplicates(self):
+        svg_figures = read_svg_file(self.svg_file)
+
+        figures, removed = remove_duplicates(svg_figures)
+
+        # circle, line, polygon, polyline, rectangle and the reversed path are removed, the first path looses its line
+        # and the last path its arc
+        self.assertEqual(removed, 8)
+        self.assertEqual([figure.get_name() for figure in figures],
+                         ['header', 'circle', 'circle', 'line', 'polygon', 'polyline', 'rectangle', 'path', 'path'])
+        self.assertEqual(figures[2].radius, 11)
+        # the line of the first path is a duplicate of the line figure
+        self.assertEqual([type(segment).__name__ for segment in figures[7].parsed_path], ['Arc', 'CubicBezier'])
+        self.assertEqual([type(segment).__name__ for segment in figures[8].parsed_path], ['Line'])
+
+    def test_tolerance(self):
+        figures, removed = remove_duplicates(read_svg_file(self.svg_file), tolerance=1e-5)
+        # the moved circle is no duplicate
+        self.assertEqual(removed, 7)
+        self.assertEqual([figure.get_name() for figure in figures].count('circle'), 3)
+
+    def test_filter_streaming(self):
+        duplicate_filter = DuplicateFilter()
+
+        figures = list(duplicate_filter.filter(iter_svg_file(self.svg_file)))
+
+        self.assertEqual(len(figures), 9)
+        self.assertEqual((duplicate_filter.removed_figures, duplicate_filter.removed_segments), (6, 2))
+
+    def test_geometry_variants(self):
+        square = [(0, 0), (1, 0), (1, 1), (0, 1)]
+        # the square starts at its smallest point, the points on the left side are start points of the other variants
+        self.assertEqual(ring_variants(square[2:] + square[:2], 1e-3),
+                         [(0, 0, 1, 0, 1, 1, 0, 1), (0, 0, 0, 1, 1, 1, 1, 0),
+                          (0, 1, 0, 0, 1, 0, 1, 1), (0, 1, 1, 1, 1, 0, 0, 0)])
+        self.assertEqual(ring_variants(square + square[:1], 1e-3), ring_variants(square, 1e-3))
+        self.assertEqual(point_variants([(2, 0), (1, 1), (0, 0)]), [(2, 0, 1, 1, 0, 0), (0, 0, 1, 1, 2, 0)])
+        self.assertEqual(ring_variants([], 1e-3), [])
+
+    def test_reversed_and_jittered_duplicates(self):
+        with open(self.svg_file, 'w') as svg_file:
+            svg_file.write('''<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+              <line x1="10" y1="5" x2="10" y2="0"/>
+              <line x1="9.9998" y1="0" x2="10.0002" y2="5"/>
+              <polyline points="20,0 30,0.0004 40,0"/>
+              <polyline points="40.0003,0 30,0 19.9997,0.0002"/>
+              <polygon points="50,0 60,0 60,10 50.0004,10"/>
+              <polygon points="50.0003,10 60,10.0002 60,0 49.9998,0"/>
+              <polygon points="70,0 80,0 80,10 70.002,10"/>
+              <polygon points="70,10 80,10 80,0 70,0"/>
+              <path d="M 100,0 L 110,0"/>
+              <path d="M 110.0004,0 L 99.9996,0.0003"/>
+            </svg>''')
+
+        figures, removed = remove_duplicates(read_svg_file(self.svg_file))
+
+        # the reversed line, polyline, polygon and path segment within the tolerance are removed, the last polygon is
+        # 0.002 mm apart at a corner
+        self.assertEqual(removed, 4)
+        self.assertEqual([figure.get_name() for figure in figures],
+                         ['header', 'line', 'polyline', 'polygon', 'polygon', 'polygon', 'path'])
+
+    def test_empty_polygons(self):
+        with open(self.svg_file, 'w') as svg_file:
+            svg_file.write('<svg xmlns="http://www.w3.org/2000/svg" width="10mm" height="10mm" viewBox="0 0 10 10">'
+                           '<polygon points=""/><polygon points=""/></svg>')
+
+        figures, removed = remove_duplicates(read_svg_file(self.svg_file))
+
+        # figures without points are never duplicates
+        self.assertEqual(removed, 0)
+        self.assertEqual([figure.get_name() for figure in figures], ['header', 'polygon', 'polygon'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import os
+import tempfile
+import unittest
+
+import ezdxf
+from ezdxf.path import from_vertices, render_splines_and_polylines
+
+from src.dxf_handler import write_dxf_streaming
+from src.dxf_stream_writer import DxfStreamWriter
+from src.svg_handler import iter_svg_file
+from src.svg_shapes.svgLine import SvgLine
+
+
+def entity_attributes(entity):
+    """attributes of an entity without handle and owner, to compare the entities of two documents"""
+    attributes = entity.dxf.all_existing_dxf_attribs()
+    attributes.pop('handle', None)
+    attributes.pop('owner', None)
+    return entity.dxftype(), {key: str(value) for key, value in attributes.items()}
+
+
+class TestDxfStreamWriter(unittest.TestCase):
+    def draw(self, layout):
+        layout.add_line((0, 0), (1, 2))
+        layout.add_circle((1, 2), 3)
+        layout.add_arc(center=(1, 2), radius=3, start_angle=10, end_angle=20, is_counter_clockwise=False)
+        layout.add_ellipse(center=(0, 0), major_axis=(2, 0), ratio=0.5, start_param=0, end_param=1)
+        layout.add_lwpolyline([(0, 0), (1, 0), (1, 1)], close=True)
+        layout.add_lwpolyline([(0, 0, 0.5), (1, 0, 0)], format='xyb')
+        dxf_path = from_vertices([(0, 0)])
+        dxf_path.curve4_to((3, 0), (1, 1), (2, 1))
+        render_splines_and_polylines(layout, [dxf_path])
+
+    def test_entities_as_ezdxf(self):
+        doc = ezdxf.new()
+        self.draw(doc.modelspace())
+
+        stream = io.StringIO()
+        with DxfStreamWriter(stream) as writer:
+            self.draw(writer)
+        self.assertEqual(writer.entity_count, 7)
+
+        streamed_doc = ezdxf.read(io.StringIO(stream.getvalue()))
+        self.assertEqual([entity_attributes(entity) for entity in streamed_doc.modelspace()],
+                         [entity_attributes(entity) for entity in doc.modelspace()])
+        self.assertEqual(streamed_doc.modelspace()[5].get_points('xyb'), [(0, 0, 0.5), (1, 0, 0)])
+        auditor = streamed_doc.audit()
+        self.assertEqual((len(auditor.errors), len(auditor.fixes)), (0, 0))
+
+    def test_binary_dxf(self):
+        doc = ezdxf.new()
+        self.draw(doc.modelspace())
+
+        dxf_file = tempfile.NamedTemporaryFile(suffix='.dxf', delete=False)
+        with dxf_file:
+            with DxfStreamWriter(dxf_file, 'bin') as writer:
+                self.draw(writer)
+        with open(dxf_file.name, 'rb') as binary_file:
+            self.assertTrue(binary_file.read().startswith(b"AutoCAD Binary DXF"))
+        streamed_doc = ezdxf.readfile(dxf_file.name)
+        os.remove(dxf_file.name)
+
+        self.assertEqual([entity_attributes(entity) for entity in streamed_doc.modelspace()],
+                         [entity_attributes(entity) for entity in doc.modelspace()])
+        self.assertRaises(ValueError, DxfStreamWriter, io.StringIO(), 'xml')
+
+    def test_exploded_block_reference(self):
+        stream = io.StringIO()
+        with DxfStreamWriter(stream) as writer:
+            block = writer.doc.blocks.new('hole')
+            block.add_circle((1, 0), 1)
+            writer.add_blockref('hole', (10, 10), dxfattribs={'rotation': 90})
+
+        circle, = ezdxf.read(io.StringIO(stream.getvalue())).modelspace()
+        self.assertEqual(circle.dxftype(), 'CIRCLE')
+        self.assertAlmostEqual(circle.dxf.center.x, 10)
+        self.assertAlmostEqual(circle.dxf.center.y, 11)
+
+    def test_write_dxf_streaming(self):
+        directory = tempfile.mkdtemp()
+        svg_path = os.path.join(directory, 'lines.svg')
+        with open(svg_path, 'w') as svg_file:
+            svg_file.write('<svg xmlns="http://www.w3.org/2000/svg" width="10mm" height="10mm" viewBox="0 0 10 10">'
+                           + '<line x1="0" y1="0" x2="1" y2="1"/>' * 3 + '</svg>')
+        dxf_path = os.path.join(directory, 'lines.dxf')
+
+        def figures():
+            # the head of the file is written, before the first figure is consumed
+            yield next(svg_figures)
+            self.assertGreater(os.path.getsize(dxf_path), 0)
+            yield from svg_figures
+
+        svg_figures = iter_svg_file(svg_path)
+        self.assertEqual(write_dxf_streaming(figures(), 'lines', directory), dxf_path)
+        lines = ezdxf.readfile(dxf_path).modelspace()
+        self.assertEqual([(line.dxf.start.y, line.dxf.end.y) for line in lines], [(10, 9)] * 3)
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from svgpathtools import parse_path
+
+from src.flattening import flatten_figures, polyline_edges
+from src.svg_handler import read_svg_file
+
+FLATTENING_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <path d="M 10,10 A 5,3 30 0 1 20,15 A 5,5 0 1 0 30,15 Q 50,0 60,20 C 70,0 80,40 90,20 M 0,0 L 5,0"/>
+  <circle cx="100" cy="50" r="10"/>
+  <rect x="10" y="50" width="30" height="20" rx="3" ry="2"/>
+  <ellipse cx="150" cy="50" rx="10" ry="5" transform="rotate(30, 150, 50)"/>
+  <polygon points="0,0 10,0 10,10"/>
+  <line x1="0" y1="0" x2="10" y2="5"/>
+</svg>
+"""
+
+
+class TestFlattening(unittest.TestCase):
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as directory:
+            svg_file = os.path.join(directory, 'flattening.svg')
+            with open(svg_file, 'w') as svg_file_handle:
+                svg_file_handle.write(FLATTENING_SVG_CONTENT)
+            self.svg_figures = read_svg_file(svg_file)
+
+    def test_flatten_figures(self):
+        polylines = flatten_figures(self.svg_figures, tolerance=0.01)
+
+        self.assertEqual([(figure, closed) for figure, _, closed in polylines],
+                         [(1, False), (1, False), (2, True), (3, True), (4, True), (5, True), (6, False)])
+        # the path is split at its move command
+        np.testing.assert_allclose(polylines[1][1], [(0, 100), (5, 100)])
+        # the vertices lie on the circle
+        circle = polylines[2][1]
+        np.testing.assert_allclose(np.linalg.norm(circle - (100, 50), axis=1), 10)
+        # the rounded rectangle keeps its extent
+        np.testing.assert_allclose(polylines[3][1].min(axis=0), (10, 30))
+        np.testing.assert_allclose(polylines[3][1].max(axis=0), (40, 50))
+
+    def test_path_within_tolerance(self):
+        tolerance = 0.01
+        points = flatten_figures(self.svg_figures, tolerance)[0][1]
+
+        # the vertices lie on the path (in cartesian coordinates) and every part of the path is near the polyline
+        path = parse_path("M 10,10 A 5,3 30 0 1 20,15 A 5,5 0 1 0 30,15 Q 50,0 60,20 C 70,0 80,40 90,20")
+        samples = np.array([(point.real, 100 - point.imag) for segment in path
+                            for point in map(segment.point, np.linspace(0, 1, 5000))])
+        vertex_distances = np.linalg.norm(points[:, None] - samples[None], axis=2).min(axis=1)
+        self.assertLess(vertex_distances.max(), 0.01)
+        starts, ends = points[:-1], points[1:]
+        direction = ends - starts
+        t = np.clip(np.einsum('sij,ij->si', samples[:, None] - starts[None], direction) /
+                    np.einsum('ij,ij->i', direction, direction), 0, 1)
+        sample_distances = np.linalg.norm(samples[:, None] - (starts + t[..., None] * direction), axis=2).min(axis=1)
+        self.assertLess(sample_distances.max(), 2 * tolerance)
+
+    def test_polyline_edges(self):
+        starts, ends, figures = polyline_edges(flatten_figures(self.svg_figures)[-2:])
+        self.assertEqual(figures.tolist(), [5, 5, 5, 6])
+        np.testing.assert_allclose(starts[-1], (0, 100))
+        np.testing.assert_allclose(ends[-1], (10, 95))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,10 @@
 import math
 import unittest
-from unittest.mock import Mock, MagicMock, patch
+from unittest.mock import Mock, patch
 
-from src.shapes.path import Path, draw_circular_arc, draw_rotated_elliptic_arc, approximate_cubic_bezier_curve, \
-    approximate_quadratic_bezier_curve
+import ezdxf
+
+from src.shapes.path import Path, draw_circular_arc, draw_rotated_elliptic_arc, arc_bulge, flatten_bezier_curves
 from src.svg_shapes import SvgPath
 from src.utilities import change_svg_to_dxf_coordinate
 
@@ -12,7 +13,6 @@ class TestPath(unittest.TestCase):
     def setUp(self):
         self.svg_height = 500
         self.msp_mock = Mock()
-        self.mock_from_vertices = MagicMock(return_value=MagicMock())
 
         element_path = {'d': "M 50,250 L 150,50 C 200,150 300,150 350,50 Q 400,0 450,50 A 50,25 45 1 1 400,150 "
                              "L 300,250 C 250,350 150,350 100,250 Q 75,200 50,250 Z"}
@@ -28,24 +28,112 @@ class TestPath(unittest.TestCase):
         test_path = Path(self.svg_complicated_path)
         self.assertEqual(test_path.parsed_path, self.svg_complicated_path.parsed_path)
 
-    @patch("src.shapes.path.approximate_cubic_bezier_curve")
-    @patch("src.shapes.path.approximate_quadratic_bezier_curve")
+    @patch("src.shapes.path.render_splines_and_polylines")
+    @patch("src.shapes.path.add_bezier_curve")
     @patch("src.shapes.path.draw_rotated_elliptic_arc")
     @patch("src.shapes.path.draw_circular_arc")
-    def test_draw_svg_path(self, mock_circular_arc, mock_elliptic_arc, mock_approx_quadratic, mock_approx_cubic):
+    def test_draw_svg_path(self, mock_circular_arc, mock_elliptic_arc, mock_add_bezier, mock_render):
         test_path = Path(self.svg_complicated_path)
 
         test_path.draw_svg_path(self.msp_mock)
 
-        assert self.msp_mock.add_line.call_count == 3
+        assert self.msp_mock.add_line.call_count == 2
 
-        assert mock_approx_cubic.call_count == 2
-
-        assert mock_approx_quadratic.call_count == 2
+        # the consecutive Bézier curves are collected in one path, the two runs are rendered one after the other
+        assert mock_add_bezier.call_count == 4
+        assert mock_render.call_count == 2
+        mock_render.assert_called_with(self.msp_mock, [mock_add_bezier.return_value], g1_tol=Path.G1_TOL)
 
         assert mock_elliptic_arc.call_count == 1
 
-        assert mock_circular_arc.call_count == 1
+        # the circular arc and the closing line are merged into one closed polyline
+        assert mock_circular_arc.call_count == 0
+        self.msp_mock.add_lwpolyline.assert_called_once()
+        vertices = self.msp_mock.add_lwpolyline.call_args.args[0]
+        self.assertEqual([vertex[:2] for vertex in vertices], [(50, 250), (150, 250)])
+        self.assertAlmostEqual(vertices[0][2], -1)
+        self.assertEqual(self.msp_mock.add_lwpolyline.call_args.kwargs, {'format': 'xyb', 'close': True})
+
+    def test_draw_svg_path_polyline(self):
+        svg_path = SvgPath({'d': "M 0,0 L 10,0 A 5,5 0 0 0 20,0 L 20,10 M 30,0 L 40,0"}, 0)
+
+        Path(svg_path).draw_svg_path(self.msp_mock)
+
+        # the arc goes counterclockwise in cartesian coordinates, the second sub path is a single line
+        self.msp_mock.add_lwpolyline.assert_called_once()
+        vertices = self.msp_mock.add_lwpolyline.call_args.args[0]
+        self.assertEqual([vertex[:2] for vertex in vertices], [(0, 0), (10, 0), (20, 0), (20, -10)])
+        self.assertEqual(vertices[0][2], 0)
+        self.assertAlmostEqual(vertices[1][2], 1)
+        self.assertEqual(self.msp_mock.add_lwpolyline.call_args.kwargs, {'format': 'xyb', 'close': False})
+        self.msp_mock.add_line.assert_called_once_with(start=(30, 0), end=(40, 0))
+
+    def test_draw_svg_path_joins_bezier_curves(self):
+        doc = ezdxf.new()
+        msp = doc.modelspace()
+        # two smooth curves, a corner, a line and a separate curve
+        svg_path = SvgPath({'d': "M 0,0 C 10,10 20,10 30,0 S 50,-10 60,0 Q 70,20 80,0 L 90,0 M 100,0 Q 110,10 120,0"},
+                           0)
+
+        Path(svg_path).draw_svg_path(msp)
+
+        # the entities are added in the order of the path
+        self.assertEqual([entity.dxftype() for entity in msp], ['SPLINE', 'SPLINE', 'LINE', 'SPLINE'])
+        splines = msp.query('SPLINE')
+        self.assertEqual(tuple(splines[0].control_points[0]), (0, 0, 0))
+        self.assertEqual(tuple(splines[0].control_points[-1]), (60, 0, 0))
+
+    def test_draw_svg_path_flattened(self):
+        svg_path = SvgPath({'d': "M 0,0 C 0,10 10,10 10,0 Q 5,-10 0,0 M 20,0 L 30,0 Q 40,10 50,0"}, 0)
+
+        Path(svg_path, flatten_tolerance=0.01).draw_svg_path(self.msp_mock)
+
+        self.msp_mock.add_line.assert_called_once_with(start=(20, 0), end=(30, 0))
+        self.assertEqual(self.msp_mock.add_lwpolyline.call_count, 2)
+        # the line is drawn between the curves, in the order of the path
+        self.assertEqual([call[0] for call in self.msp_mock.method_calls],
+                         ['add_lwpolyline', 'add_line', 'add_lwpolyline'])
+        closed_curves, open_curve = self.msp_mock.add_lwpolyline.call_args_list
+        self.assertEqual(closed_curves.kwargs, {'format': 'xy', 'close': True})
+        self.assertEqual(open_curve.kwargs, {'format': 'xy', 'close': False})
+        self.assertEqual(tuple(open_curve.args[0][-1]), (50, 0))
+        # the closed polyline does not repeat its first vertex, thus it has no closing edge of zero length
+        self.assertEqual(tuple(closed_curves.args[0][0]), (0, 0))
+        self.assertNotEqual(tuple(closed_curves.args[0][-1]), (0, 0))
+        self.msp_mock.add_spline.assert_not_called()
+
+    def test_flatten_bezier_curves(self):
+        segments = list(SvgPath({'d': "M 0,0 C 0,30 40,30 40,0 Q 60,-40 80,0 M 100,0 Q 101,0 102,0"}, 0).parsed_path)
+
+        for tolerance in (1, 0.1, 0.01):
+            polylines = flatten_bezier_curves(segments, tolerance, Path.MIN_SEGMENTS)
+
+            self.assertEqual(len(polylines), 2)
+            # the straight curve is split into the minimal number of lines
+            self.assertEqual(len(polylines[1]), Path.MIN_SEGMENTS + 1)
+            for polyline, start, end in ((polylines[0], (0, 0), (80, 0)), (polylines[1], (100, 0), (102, 0))):
+                self.assertEqual(tuple(polyline[0]), start)
+                self.assertEqual(tuple(polyline[-1]), end)
+
+            # the distance of the curves to the chords of the polyline is within the tolerance
+            for segment in segments[:2]:
+                for t in [i / 200 for i in range(201)]:
+                    point = segment.point(t)
+                    starts, ends = polylines[0][:-1], polylines[0][1:]
+                    chords = ends - starts
+                    u = ((point.real - starts[:, 0]) * chords[:, 0] + (point.imag - starts[:, 1]) * chords[:, 1]) / \
+                        (chords ** 2).sum(axis=1)
+                    u = u.clip(0, 1)
+                    distance = min(math.hypot(point.real - x, point.imag - y)
+                                   for x, y in starts + u[:, None] * chords)
+                    self.assertLessEqual(distance, tolerance)
+
+    def test_arc_bulge(self):
+        quarter_arc = SvgPath({'d': "M 10,0 A 10,10 0 0 1 0,10"}, 0).parsed_path[0]
+        self.assertAlmostEqual(arc_bulge(quarter_arc), -math.tan(math.pi / 8))
+
+        large_arc = SvgPath({'d': "M 10,0 A 10,10 0 1 0 0,10"}, 0).parsed_path[0]
+        self.assertAlmostEqual(arc_bulge(large_arc), math.tan(3 * math.pi / 8))
 
     def test_draw_circular_arc(self):
         center = (0, 0)
@@ -167,40 +255,42 @@ class TestPath(unittest.TestCase):
                                                           end_param=0.8592535618281213)
         self.msp_mock.reset_mock()
 
-    @patch("src.shapes.path.render_splines_and_polylines")
-    @patch("src.shapes.path.from_vertices")
-    def test_approximation_of_cubic_bezier_curves(self, mock_from_vertices, mock_render):
-        mock_dxf_path = MagicMock()
-        mock_from_vertices.return_value = mock_dxf_path
-
+    def test_draw_svg_path_cubic_bezier_curve(self):
+        msp = ezdxf.new().modelspace()
         height = 400
         path_el = {'d': "M 150.0,50.0 C 200.0,150.0 300.0,150.0 350.0,50.0"}
-        cubic_bez_path = SvgPath(path_el, height)
-        approximate_cubic_bezier_curve(cubic_bez_path.parsed_path.__getitem__(0), self.msp_mock)
-
-        mock_from_vertices.assert_called_once_with([(0, 0)])
-
-        mock_dxf_path.move_to.assert_called_once_with((150.0, 350.0))
+        Path(SvgPath(path_el, height)).draw_svg_path(msp)
 
-        mock_dxf_path.curve4_to.assert_called_once_with((350, 350), (200, 250), (300, 250))
-
-        mock_render.assert_called_once_with(self.msp_mock, [mock_dxf_path])
-
-    @patch("src.shapes.path.render_splines_and_polylines")
-    @patch("src.shapes.path.from_vertices")
-    def test_approximation_of_quadratic_bezier_curves(self, mock_from_vertices, mock_render):
-        mock_dxf_path = MagicMock()
-        mock_from_vertices.return_value = mock_dxf_path
+        splines = msp.query('SPLINE')
+        self.assertEqual(len(msp), 1)
+        self.assertEqual(splines[0].dxf.degree, 3)
+        self.assertEqual([tuple(point) for point in splines[0].control_points],
+                         [(150, 350, 0), (200, 250, 0), (300, 250, 0), (350, 350, 0)])
 
+    def test_draw_svg_path_quadratic_bezier_curve(self):
+        msp = ezdxf.new().modelspace()
         height = 400
         path = {'d': "M 150.0,50.0 Q 200.0,150.0 350.0,50.0"}
-        quadratic_bezier_curve = SvgPath(path, height)
-        approximate_quadratic_bezier_curve(quadratic_bezier_curve.parsed_path.__getitem__(0), self.msp_mock)
-
-        mock_from_vertices.assert_called_once_with([(0, 0)])
-
-        mock_dxf_path.move_to.assert_called_once_with((150.0, 350.0))
-
-        mock_dxf_path.curve3_to.assert_called_once_with((350, 350), (200, 250))
-
-        mock_render.assert_called_once_with(self.msp_mock, [mock_dxf_path])
+        Path(SvgPath(path, height)).draw_svg_path(msp)
+
+        # the quadratic curve is elevated to a cubic spline
+        splines = msp.query('SPLINE')
+        self.assertEqual(len(msp), 1)
+        self.assertEqual(splines[0].dxf.degree, 3)
+        expected = [(150, 350), (150 + 2 / 3 * 50, 350 - 2 / 3 * 100), (350 - 2 / 3 * 150, 350 - 2 / 3 * 100),
+                    (350, 350)]
+        for point, (x, y) in zip(splines[0].control_points, expected):
+            self.assertAlmostEqual(point[0], x)
+            self.assertAlmostEqual(point[1], y)
+
+    def test_draw_svg_path_contiguous_bezier_curves(self):
+        msp = ezdxf.new().modelspace()
+        path = {'d': "M 0,0 C 10,10 20,10 30,0 Q 40,-10 50,0 M 100,0 C 110,10 120,10 130,0"}
+        Path(SvgPath(path, 100)).draw_svg_path(msp)
+
+        # the two contiguous curves give one spline, the curve of the second sub path its own spline
+        splines = msp.query('SPLINE')
+        self.assertEqual(len(splines), 2)
+        self.assertEqual(tuple(splines[0].control_points[0])[:2], (0, 100))
+        self.assertEqual(tuple(splines[0].control_points[-1])[:2], (50, 100))
+        self.assertEqual(tuple(splines[1].control_points[0])[:2], (100, 100))
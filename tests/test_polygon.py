@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import Mock
 
+import numpy as np
+
 from src.shapes.polygon import Polygon
 from src.svg_shapes import SvgPolygon
 from src.utilities import change_svg_to_dxf_coordinate
@@ -26,12 +28,12 @@ class TestPolygon(unittest.TestCase):
 
         polygon = Polygon(self.svg_polygon)
 
-        self.assertEqual(polygon.points_list, manual_points)
+        np.testing.assert_array_equal(polygon.points_list, manual_points)
 
     def test_empty_points(self):
         empty_polygon = Polygon(self.svg_empty_polygon)
 
-        self.assertEqual(empty_polygon.points_list, [])
+        self.assertEqual(empty_polygon.points_list.shape, (0, 2))
 
     def test_draw_dxf_polygon(self):
         polygon = Polygon(self.svg_polygon)
@@ -0,0 +1,40 @@
+import pickle
+import unittest
+
+import ezdxf
+from ezdxf.entities import factory
+
+from src.recording_layout import RecordingLayout
+
+
+class TestRecordingLayout(unittest.TestCase):
+    def test_replay(self):
+        recording = RecordingLayout()
+        recording.add_line((0, 0), (1, 1))
+        recording.add_lwpolyline([(0, 0, 0), (1, 0, -1)], format='xyb', close=True)
+        spline = factory.new('SPLINE')
+        spline.set_open_uniform([(0, 0, 0), (1, 1, 0), (2, 0, 0), (3, 1, 0)], degree=3)
+        recording.add_entity(spline)
+
+        # the records can be sent to another process
+        recording = pickle.loads(pickle.dumps(recording))
+        doc = ezdxf.new()
+        msp = doc.modelspace()
+        recording.replay(msp)
+
+        self.assertEqual([entity.dxftype() for entity in msp], ['LINE', 'LWPOLYLINE', 'SPLINE'])
+        self.assertTrue(msp[1].closed)
+        self.assertEqual([tuple(point) for point in msp[2].control_points],
+                         [(0, 0, 0), (1, 1, 0), (2, 0, 0), (3, 1, 0)])
+        self.assertEqual(list(msp[2].knots), list(spline.knots))
+
+    def test_unsupported(self):
+        recording = RecordingLayout()
+        with self.assertRaises(AttributeError):
+            recording.query('LINE')
+        with self.assertRaises(TypeError):
+            recording.add_entity(factory.new('INSERT'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.cut_rules import enforce_cut_rules
+from src.flattening import flatten_figures
+from src.rule_cache import build_spatial_index, enforce_cut_rules_cached, geometry_hashes, load_rule_cache
+from src.svg_handler import read_svg_file
+
+SHEET_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <defs>
+    <g id="hole"><circle cx="0" cy="0" r="0.4"/></g>
+  </defs>
+  <rect x="0" y="0" width="200" height="100"/>
+  <circle cx="20" cy="50" r="5"/>
+  <circle cx="30.5" cy="50" r="5"/>
+  <rect x="36.1" y="45" width="10" height="10" rx="0.3"/>
+  <polygon points="60,40 80,40 80,60 70.5,60 70.5,45 69.5,45 69.5,60 60,60"/>
+  <path d="M 100,40 h 20 a 2,2 0 0 1 2,2 v 10 c 0,5 -10,5 -12,5 z"/>
+  <use href="#hole" x="150" y="50"/>
+  <circle cx="180" cy="50" r="5"/>
+</svg>
+"""
+
+
+class TestRuleCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.directory.name, 'sheet.rules.npz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_sheet(self, content):
+        svg_file = os.path.join(self.directory.name, 'sheet.svg')
+        with open(svg_file, 'w') as svg_file_handle:
+            svg_file_handle.write(content)
+        return read_svg_file(svg_file)
+
+    def assertSameViolations(self, violations, expected):
+        self.assertEqual([(violation.rule, violation.figure, violation.segment, violation.other)
+                          for violation in violations],
+                         [(violation.rule, violation.figure, violation.segment, violation.other)
+                          for violation in expected])
+        np.testing.assert_allclose([violation.value for violation in violations],
+                                   [violation.value for violation in expected], atol=1e-9)
+
+    def test_enforce_cut_rules_cached(self):
+        svg_figures = self.read_sheet(SHEET_SVG_CONTENT)
+        violations = enforce_cut_rules_cached(svg_figures, 1, self.cache_file)
+        self.assertEqual(violations, enforce_cut_rules(svg_figures, 1))
+        self.assertEqual(enforce_cut_rules_cached(svg_figures, 1, self.cache_file), violations)
+
+        # a figure is removed (the indices of the following figures change), a circle is moved next to the use of
+        # the block and a new figure is added
+        edited = SHEET_SVG_CONTENT.replace('  <circle cx="20" cy="50" r="5"/>\n', '') \
+            .replace('cx="180"', 'cx="156"').replace('</svg>', '<circle cx="190" cy="90" r="0.5"/>\n</svg>')
+        svg_figures = self.read_sheet(edited)
+        violations = enforce_cut_rules_cached(svg_figures, 1, self.cache_file)
+        self.assertSameViolations(violations, enforce_cut_rules(svg_figures, 1))
+        self.assertIn(('distance', 6, 7), [(violation.rule, violation.figure, violation.other)
+                                           for violation in violations])
+
+        # other parameters replace the cache
+        self.assertEqual(enforce_cut_rules_cached(svg_figures, 2, self.cache_file), enforce_cut_rules(svg_figures, 2))
+
+    def test_broken_cache(self):
+        with open(self.cache_file, 'w') as cache_file:
+            cache_file.write("broken")
+        self.assertIsNone(load_rule_cache(self.cache_file))
+        self.assertIsNone(load_rule_cache(os.path.join(self.directory.name, 'missing.rules.npz')))
+
+        svg_figures = self.read_sheet(SHEET_SVG_CONTENT)
+        self.assertEqual(enforce_cut_rules_cached(svg_figures, 1, self.cache_file), enforce_cut_rules(svg_figures, 1))
+        cache = load_rule_cache(self.cache_file)
+        self.assertEqual(len(cache.hashes), len(svg_figures))
+
+    def test_geometry_hashes(self):
+        svg_figures = self.read_sheet(SHEET_SVG_CONTENT)
+        hashes, boxes = geometry_hashes(svg_figures, flatten_figures(svg_figures))
+        moved_figures = self.read_sheet(SHEET_SVG_CONTENT.replace('cx="180"', 'cx="181"'))
+        moved_hashes, _ = geometry_hashes(moved_figures, flatten_figures(moved_figures))
+
+        self.assertEqual(len(set(hashes.tolist())), len(svg_figures))
+        self.assertEqual((hashes != moved_hashes).tolist(), [False] * (len(svg_figures) - 1) + [True])
+        self.assertTrue(np.all(np.isnan(boxes[0])))
+        np.testing.assert_allclose(boxes[-1], (175, 45, 185, 55), atol=0.01)
+
+    def test_spatial_index(self):
+        # the result is the same as comparing all boxes, the large box is found with every query
+        random = np.random.default_rng(0)
+        corners = random.uniform(0, 100, (500, 2))
+        boxes = np.column_stack((corners, corners + random.uniform(0, 5, (500, 2))))
+        boxes[7] = (0, 0, 100, 100)
+        boxes[9] = np.nan
+        index = build_spatial_index(boxes)
+        self.assertIn(7, index.large)
+
+        query_min = random.uniform(-10, 100, (20, 2))
+        query_max = query_min + random.uniform(0, 10, (20, 2))
+        expected = [figure for figure, box in enumerate(boxes) if
+                    np.any(np.all((box[:2] <= query_max) & (query_min <= box[2:]), axis=1))]
+        self.assertEqual(index.query(query_min, query_max).tolist(), expected)
+        self.assertEqual(index.query(np.zeros((0, 2)), np.zeros((0, 2))).tolist(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,314 @@
+import gzip
+import io
+import os
+import tempfile
+import types
+import unittest
+from unittest.mock import patch
+
+import ezdxf
+import numpy as np
+
+import src.dxf_handler
+from src.dxf_handler import write_dxf, draw_figure, dxf_to_bytes, write_dxf_to_stream
+from src.svg_handler import read_svg_file, iter_svg_file, iter_scale_file_param, scale_file_param
+from src.svg_shapes.transform_matrix import transform_message_matrix
+
+SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <g>
+    <circle cx="50" cy="50" r="10"/>
+    <rect x="10" y="10" width="30" height="20"/>
+  </g>
+  <line x1="0" y1="0" x2="100" y2="50"/>
+  <polygon points="80,50 150,130 50,150"/>
+  <path d="M 10,10 L 20,20"/>
+</svg>
+"""
+
+GROUP_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <g transform="translate(10, 0)">
+    <g transform="scale(2)">
+      <line x1="0" y1="0" x2="1" y2="1"/>
+      <circle cx="5" cy="5" r="1" transform="translate(1, 1)"/>
+    </g>
+    <line x1="0" y1="0" x2="1" y2="1"/>
+  </g>
+  <line x1="0" y1="0" x2="1" y2="1"/>
+</svg>
+"""
+
+USE_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <defs>
+    <g id="hole" transform="translate(1, 0)">
+      <circle cx="0" cy="0" r="2"/>
+      <line x1="0" y1="0" x2="3" y2="1"/>
+    </g>
+  </defs>
+  <symbol id="tile"><rect x="0" y="0" width="4" height="2"/></symbol>
+  <use href="#hole" x="10" y="20"/>
+  <use xlink:href="#hole" transform="rotate(90)" x="30" y="20"/>
+  <use href="#tile" transform="skewX(45)"/>
+  <use href="#unknown"/>
+</svg>
+"""
+
+BLOCK_NAMES_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="100mm" height="100mm" viewBox="0 0 100 100">
+  <defs>
+    <circle id="a:1" cx="0" cy="0" r="1"/>
+    <circle id="a;1" cx="0" cy="0" r="2"/>
+    <circle id="A_1" cx="0" cy="0" r="3"/>
+  </defs>
+  <use href="#a:1" x="10" y="10"/>
+  <use href="#a;1" x="20" y="10"/>
+  <use href="#A_1" x="30" y="10"/>
+  <use href="#a;1" x="40" y="10"/>
+</svg>
+"""
+
+PARALLEL_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <defs>
+    <g id="hole"><circle cx="0" cy="0" r="2"/></g>
+  </defs>
+  <circle cx="50" cy="50" r="10"/>
+  <use href="#hole" x="10" y="20"/>
+  <line x1="0" y1="0" x2="100" y2="50"/>
+  <polygon points="80,50 150,130 50,150"/>
+  <path d="M 0,0 Q 10,10 20,0 C 30,10 40,10 50,0 A 5,5 0 0 1 60,0 L 0,0"/>
+  <use href="#hole" x="30" y="20"/>
+  <rect x="10" y="10" width="30" height="20" rx="2"/>
+</svg>
+"""
+
+SCALED_USE_SVG_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="100mm" viewBox="0 0 200 100">
+  <defs>
+    <path id="arch" d="M 0,0 Q 5,10 10,0"/>
+    <g id="arches"><use href="#arch" transform="scale(2)"/></g>
+  </defs>
+  <use href="#arch" x="10" y="20"/>
+  <use href="#arches" x="30" y="20" transform="scale(5)"/>
+</svg>
+"""
+
+
+class TestSvgHandler(unittest.TestCase):
+    def setUp(self):
+        svg_file = tempfile.NamedTemporaryFile('w', suffix='.svg', delete=False)
+        svg_file.write(SVG_CONTENT)
+        svg_file.close()
+        self.svg_path = svg_file.name
+
+    def tearDown(self):
+        os.remove(self.svg_path)
+
+    def test_iter_svg_file(self):
+        svg_figures = iter_svg_file(self.svg_path)
+        self.assertIsInstance(svg_figures, types.GeneratorType)
+
+        names = [figure.get_name() for figure in svg_figures]
+        self.assertEqual(names, ['header', 'circle', 'rectangle', 'line', 'polygon', 'path'])
+
+    def test_iter_svg_file_matches_read_svg_file(self):
+        streamed_figures = list(iter_svg_file(self.svg_path))
+        read_figures = read_svg_file(self.svg_path)
+
+        self.assertEqual(len(streamed_figures), len(read_figures))
+        self.assertEqual(streamed_figures[1].center_y, read_figures[1].center_y)
+        self.assertEqual(streamed_figures[3].y2, read_figures[3].y2)
+        self.assertEqual(streamed_figures[3].y2, 50)
+
+    def test_iter_svg_file_clears_elements(self):
+        with patch("src.svg_handler.create_svg_figure") as mock_create:
+            mock_create.return_value = None
+            for _ in iter_svg_file(self.svg_path):
+                pass
+
+        # every element was already closed, thus it has no children left when it is processed
+        for call in mock_create.call_args_list:
+            self.assertEqual(len(call.args[0]), 0)
+
+    def test_iter_scale_file_param(self):
+        scaled_figures = iter_scale_file_param(iter_svg_file(self.svg_path), 0.5, 2)
+        self.assertIsInstance(scaled_figures, types.GeneratorType)
+
+        header, circle = next(scaled_figures), next(scaled_figures)
+        self.assertEqual(header.get_header_height(), 200)
+        self.assertEqual(circle.center_x, 25)
+        self.assertEqual(circle.center_y, 100)
+
+    def test_scaled_reading(self):
+        scaled_figures = scale_file_param(read_svg_file(self.svg_path), 0.5, 2)
+        folded_figures = read_svg_file(self.svg_path, 0.5, 2)
+
+        self.assertEqual(folded_figures[0].get_header_height(), scaled_figures[0].get_header_height())
+        self.assertEqual((folded_figures[1].center_x, folded_figures[1].center_y, folded_figures[1].radius),
+                         (scaled_figures[1].center_x, scaled_figures[1].center_y, scaled_figures[1].radius))
+        self.assertEqual((folded_figures[2].x, folded_figures[2].y), (scaled_figures[2].x, scaled_figures[2].y))
+        self.assertEqual(folded_figures[2].rect_height, scaled_figures[2].rect_height)
+        self.assertEqual((folded_figures[3].x2, folded_figures[3].y2), (scaled_figures[3].x2, scaled_figures[3].y2))
+        np.testing.assert_array_equal(folded_figures[4].point_list, scaled_figures[4].point_list)
+        self.assertEqual(folded_figures[5].parsed_path, scaled_figures[5].parsed_path)
+
+    def test_group_transformations(self):
+        with open(self.svg_path, 'w') as svg_file:
+            svg_file.write(GROUP_SVG_CONTENT)
+
+        header, nested_line, circle, group_line, line = read_svg_file(self.svg_path)
+        self.assertEqual((nested_line.x1, nested_line.y1, nested_line.x2, nested_line.y2), (10, 100, 12, 98))
+        self.assertEqual((circle.center_x, circle.center_y, circle.radius), (22, 88, 2))
+        self.assertEqual((group_line.x1, group_line.y1, group_line.x2, group_line.y2), (10, 100, 11, 99))
+        self.assertEqual((line.x1, line.y1, line.x2, line.y2), (0, 100, 1, 99))
+
+        # the file scaling is applied after the group transformations
+        scaled_line = read_svg_file(self.svg_path, 0.5, 0.5)[1]
+        self.assertEqual((scaled_line.x2, scaled_line.y2), (6, 49))
+
+    def test_group_matrix_composed_once(self):
+        with open(self.svg_path, 'w') as svg_file:
+            svg_file.write(GROUP_SVG_CONTENT)
+
+        with patch("src.svg_handler.transform_message_matrix", wraps=transform_message_matrix) as mock_matrix:
+            read_svg_file(self.svg_path)
+        self.assertEqual([call.args[0] for call in mock_matrix.call_args_list], ["translate(10, 0)", "scale(2)"])
+
+    def test_use_of_definitions(self):
+        with open(self.svg_path, 'w') as svg_file:
+            svg_file.write(USE_SVG_CONTENT)
+
+        header, use, rotated_use, skewed_rect = read_svg_file(self.svg_path)
+        self.assertEqual((use.get_name(), use.block_name), ('use', 'hole'))
+        self.assertEqual((use.insert, use.scale_x, use.scale_y, use.rotation), ((10, 80), 1, 1, 0))
+        self.assertEqual((rotated_use.insert, rotated_use.rotation), ((-20, 70), -90))
+        # the block figures are created once and shared by all uses
+        self.assertIs(use.block_figures, rotated_use.block_figures)
+        circle, line = use.block_figures
+        self.assertEqual((circle.center_x, circle.center_y, line.x2, line.y2), (1, 0, 4, -1))
+        # a skew can not be expressed by an insert, thus the definition is drawn directly
+        self.assertEqual(skewed_rect.get_name(), 'rectangle')
+
+        # the file scaling is folded into the insert
+        scaled_use = read_svg_file(self.svg_path, 0.5, 0.5)[1]
+        self.assertEqual((scaled_use.insert, scaled_use.scale_x, scaled_use.scale_y), ((5, 40), 0.5, 0.5))
+
+    def test_draw_use_as_block(self):
+        with open(self.svg_path, 'w') as svg_file:
+            svg_file.write(USE_SVG_CONTENT)
+
+        doc = ezdxf.new()
+        msp = doc.modelspace()
+        for figure in read_svg_file(self.svg_path)[1:3]:
+            draw_figure(figure, msp)
+
+        self.assertEqual([entity.dxftype() for entity in doc.blocks.get('hole')], ['CIRCLE', 'LINE'])
+        inserts = msp.query('INSERT')
+        self.assertEqual(len(inserts), 2)
+        # the inserted geometry is at the position of the use
+        rotated_circle = next(entity for entity in inserts[1].virtual_entities() if entity.dxftype() == 'CIRCLE')
+        np.testing.assert_allclose(rotated_circle.dxf.center, (-20, 69, 0), atol=1e-9)
+
+    def test_unique_block_names(self):
+        # the ids give the same block name after replacing the invalid characters (dxf block names are not
+        # case-sensitive), every definition gets its own block
+        with open(self.svg_path, 'w') as svg_file:
+            svg_file.write(BLOCK_NAMES_SVG_CONTENT)
+
+        doc = ezdxf.new()
+        msp = doc.modelspace()
+        uses = read_svg_file(self.svg_path)[1:]
+        for figure in uses:
+            draw_figure(figure, msp)
+
+        self.assertEqual([use.block_name for use in uses], ['a_1', 'a_1_2', 'A_1_3', 'a_1_2'])
+        self.assertEqual([doc.blocks.get(name)[0].dxf.radius for name in ('a_1', 'a_1_2', 'A_1_3')], [1, 2, 3])
+
+    def test_block_flattened_for_largest_use(self):
+        with open(self.svg_path, 'w') as svg_file:
+            svg_file.write(SCALED_USE_SVG_CONTENT)
+        svg_figures = read_svg_file(self.svg_path)[1:]
+
+        # the block of the arch is inserted unscaled first, but it is inserted with the scaling 10 in the other block
+        tolerances = src.dxf_handler.block_tolerances(svg_figures, 0.1)
+        self.assertEqual(tolerances, {'arch': 0.01, 'arches': 0.02})
+
+        doc = src.dxf_handler.build_dxf_document(svg_figures, flatten_tolerance=0.1)
+        first_use = ezdxf.new().modelspace()
+        draw_figure(svg_figures[0].block_figures[0], first_use, 0.1)
+        largest_use = ezdxf.new().modelspace()
+        draw_figure(svg_figures[0].block_figures[0], largest_use, 0.01)
+        arch = doc.blocks.get('arch').query('LWPOLYLINE')[0]
+        self.assertEqual(len(arch), len(largest_use.query('LWPOLYLINE')[0]))
+        self.assertGreater(len(arch), len(first_use.query('LWPOLYLINE')[0]))
+
+    @patch("src.dxf_handler.ezdxf")
+    def test_write_dxf_consumes_generator(self, mock_ezdxf):
+        msp = mock_ezdxf.new.return_value.modelspace.return_value
+
+        write_dxf(iter_svg_file(self.svg_path), "streamed")
+
+        msp.add_circle.assert_called_once_with((50, 50), 10)
+        mock_ezdxf.new.return_value.saveas.assert_called_once_with("dxf_files/streamed.dxf", fmt="asc")
+
+
+    def test_dxf_to_bytes(self):
+        for fmt in ('asc', 'bin'):
+            for streaming in (False, True):
+                dxf_bytes = dxf_to_bytes(iter_svg_file(self.svg_path), fmt, streaming)
+                self.assertEqual(dxf_bytes.startswith(b"AutoCAD Binary DXF"), fmt == 'bin')
+                if fmt == 'asc':
+                    doc = ezdxf.read(io.StringIO(dxf_bytes.decode()))
+                    self.assertEqual(len(doc.modelspace().query('CIRCLE')), 1)
+
+    def test_reproducible_dxf_to_bytes(self):
+        for fmt in ('asc', 'bin'):
+            for streaming in (False, True):
+                first = dxf_to_bytes(iter_svg_file(self.svg_path), fmt, streaming, reproducible=True)
+                second = dxf_to_bytes(iter_svg_file(self.svg_path), fmt, streaming, reproducible=True)
+                self.assertEqual(first, second)
+        dxf_bytes = dxf_to_bytes(read_svg_file(self.svg_path), reproducible=True)
+        # ezdxf sets new dates and guids while reading, thus the written tags are checked
+        self.assertIn(b"$TDUPDATE\n 40\n2451545.0\n", dxf_bytes)
+        self.assertIn(b"$VERSIONGUID\n  2\n{00000000-0000-0000-0000-000000000000}\n", dxf_bytes)
+        self.assertEqual(len(ezdxf.read(io.StringIO(dxf_bytes.decode())).modelspace().query('CIRCLE')), 1)
+
+    def test_parallel_drawing_matches_serial(self):
+        with open(self.svg_path, 'w') as svg_file:
+            svg_file.write(PARALLEL_SVG_CONTENT)
+        svg_figures = read_svg_file(self.svg_path)
+        with patch.object(src.dxf_handler, 'PARALLEL_CHUNK_SIZE', 2):
+            for flatten_tolerance in (None, 0.1):
+                serial = dxf_to_bytes(svg_figures, flatten_tolerance=flatten_tolerance, reproducible=True)
+                parallel = dxf_to_bytes(svg_figures, flatten_tolerance=flatten_tolerance, workers=2, reproducible=True)
+                self.assertEqual(parallel, serial)
+        doc = ezdxf.read(io.StringIO(parallel.decode()))
+        self.assertEqual(len(doc.modelspace().query('INSERT')), 2)
+
+    def test_write_dxf_to_stream(self):
+        text_stream = io.StringIO()
+        write_dxf_to_stream(read_svg_file(self.svg_path), text_stream)
+        doc = ezdxf.read(io.StringIO(text_stream.getvalue()))
+        self.assertEqual(len(doc.modelspace().query('CIRCLE')), 1)
+
+        # the stream is kept open, e.g. to write into a compressed stream
+        binary_stream = io.BytesIO()
+        with gzip.GzipFile(fileobj=binary_stream, mode='wb') as compressed_stream:
+            write_dxf_to_stream(iter_svg_file(self.svg_path), compressed_stream, streaming=True)
+            self.assertFalse(compressed_stream.closed)
+        doc = ezdxf.read(io.StringIO(gzip.decompress(binary_stream.getvalue()).decode()))
+        self.assertEqual(len(doc.modelspace().query('CIRCLE')), 1)
+
+        self.assertRaises(TypeError, write_dxf_to_stream, [], io.StringIO(), 'bin')
+
+    @patch("src.dxf_handler.ezdxf")
+    def test_write_dxf_output_path(self, mock_ezdxf):
+        self.assertEqual(write_dxf(read_svg_file(self.svg_path), output_path="out/file.dxf"), "out/file.dxf")
+        mock_ezdxf.new.return_value.saveas.assert_called_once_with("out/file.dxf", fmt="asc")
+        self.assertRaises(ValueError, write_dxf, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
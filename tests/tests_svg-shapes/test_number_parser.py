@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from src.svg_shapes.number_parser import *
+
+
+class TestNumberParser(unittest.TestCase):
+
+    def test_parse_numbers(self):
+        np.testing.assert_array_equal(parse_numbers("1 2.5 -3"), [1, 2.5, -3])
+        np.testing.assert_array_equal(parse_numbers("1,2.5 , -3"), [1, 2.5, -3])
+        np.testing.assert_array_equal(parse_numbers("1\n2\t3"), [1, 2, 3])
+        self.assertEqual(parse_numbers("").shape, (0,))
+        self.assertEqual(parse_numbers("   ").shape, (0,))
+        self.assertEqual(parse_numbers("1 2").dtype, np.float64)
+
+    def test_parse_compact_numbers(self):
+        np.testing.assert_array_equal(parse_numbers("1-2"), [1, -2])
+        np.testing.assert_array_equal(parse_numbers("1e-3-2"), [0.001, -2])
+        np.testing.assert_array_equal(parse_numbers("0.5.5"), [0.5, 0.5])
+        np.testing.assert_array_equal(parse_numbers("1e5.5-.5+.5"), [100000, 0.5, -0.5, 0.5])
+        np.testing.assert_array_equal(parse_numbers("10.e1,2E+2"), [100, 200])
+
+    def test_parse_invalid_numbers(self):
+        with self.assertLogs("src.svg_shapes.number_parser", level="WARNING"):
+            np.testing.assert_array_equal(parse_numbers("1 x 2"), [1, 2])
+
+    def test_parse_points(self):
+        expected = [(80, 50), (150, 130), (50, 150)]
+        np.testing.assert_array_equal(parse_points("80,50 150,130 50,150"), expected)
+        np.testing.assert_array_equal(parse_points("80 50 150 130 50 150"), expected)
+        np.testing.assert_array_equal(parse_points("80,50,150,130,50,150"), expected)
+        np.testing.assert_array_equal(parse_points(" 80,50\n150,130, 50,150 "), expected)
+        np.testing.assert_array_equal(parse_points("1e-3-2"), [(0.001, -2)])
+        self.assertEqual(parse_points("").shape, (0, 2))
+
+        with self.assertLogs("src.svg_shapes.number_parser", level="WARNING") as log:
+            points = parse_points("1,2 3")
+        np.testing.assert_array_equal(points, [(1, 2)])
+        self.assertIn("odd number of coordinates", log.output[0])
@@ -0,0 +1,150 @@
+import unittest
+import warnings
+
+import numpy as np
+from svgpathtools import parse_path, Arc
+from svgpathtools.path import transform
+
+from src.svg_shapes.path_data import *
+
+
+class TestPathData(unittest.TestCase):
+    def setUp(self):
+        self.path_strings = [
+            "M100 100 L200 100 Q250 50, 300 100 C350 150, 450 50, 500 100 A50 50 0 0 1 600 100",
+            "m10 10 l10 0 0 10 -10 0 z m30 0 h10 v10 h-10 Z",
+            "M0 0 C10 10 20 10 30 0 S50 -10 60 0 s20 10 30 0",
+            "M0 0 Q10 10 20 0 T40 0 t20 0 t20 0",
+            "M10,10 H50 V50 L10,50 Z M60 60 70 70 80 60",
+            "M10 10 A30 20 30 1 0 50 40 a25 25 0 0 1 40 0 A5 5 0 0 0 200 10",
+            "M 1e2,1E1 l -1.5e1 .5 c.5 .5 1 1 1.5 0",
+        ]
+
+    def assertPathAlmostEqual(self, path, expected_path):
+        self.assertEqual(len(path), len(expected_path))
+        for segment, expected_segment in zip(path, expected_path):
+            self.assertEqual(type(segment), type(expected_segment))
+            if isinstance(expected_segment, Arc):
+                points = [segment.start, segment.end, segment.center, segment.radius]
+                expected_points = [expected_segment.start, expected_segment.end, expected_segment.center,
+                                   expected_segment.radius]
+                self.assertAlmostEqual(segment.theta, expected_segment.theta, 9)
+                self.assertAlmostEqual(segment.delta, expected_segment.delta, 9)
+                self.assertEqual((segment.large_arc, segment.sweep), (expected_segment.large_arc,
+                                                                      expected_segment.sweep))
+            else:
+                points, expected_points = segment.bpoints(), expected_segment.bpoints()
+            for point, expected_point in zip(points, expected_points):
+                self.assertAlmostEqual(point, expected_point, 9)
+
+    def test_parse_path_data(self):
+        for path_string in self.path_strings:
+            with self.subTest(path_string=path_string):
+                self.assertPathAlmostEqual(parse_path_data(path_string).to_svgpathtools(), parse_path(path_string))
+
+    def test_arrays(self):
+        path_data = parse_path_data(self.path_strings[0])
+        self.assertEqual(len(path_data), 4)
+        np.testing.assert_array_equal(path_data.kinds, [LINE, QUADRATIC_BEZIER, CUBIC_BEZIER, ARC])
+        self.assertEqual(path_data.points.shape, (4, 4, 2))
+        np.testing.assert_array_equal(path_data.points[1], [(200, 100), (250, 50), (250, 50), (300, 100)])
+        # arc: [start, center, center, end]
+        np.testing.assert_allclose(path_data.points[3], [(500, 100), (550, 100), (550, 100), (600, 100)])
+        np.testing.assert_array_equal(path_data.radii[3], (50, 50))
+        self.assertTrue(path_data.sweep[3])
+        self.assertFalse(path_data.large_arc[3])
+
+        self.assertEqual(len(parse_path_data("")), 0)
+        self.assertEqual(len(parse_path_data("M 10 10")), 0)
+
+    def test_compact_syntax(self):
+        self.assertPathAlmostEqual(parse_path_data("M.5.5L1-1-2.5e1.5").to_svgpathtools(),
+                                   parse_path("M 0.5 0.5 L 1 -1 L -25 0.5"))
+        # arc flags without separator
+        self.assertPathAlmostEqual(parse_path_data("M0 0a25 25 0 01-50 0").to_svgpathtools(),
+                                   parse_path("M 0 0 a 25 25 0 0 1 -50 0"))
+
+    def test_degenerate_arcs(self):
+        with self.assertLogs("src.svg_shapes.path_data", level="WARNING"):
+            path_data = parse_path_data("M0 0 A0 10 0 0 1 10 10 A5 5 0 0 1 10 10")
+        # zero radius: line, identical end points: omitted
+        np.testing.assert_array_equal(path_data.kinds, [LINE])
+
+    def test_malformed_path(self):
+        for path_string in ["10 10 L 20 20", "M 10 L 20 20", "M 10 10 L 20 x", "M 10 10 Z 5", "M0 0 A 1 1 0 2 1 5 5"]:
+            with self.subTest(path_string=path_string):
+                with self.assertRaises(ValueError):
+                    parse_path_data(path_string)
+
+    def test_d(self):
+        for path_string in self.path_strings:
+            with self.subTest(path_string=path_string):
+                path = parse_path(path_string)
+                self.assertEqual(parse_path_data(path_string).d(), path.d())
+                self.assertPathAlmostEqual(parse_path_data(parse_path_data(path_string).d()).to_svgpathtools(), path)
+
+    def test_scale(self):
+        path_data = parse_path_data(self.path_strings[0])
+        path_data.scale(0.5, 2)
+        np.testing.assert_array_equal(path_data.points[0], [(50, 200), (50, 200), (100, 200), (100, 200)])
+        np.testing.assert_allclose(path_data.points[3, 1], (275, 200))
+        np.testing.assert_array_equal(path_data.radii[3], (25, 100))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            expected_path = parse_path(self.path_strings[1]).scaled(3, 3)
+        path_data = parse_path_data(self.path_strings[1])
+        path_data.scale(3, 3)
+        self.assertPathAlmostEqual(path_data.to_svgpathtools(), expected_path)
+
+    def test_transform(self):
+        matrices = [np.array([[1, 0, 30], [0, 1, -10], [0, 0, 1]]),
+                    np.array([[0.5, -0.8, 10], [0.3, 1.5, 20], [0, 0, 1]]),
+                    np.array([[1, 0.4452, 0], [0, 1, 0], [0, 0, 1]]),
+                    np.array([[-2, 0, 0], [0, 1, 5], [0, 0, 1]])]
+        for matrix in matrices:
+            for path_string in self.path_strings:
+                with self.subTest(matrix=matrix, path_string=path_string):
+                    path_data = parse_path_data(path_string)
+                    path_data.transform(matrix)
+                    self.assertPathAlmostEqual(path_data.to_svgpathtools(),
+                                               transform(parse_path(path_string), matrix))
+
+    def test_flip(self):
+        path_data = parse_path_data(self.path_strings[0])
+        path_data.flip(1000)
+        np.testing.assert_array_equal(path_data.points[0], [(100, 900), (100, 900), (200, 900), (200, 900)])
+        # the center is just moved, the arc parameters are kept
+        np.testing.assert_allclose(path_data.points[3, 1], (550, 900))
+        self.assertTrue(path_data.sweep[3])
+
+    def test_path_data_from_svgpathtools(self):
+        for path_string in self.path_strings:
+            with self.subTest(path_string=path_string):
+                path = parse_path(path_string)
+                self.assertPathAlmostEqual(path_data_from_svgpathtools(path).to_svgpathtools(), path)
+
+    def test_concatenate_path_data(self):
+        first, second = parse_path_data(self.path_strings[0]), parse_path_data(self.path_strings[1])
+        joined = concatenate_path_data([first, second])
+        self.assertEqual(len(joined), len(first) + len(second))
+
+        joined.scale(2, 2)
+        np.testing.assert_array_equal(first.points[0, 0], (200, 200))
+        np.testing.assert_array_equal(second.points[0, 0], (20, 20))
+        np.testing.assert_array_equal(first.radii[3], (100, 100))
+
+        self.assertEqual(len(concatenate_path_data([])), 0)
+
+    def test_select(self):
+        path_data = parse_path_data(self.path_strings[0])
+        selected = path_data.select([0, 3])
+
+        self.assertEqual(len(selected), 2)
+        np.testing.assert_array_equal(selected.kinds, path_data.kinds[[0, 3]])
+        np.testing.assert_array_equal(selected.radii[1], path_data.radii[3])
+        self.assertEqual(selected.delta[1], path_data.delta[3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 
-from svgpathtools import Path
+from svgpathtools import Path, Line, QuadraticBezier, CubicBezier, Arc
 
 from src.svg_shapes.svgPath import *
 
@@ -39,6 +39,15 @@ class TestSvgPath(unittest.TestCase):
                                       complex(300, 450)))
         self.assertEqual(basic_path.parsed_path, scaled_parsed_path)
 
+    def test_scale_svg_paths(self):
+        paths = [SvgPath(self.path_element, self.svg_height), SvgPath({'d': "M 10 10 L 20 20"}, self.svg_height)]
+        parsed_path = paths[0].parsed_path
+        scale_svg_paths(paths, 0.5, 0.5)
+
+        self.assertIsNot(paths[0].parsed_path, parsed_path)
+        self.assertEqual(paths[0].parsed_path[0], Line(complex(50, 450), complex(100, 450)))
+        self.assertEqual(paths[1].parsed_path[0], Line(complex(5, 495), complex(10, 490)))
+
     def test_transform(self):
         self.path_element['transform'] = "translate(30)"
         x_translate_path = SvgPath(self.path_element, self.svg_height)
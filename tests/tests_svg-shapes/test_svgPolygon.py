@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from src.svg_shapes.svgPolygon import *
 
 
@@ -10,7 +12,10 @@ class TestSvgPolygon(unittest.TestCase):
 
     def test_initialization(self):
         polygon = SvgPolygon(self.polygon_element, self.svg_height)
-        self.assertListEqual(polygon.point_list, [(80, 750), (150, 670), (50, 650)])
+        np.testing.assert_array_equal(polygon.point_list, [(80, 750), (150, 670), (50, 650)])
+        self.assertEqual(polygon.point_list.shape, (3, 2))
+        self.assertEqual(polygon.point_list.dtype, np.float64)
+        self.assertTrue(polygon.point_list.flags['C_CONTIGUOUS'])
 
     def test_getter(self):
         polygon = SvgPolygon(self.polygon_element, self.svg_height)
@@ -21,16 +26,16 @@ class TestSvgPolygon(unittest.TestCase):
         scale_y = 2
         polygon = SvgPolygon(self.polygon_element, self.svg_height)
         polygon.scale(scale_x, scale_y)
-        self.assertListEqual(polygon.point_list, [(40, 1500), (75, 1340), (25, 1300)])
+        np.testing.assert_array_equal(polygon.point_list, [(40, 1500), (75, 1340), (25, 1300)])
 
     def test_transformation(self):
         self.polygon_element['transform'] = 'translate(-33)'
         x_translated_polygon = SvgPolygon(self.polygon_element, self.svg_height)
-        self.assertListEqual(x_translated_polygon.point_list, [(47, 750), (117, 670), (17, 650)])
+        np.testing.assert_array_equal(x_translated_polygon.point_list, [(47, 750), (117, 670), (17, 650)])
 
         self.polygon_element['transform'] = 'translate(12,48)'
         translated_polygon = SvgPolygon(self.polygon_element, self.svg_height)
-        self.assertListEqual(translated_polygon.point_list, [(92, 702), (162, 622), (62, 602)])
+        np.testing.assert_array_equal(translated_polygon.point_list, [(92, 702), (162, 622), (62, 602)])
 
         self.polygon_element['transform'] = 'rotate(193)'
         rotated_polygon = SvgPolygon(self.polygon_element, self.svg_height)
@@ -50,11 +55,11 @@ class TestSvgPolygon(unittest.TestCase):
 
         self.polygon_element['transform'] = 'scale(0.2)'
         scaled_polygon = SvgPolygon(self.polygon_element, self.svg_height)
-        self.assertListEqual(scaled_polygon.point_list, [(16, 790), (30, 774), (10, 770)])
+        np.testing.assert_array_equal(scaled_polygon.point_list, [(16, 790), (30, 774), (10, 770)])
 
         self.polygon_element['transform'] = 'scale(5, 2)'
         scaled_polygon = SvgPolygon(self.polygon_element, self.svg_height)
-        self.assertListEqual(scaled_polygon.point_list, [(400, 700), (750, 540), (250, 500)])
+        np.testing.assert_array_equal(scaled_polygon.point_list, [(400, 700), (750, 540), (250, 500)])
 
         self.polygon_element['transform'] = 'skewX(-52)'
         skew_x_polygon = SvgPolygon(self.polygon_element, self.svg_height)
@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from src.svg_shapes.svgPolyline import *
 
 
@@ -10,7 +12,7 @@ class TestSvgPolyline(unittest.TestCase):
 
     def test_initialization(self):
         basic_polyline = SvgPolyline(self.polyline_element, self.svg_height)
-        self.assertListEqual(basic_polyline.point_list, [(100, 700), (150, 650), (200, 720), (250, 635), (300, 750)])
+        np.testing.assert_array_equal(basic_polyline.point_list, [(100, 700), (150, 650), (200, 720), (250, 635), (300, 750)])
 
     def test_getter(self):
         basic_polyline = SvgPolyline(self.polyline_element, self.svg_height)
@@ -21,17 +23,17 @@ class TestSvgPolyline(unittest.TestCase):
         scale_y = 0.5
         basic_polyline = SvgPolyline(self.polyline_element, self.svg_height)
         basic_polyline.scale(scale_x, scale_y)
-        self.assertListEqual(basic_polyline.point_list, [(200, 350), (300, 325), (400, 360), (500, 317.5), (600, 375)])
+        np.testing.assert_array_equal(basic_polyline.point_list, [(200, 350), (300, 325), (400, 360), (500, 317.5), (600, 375)])
 
     def test_transformation(self):
         self.polyline_element['transform'] = 'translate(-34)'
         x_translated_polyline = SvgPolyline(self.polyline_element, self.svg_height)
-        self.assertListEqual(x_translated_polyline.point_list,
+        np.testing.assert_array_equal(x_translated_polyline.point_list,
                              [(66, 700), (116, 650), (166, 720), (216, 635), (266, 750)])
 
         self.polyline_element['transform'] = 'translate(28, 41)'
         translated_polyline = SvgPolyline(self.polyline_element, self.svg_height)
-        self.assertListEqual(translated_polyline.point_list,
+        np.testing.assert_array_equal(translated_polyline.point_list,
                              [(128, 659), (178, 609), (228, 679), (278, 594), (328, 709)])
 
         self.polyline_element['transform'] = 'rotate(273)'
@@ -54,11 +56,11 @@ class TestSvgPolyline(unittest.TestCase):
 
         self.polyline_element['transform'] = 'scale(2)'
         scaled_polyline = SvgPolyline(self.polyline_element, self.svg_height)
-        self.assertListEqual(scaled_polyline.point_list, [(200, 600), (300, 500), (400, 640), (500, 470), (600, 700)])
+        np.testing.assert_array_equal(scaled_polyline.point_list, [(200, 600), (300, 500), (400, 640), (500, 470), (600, 700)])
 
         self.polyline_element['transform'] = 'scale(0.3, 1.2)'
         scaled_polyline = SvgPolyline(self.polyline_element, self.svg_height)
-        self.assertListEqual(scaled_polyline.point_list, [(30, 680), (45, 620), (60, 704), (75, 602), (90, 740)])
+        np.testing.assert_array_equal(scaled_polyline.point_list, [(30, 680), (45, 620), (60, 704), (75, 602), (90, 740)])
 
         self.polyline_element['transform'] = 'skewX(39)'
         skew_x_polyline = SvgPolyline(self.polyline_element, self.svg_height)
@@ -0,0 +1,42 @@
+import unittest
+
+from src.svg_shapes.svgUse import *
+
+
+class TestSvgUse(unittest.TestCase):
+    def setUp(self):
+        self.svg_height = 600
+        self.use_element = {'href': "#hole", 'x': "50", 'y': "50"}
+
+    def test_initialisation(self):
+        use = SvgUse(self.use_element, self.svg_height)
+        self.assertEqual(use.get_name(), 'use')
+        self.assertEqual((use.reference, use.block_name), ('hole', 'hole'))
+        self.assertEqual((use.insert, use.scale_x, use.scale_y, use.rotation), ((50, 550), 1, 1, 0))
+        self.assertFalse(use.has_skew())
+
+    def test_references(self):
+        use = SvgUse({'{http://www.w3.org/1999/xlink}href': "#a:b"}, self.svg_height)
+        self.assertEqual((use.reference, use.block_name), ('a:b', 'a_b'))
+        self.assertIsNone(SvgUse({'href': "other.svg#hole"}, self.svg_height).reference)
+
+    def test_transformation(self):
+        self.use_element['transform'] = "rotate(90) scale(2, 3)"
+        use = SvgUse(self.use_element, self.svg_height)
+        self.assertEqual((use.insert, use.scale_x, use.scale_y, use.rotation), ((-100, 450), 3, 2, -90))
+
+        self.use_element['transform'] = "scale(-1, 1)"
+        mirrored_use = SvgUse(self.use_element, self.svg_height)
+        self.assertEqual((mirrored_use.scale_x, mirrored_use.scale_y, mirrored_use.rotation), (1, -1, 180))
+
+        self.use_element['transform'] = "skewX(30)"
+        self.assertTrue(SvgUse(self.use_element, self.svg_height).has_skew())
+
+    def test_scale(self):
+        use = SvgUse(self.use_element, self.svg_height)
+        use.scale(2, 3)
+        self.assertEqual((use.insert, use.scale_x, use.scale_y), ((100, 1650), 2, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
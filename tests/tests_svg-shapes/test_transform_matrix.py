@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+
+from src.svg_shapes.transform_matrix import *
+from src.svg_shapes.transform_messages import export_transformations
+from src.utilities import rotate_clockwise_around_point, skew_x, skew_y, matrix_transformation
+
+
+class TestTransformMatrix(unittest.TestCase):
+
+    def test_cos_sin_degree(self):
+        self.assertEqual(cos_sin_degree(90), (0, 1))
+        self.assertEqual(cos_sin_degree(-90), (0, -1))
+        self.assertEqual(cos_sin_degree(540), (-1, 0))
+        cos, sin = cos_sin_degree(30)
+        self.assertAlmostEqual(cos, 3 ** 0.5 / 2)
+        self.assertAlmostEqual(sin, 0.5)
+
+    def test_single_transformations(self):
+        x, y = 80, 50
+        self.assertEqual(apply_matrix(translation_matrix(12), x, y), (92, 50))
+        self.assertEqual(apply_matrix(translation_matrix(12, 48), x, y), (92, 98))
+        self.assertEqual(apply_matrix(scaling_matrix(0.5), x, y), (40, 25))
+        self.assertEqual(apply_matrix(scaling_matrix(5, 2), x, y), (400, 100))
+
+        # same rotation as the one of the utilities (in svg coordinates)
+        rot_x, rot_y = rotate_clockwise_around_point(x, -y, 61, 263, -123)
+        new_x, new_y = apply_matrix(rotation_matrix(61, 263, 123), x, y)
+        self.assertAlmostEqual(new_x, rot_x, 4)
+        self.assertAlmostEqual(new_y, -rot_y, 4)
+
+        self.assertAlmostEqual(apply_matrix(skew_x_matrix(-52), x, y)[0], skew_x(x, y, -52))
+        self.assertAlmostEqual(apply_matrix(skew_y_matrix(11), x, y)[1], skew_y(x, y, 11))
+        self.assertEqual(apply_matrix(values_matrix([2, 0.3, 2, 0.8, -32, 23]), x, y),
+                         matrix_transformation(x, y, [2, 0.3, 2, 0.8, -32, 23]))
+        self.assertEqual(apply_matrix(values_matrix([2, 0.3, 2, 0.8]), x, y),
+                         matrix_transformation(x, y, [2, 0.3, 2, 0.8, 0, 0]))
+
+        self.assertEqual(apply_matrix(svg_to_dxf_matrix(800), x, y), (80, 750))
+
+    def test_transformation_to_matrix(self):
+        self.assertIsNone(transformation_to_matrix('translate', [1, 2, 3]))
+        self.assertIsNone(transformation_to_matrix('rotate', [1, 2]))
+        self.assertIsNone(transformation_to_matrix('matrix', [1, 2, 3, 4, 5]))
+        np.testing.assert_array_equal(transformation_to_matrix('scale', [2]), scaling_matrix(2))
+
+    def test_compose_transformations(self):
+        # transformations are applied in the order of the list
+        transformation_list = export_transformations(
+            'rotate(90, 1, 0) translate(3, -5) matrix(0, -1, -1, 0) matrix(1, 0, 0, 1, -4, -6) scale(3)')
+        matrix = compose_transformations(transformation_list)
+        self.assertEqual(apply_matrix(matrix, 0, 0), (6, -30))
+
+        # unsupported transformations are skipped
+        transformation_list = export_transformations('translate(10) skewX(30) scale(2)')
+        matrix = compose_transformations(transformation_list, ('translate', 'scale'))
+        self.assertEqual(apply_matrix(matrix, 1, 1), (22, 2))
+
+        self.assertTrue(has_rotation(export_transformations('scale(2) rotate(10)')))
+        self.assertFalse(has_rotation(export_transformations('scale(2) translate(10)')))
+
+    def test_transform_message_matrix(self):
+        clear_transform_caches()
+        message = 'rotate(90, 1, 0) translate(3, -5)'
+        matrix = transform_message_matrix(message)
+        np.testing.assert_array_equal(matrix, compose_transformations(export_transformations(message)))
+        self.assertFalse(matrix.flags.writeable)
+
+        self.assertIs(transform_message_matrix(message), matrix)
+        self.assertIsNot(transform_message_matrix(message, ('translate',)), matrix)
+        self.assertEqual(transform_cache_info()['matrices'].hits, 1)
+        self.assertEqual(transform_cache_info()['matrices'].misses, 2)
+        # the message is only parsed once
+        self.assertEqual(transform_cache_info()['messages'].misses, 1)
+        self.assertEqual(transform_cache_info()['messages'].hits, 2)
+
+        np.testing.assert_allclose(path_transform_matrix('translate(10) rotate(90)'),
+                                   translation_matrix(10) @ rotation_matrix(90), atol=1e-12)
+
+        clear_transform_caches()
+        self.assertEqual(transform_cache_info()['matrices'].currsize, 0)
+
+    def test_apply_matrix(self):
+        matrix = values_matrix([3, 1, -1, 3, 30, 40])
+        points = apply_matrix_to_points(matrix, [(10, 10), (40, 10), (40, 30)])
+        np.testing.assert_array_equal(points, [(50, 80), (140, 110), (120, 170)])
+        self.assertEqual(apply_matrix_to_points(matrix, []).shape, (0, 2))
+
+        self.assertEqual(apply_matrix_to_vector(matrix, 30, 0), (90, 30))
+        self.assertEqual(round_point((0.123456, 1.000001)), (0.12346, 1))
+        self.assertEqual(axis_scales(scaling_matrix(3, -4) @ rotation_matrix(90)), (4, 3))
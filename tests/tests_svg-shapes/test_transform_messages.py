@@ -50,3 +50,12 @@ class TestTransformMessages(unittest.TestCase):
         crazy_transform = "translate(10,20) rotate(90,30,30) scale(1.2,0.8) skewX(10) skewY(5) matrix(1, 0, 0, 1, 5, 5)"
         transform_list = export_transformations(crazy_transform)
         self.assertEqual(len(transform_list), 6)
+
+    def test_export_transformations_values(self):
+        transform_list = export_transformations("translate(1e1 -5) scale(.5-1) rotate(nothing) rotate( +30 )")
+        self.assertEqual(transform_list, [('translate', [10, -5]), ('scale', [0.5, -1]), ('rotate', [30])])
+
+        # every call gets its own lists, the cached result is not changed
+        transform_list[0][1].append(3)
+        self.assertEqual(export_transformations("translate(1e1 -5) scale(.5-1) rotate(nothing) rotate( +30 )")[0],
+                         ('translate', [10, -5]))